@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from celery.signals import after_task_publish, before_task_publish
+        from django.db.backends.signals import connection_created
+
+        from . import metrics, profiling
+
+        connection_created.connect(metrics.install_sql_wrapper)
+        connection_created.connect(profiling.install_sql_wrapper)
+        before_task_publish.connect(metrics.before_task_publish)
+        after_task_publish.connect(metrics.after_task_publish)
@@ -0,0 +1,124 @@
+"""
+Async versions of the read endpoints, served instead of the DRF views when
+``API_ASYNC_READS`` is set (opt-in, also under ASGI).
+
+They keep the URLs, query parameters, payloads and error format of the sync
+views, but wait on the database through the async ORM (``aget``, ``acount``,
+``async for``), so a slow query no longer pins a threadpool slot. The payload
+cache and ETag handling stay on the sync path: both are synchronous and
+would put a thread hop back on every request.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.http.response import HttpResponseBase
+from rest_framework.exceptions import MethodNotAllowed, NotAuthenticated
+from rest_framework.request import Request
+
+from .authentication import aauthenticate_request
+from .exceptions import (
+    AnnouncementNotFoundException,
+    ValidationErrorException,
+    custom_exception_handler,
+)
+from .fastpath import serialize_rows, values_for
+from .models import Announcement
+from .pagination import AnnouncementPageNumberPagination, KeysetPagination
+from .renderers import FastJSONRenderer
+from .search import filter_announcements, order_by_rank
+from .serializers import SystemUserSerializer
+from .streaming import ndjson_response
+from .views import announcement_serializer_class, wants_public_authors
+
+
+def render(data, status_code=200):
+    return HttpResponse(FastJSONRenderer().render(data), status=status_code, content_type='application/json')
+
+
+def async_api_view(authenticated=False):
+    """
+    Minimal async counterpart of ``@api_view(['GET'])``: JWT authentication,
+    an optional IsAuthenticated check and the project's JSON error format.
+    """
+    def decorator(func):
+        @wraps(func)
+        async def view(django_request, *args, **kwargs):
+            request = Request(django_request)
+            try:
+                if django_request.method not in ('GET', 'HEAD'):
+                    raise MethodNotAllowed(django_request.method)
+                request.user = await aauthenticate_request(django_request)
+                if authenticated and not request.user.is_authenticated:
+                    raise NotAuthenticated()
+                result = await func(request, *args, **kwargs)
+            except Exception as exc:
+                response = custom_exception_handler(exc, {})
+                return render(response.data, response.status_code)
+            if isinstance(result, HttpResponseBase):
+                return result
+            return render(result)
+        return view
+    return decorator
+
+
+@async_api_view()
+async def announcement_list(request):
+    public = wants_public_authors(request)
+    serializer_class = announcement_serializer_class(public)
+    announcements = values_for(Announcement.objects.order_by('-date_added', '-id'), serializer_class)
+    if KeysetPagination.is_requested(request):
+        paginator = KeysetPagination()
+    else:
+        paginator = AnnouncementPageNumberPagination()
+    result_page = await paginator.apaginate_queryset(announcements, request)
+    return paginator.get_paginated_response(serialize_rows(result_page, serializer_class)).data
+
+
+@async_api_view()
+async def get_announcement(request, pk):
+    public = wants_public_authors(request)
+    try:
+        announcement = await Announcement.objects.with_author(public).aget(pk=pk)
+    except Announcement.DoesNotExist:
+        raise AnnouncementNotFoundException()
+    return announcement_serializer_class(public)(announcement).data
+
+
+@async_api_view()
+async def search_announcements(request):
+    stream = request.query_params.get('stream', None)
+    if stream and stream != 'ndjson':
+        raise ValidationErrorException(detail="Unsupported stream format")
+
+    public = wants_public_authors(request)
+    serializer_class = announcement_serializer_class(public)
+    try:
+        if request.query_params.get('q'):
+            # Full-text search may look up text search configurations once per process.
+            announcements = await sync_to_async(filter_announcements)(request.query_params)
+        else:
+            announcements = filter_announcements(request.query_params)
+    except Exception as e:
+        raise ValidationErrorException(detail=f"Error searching announcements: {str(e)}")
+
+    if stream:
+        return ndjson_response(announcements.with_author(public), serializer_class, asynchronous=True)
+
+    if KeysetPagination.is_requested(request):
+        paginator = KeysetPagination(max_page_size=settings.SEARCH_MAX_RESULTS)
+        result_page = await paginator.apaginate_queryset(values_for(announcements, serializer_class), request)
+        return paginator.get_paginated_response(serialize_rows(result_page, serializer_class)).data
+
+    limit = settings.SEARCH_MAX_RESULTS
+    rows = [row async for row in values_for(order_by_rank(announcements), serializer_class)[:limit + 1]]
+    response = render(serialize_rows(rows[:limit], serializer_class))
+    if len(rows) > limit:
+        response['X-Results-Truncated'] = 'true'
+    return response
+
+
+@async_api_view(authenticated=True)
+async def get_current_user(request):
+    return SystemUserSerializer(request.user).data
@@ -0,0 +1,67 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import get_generation, make_key, token_version
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the user from the cache.
+
+    Entries are keyed by user id and the user's token version (a generation
+    counter bumped by ``invalidate_user`` and by every ``SystemUser`` save or
+    delete), so edits, deactivation, deletion and password changes take
+    effect on the next request; ``AUTH_USER_CACHE_TIMEOUT`` only bounds how
+    long an untouched entry lives. Missing and inactive users are never
+    cached - they go to the database and fail there as before.
+
+    Version bumps are only seen by processes sharing the cache, so the lookup
+    is skipped (``AUTH_USER_CACHE_TIMEOUT = 0``, the default on LocMemCache)
+    unless the cache backend is shared.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        if not settings.AUTH_USER_CACHE_TIMEOUT:
+            return super().get_user(validated_token)
+
+        key = make_key('token-user', user_id, get_generation(token_version(user_id)))
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
+
+
+class AsyncJWTAuthentication(CachedJWTAuthentication):
+    """
+    JWT authentication for the async (ASGI) views. Token parsing and signature
+    checks are pure CPU and reused from simplejwt; the (usually cached) user
+    lookup runs in a worker thread.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await sync_to_async(self.get_user)(validated_token), validated_token
+
+
+async def aauthenticate_request(request):
+    """
+    Return the authenticated user for ``request`` or ``AnonymousUser``.
+    """
+    result = await AsyncJWTAuthentication().aauthenticate(request)
+    return result[0] if result is not None else AnonymousUser()
@@ -0,0 +1,154 @@
+"""
+Batch announcement operations for ``api.views.announcement_batch``.
+
+A batch is all-or-nothing: every operation is validated and permission
+checked first (one query loads all referenced announcements), and only when
+all of them pass are they applied in one transaction - one ``bulk_create``,
+one ``bulk_update`` and one ``DELETE ... WHERE id IN``.
+"""
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+
+from .cache import invalidate_announcements
+from .exceptions import AnnouncementNotFoundException, UnauthorizedAccessException
+from .models import Announcement
+from .serializers import AnnouncementSerializer
+
+OPERATIONS = ('create', 'update', 'delete')
+
+
+class BatchItem:
+    def __init__(self, index, op, pk=None, data=None):
+        self.index = index
+        self.op = op
+        self.pk = pk
+        self.data = data or {}
+        self.serializer = None
+        self.instance = None
+        self.error = None
+        self.status = None
+
+    def fail(self, status_code, error):
+        self.status = status_code
+        self.error = error
+
+    def result(self):
+        result = {'index': self.index, 'op': self.op}
+        if self.pk is not None:
+            result['id'] = self.pk
+        if self.error is not None:
+            result.update(status=self.status, error=self.error)
+        elif self.op == 'delete':
+            result['status'] = status.HTTP_204_NO_CONTENT
+        else:
+            result.update(status=self.status, data=AnnouncementSerializer(self.instance).data)
+        return result
+
+
+def parse_operations(operations):
+    items = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            item = BatchItem(index, None)
+            item.fail(status.HTTP_400_BAD_REQUEST, "Operation must be an object")
+            items.append(item)
+            continue
+        op, pk, data = operation.get('op'), operation.get('id'), operation.get('data')
+        item = BatchItem(index, op, pk, data if isinstance(data, dict) else None)
+        if op not in OPERATIONS:
+            item.fail(status.HTTP_400_BAD_REQUEST, f"Unknown operation, expected one of: {', '.join(OPERATIONS)}")
+        elif op == 'create' and pk is not None:
+            item.fail(status.HTTP_400_BAD_REQUEST, "'create' does not take an id")
+        elif op != 'create' and (isinstance(pk, bool) or not isinstance(pk, int)):
+            item.fail(status.HTTP_400_BAD_REQUEST, "'id' must be an integer")
+        elif op != 'delete' and not isinstance(data, dict):
+            item.fail(status.HTTP_400_BAD_REQUEST, "'data' must be an object")
+        items.append(item)
+    return items
+
+
+def validate(items, user):
+    """
+    Validate ``items`` for ``user``; return True when all of them may be applied.
+    """
+    targets = {item.pk for item in items if item.error is None and item.op != 'create'}
+    announcements = Announcement.objects.with_author().select_for_update(of=('self',)).in_bulk(targets)
+    seen = set()
+
+    for item in items:
+        if item.error is not None:
+            continue
+        if item.op != 'create':
+            item.instance = announcements.get(item.pk)
+            if item.pk in seen:
+                item.fail(status.HTTP_400_BAD_REQUEST, "Announcement appears more than once in the batch")
+                continue
+            seen.add(item.pk)
+            if item.instance is None:
+                item.fail(AnnouncementNotFoundException.status_code, AnnouncementNotFoundException.default_detail)
+                continue
+            if user.pk != item.instance.author_id and not user.is_staff:
+                item.fail(UnauthorizedAccessException.status_code, UnauthorizedAccessException.default_detail)
+                continue
+        if item.op == 'create':
+            item.serializer = AnnouncementSerializer(data=item.data)
+        elif item.op == 'update':
+            item.serializer = AnnouncementSerializer(item.instance, data=item.data, partial=True)
+        if item.serializer is not None and not item.serializer.is_valid():
+            item.fail(status.HTTP_400_BAD_REQUEST, item.serializer.errors)
+
+    return all(item.error is None for item in items)
+
+
+def apply(items, user):
+    created = []
+    updated = []
+    update_fields = set()
+    deleted = []
+    now = timezone.now()
+
+    for item in items:
+        if item.op == 'create':
+            item.instance = Announcement(**item.serializer.validated_data, author=user)
+            # bulk_create pomija save() - kopie imienia i nazwiska autora ustawiamy sami.
+            item.instance.copy_author_names()
+            item.status = status.HTTP_201_CREATED
+            created.append(item.instance)
+        elif item.op == 'update':
+            for field, value in item.serializer.validated_data.items():
+                setattr(item.instance, field, value)
+                update_fields.add(field)
+            # bulk_update pomija auto_now - ustawiamy updated_at sami.
+            item.instance.updated_at = now
+            item.status = status.HTTP_200_OK
+            updated.append(item.instance)
+        else:
+            deleted.append(item.pk)
+
+    if created:
+        Announcement.objects.bulk_create(created)
+    if updated:
+        Announcement.objects.bulk_update(updated, sorted(update_fields) + ['updated_at'])
+    if deleted:
+        Announcement.objects.filter(pk__in=deleted).delete()
+    for item in items:
+        if item.op == 'create':
+            item.pk = item.instance.pk
+
+
+def run_batch(operations, user):
+    """
+    Validate and apply ``operations``. Returns ``(applied, results)``; nothing
+    is written unless every operation is valid.
+    """
+    items = parse_operations(operations)
+    with transaction.atomic():
+        if not validate(items, user):
+            for item in items:
+                if item.error is None:
+                    item.fail(status.HTTP_424_FAILED_DEPENDENCY, "Not applied: another operation in the batch failed")
+            return False, [item.result() for item in items]
+        apply(items, user)
+    invalidate_announcements(*(item.pk for item in items if item.op != 'create'))
+    return True, [item.result() for item in items]
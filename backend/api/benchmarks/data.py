@@ -0,0 +1,109 @@
+"""
+Synthetic data for benchmarks: tutors and announcements written in Polish
+and English, inserted with bulk_create in batches.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Announcement, SystemUser
+
+SUBJECTS = [
+    "Matematyka", "Fizyka", "Chemia", "Informatyka", "Biologia", "Język angielski",
+    "Math Tutoring", "Physics Tutoring", "Programming in Python", "English Conversation",
+]
+
+PHRASES = [
+    "Korepetycje z matematyki dla uczniów szkół średnich i studentów.",
+    "Przygotowanie do matury rozszerzonej, zadania maturalne i egzaminy.",
+    "Lekcje programowania w Pythonie i algorytmy dla początkujących.",
+    "Konwersacje po angielsku, gramatyka i przygotowanie do egzaminów.",
+    "Experienced tutor offering lessons in calculus, algebra and geometry.",
+    "Exam preparation with weekly homework and progress reports.",
+    "Online lessons for high school and university students.",
+    "Laboratory chemistry explained step by step with many examples.",
+]
+
+
+def seed_users(count, batch_size=1000, prefix="bench", rng=None, password=None):
+    """
+    Create ``count`` users sharing one precomputed password hash ("password").
+    """
+    rng = rng or random
+    password = password or make_password("password")
+    start = SystemUser.objects.count()
+    created = []
+    for offset in range(0, count, batch_size):
+        batch = [
+            SystemUser(
+                username=f"{prefix}{start + i}",
+                email=f"{prefix}{start + i}@example.com",
+                first_name=rng.choice(["Anna", "Jan", "Maria", "Piotr", "Kate", "John"]),
+                last_name=rng.choice(["Nowak", "Kowalski", "Wiśniewska", "Smith", "Brown"]),
+                password=password,
+            )
+            for i in range(offset, min(offset + batch_size, count))
+        ]
+        created.extend(SystemUser.objects.bulk_create(batch))
+    return created
+
+
+def seed_announcements(count, authors=None, batch_size=5000, seed=0, author_ids=None):
+    """
+    Create ``count`` announcements spread over the last two years.
+
+    Authors (instances, or primary keys as ``author_ids``) default to a fresh
+    set of one user per 50 announcements.
+    """
+    rng = random.Random(seed)
+    if author_ids is None:
+        if authors is None:
+            authors = seed_users(max(1, count // 50))
+        author_ids = [author.pk for author in authors]
+    now = timezone.now()
+
+    for offset in range(0, count, batch_size):
+        batch = [
+            Announcement(
+                subject=rng.choice(SUBJECTS),
+                content=" ".join(rng.sample(PHRASES, 3)),
+                hourly_rate=Decimal(rng.randrange(3000, 25000)) / 100,
+                author_id=rng.choice(author_ids),
+            )
+            for _ in range(offset, min(offset + batch_size, count))
+        ]
+        with transaction.atomic():
+            created = Announcement.objects.bulk_create(batch)
+            # auto_now_add nadpisuje date_added przy insercie - rozkładamy daty osobno.
+            for announcement in created:
+                announcement.date_added = now - timedelta(seconds=rng.randrange(0, 2 * 365 * 86400))
+            if created and created[0].pk is not None:
+                Announcement.objects.bulk_update(created, ['date_added'], batch_size=batch_size)
+                # Same author_id - imiona i nazwiska kopiuje jeden UPDATE na partię.
+                Announcement.objects.filter(pk__in=[announcement.pk for announcement in created]).sync_author_names()
+    return count
+
+
+def seed_dataset(announcements, users, batch_size=5000, seed=0, progress=None):
+    """
+    Create ``users`` users and ``announcements`` announcements spread over
+    them, deterministically for a given ``seed``. Only user primary keys are
+    kept in memory, so 1M-row datasets fit comfortably.
+    """
+    rng = random.Random(seed)
+    password = make_password("password")
+    author_ids = []
+    for offset in range(0, users, batch_size):
+        size = min(batch_size, users - offset)
+        author_ids.extend(user.pk for user in seed_users(size, batch_size, rng=rng, password=password))
+        if progress:
+            progress('users', offset + size, users)
+    for offset in range(0, announcements, batch_size):
+        size = min(batch_size, announcements - offset)
+        seed_announcements(size, batch_size=batch_size, seed=rng.random(), author_ids=author_ids)
+        if progress:
+            progress('announcements', offset + size, announcements)
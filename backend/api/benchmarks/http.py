@@ -0,0 +1,75 @@
+"""
+Minimal closed-loop HTTP load driver: ``concurrency`` threads issue requests
+back to back against an already running server and record latencies.
+"""
+import threading
+from collections import Counter
+import time
+import urllib.error
+import urllib.request
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_load(urls, concurrency=10, total=1000, headers=None, body=None, stop=None):
+    """
+    Request ``urls`` round-robin ``total`` times from ``concurrency`` threads
+    (GET, or POST of ``body(index)`` bytes when given). Setting the ``stop``
+    event ends the run early. Returns a dict with throughput, latency
+    percentiles (ms), error count and responses per HTTP status.
+    """
+    headers = headers or {}
+    latencies = []
+    errors = []
+    statuses = Counter()
+    counter = iter(range(total))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None or (stop is not None and stop.is_set()):
+                return
+            data = body(index) if body is not None else None
+            request = urllib.request.Request(urls[index % len(urls)], data=data, headers=headers)
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+                    code = response.status
+            except urllib.error.HTTPError as e:
+                code = e.code
+            except (urllib.error.URLError, OSError) as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+                statuses[code] += 1
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'duration': duration,
+        'rps': len(latencies) / duration if duration else 0.0,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'statuses': dict(statuses),
+    }
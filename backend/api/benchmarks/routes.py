@@ -0,0 +1,376 @@
+"""
+Route benchmark: a weighted, reproducible read/write mix over every route in
+``api.urls.urlpatterns``, run in-process (Django test client, SQL queries
+counted per request) or against a live server over HTTP, plus comparison of
+two JSON reports.
+"""
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .. import urls
+from ..models import Announcement, SystemUser, UserDeletionJob
+from ..pagination import AnnouncementPageNumberPagination
+from ..profiling import store_profile
+from ..warmup import request_host
+from .http import percentile
+
+
+class Scenario:
+    """
+    How to exercise one named route: ``path(ctx, state, rng)`` and
+    ``body(ctx, state, rng)`` build the request; ``prepare(ctx, rng)`` runs
+    untimed before it and returns ``state`` (e.g. a row to delete).
+    """
+
+    def __init__(self, name, method, weight, path, auth=None, body=None, prepare=None):
+        self.name = name
+        self.method = method
+        self.weight = weight
+        self.path = path
+        self.auth = auth
+        self.body = body
+        self.prepare = prepare
+
+
+def _announcement(ctx, rng):
+    return {'announcement': Announcement.objects.create(
+        subject="Benchmark", content="Temporary announcement", hourly_rate=50, author=ctx.user,
+    ).pk}
+
+
+def _throwaway_user(ctx, rng):
+    name = f"bench-delete-{uuid.uuid4().hex[:12]}"
+    return {'user': SystemUser.objects.create(username=name, email=f"{name}@example.com").pk}
+
+
+def _deletion_job(ctx, rng):
+    return {'job': UserDeletionJob.objects.create(
+        user_id=0, username="bench-deleted", requested_by=ctx.admin, status=UserDeletionJob.DONE,
+    ).pk}
+
+
+def _stored_profile(ctx, rng):
+    profile_id = uuid.uuid4().hex
+    store_profile({'id': profile_id, 'path': '/api/announcements/', 'sql': [], 'functions': []}, b'')
+    return {'profile': profile_id}
+
+
+def _registration(ctx, state, rng):
+    name = f"bench-register-{uuid.uuid4().hex[:12]}"
+    return {'username': name, 'email': f"{name}@example.com", 'password': "password",
+            'first_name': "Bench", 'last_name': "Mark"}
+
+
+def _announcement_data(rng):
+    return {'subject': rng.choice(["Matematyka", "Physics Tutoring", "Chemia"]),
+            'content': "Benchmark announcement", 'hourly_rate': f"{rng.randrange(30, 250)}.00"}
+
+
+# Wagi odpowiadają z grubsza ruchowi produkcyjnemu: głównie odczyty list i wyszukiwania.
+SCENARIOS = [
+    Scenario('announcement_list', 'GET', 25, lambda ctx, state, rng: rng.choice([
+        '/api/announcements/', f'/api/announcements/?page={rng.randint(1, ctx.pages)}', '/api/announcements/?cursor=',
+    ])),
+    Scenario('get_announcement', 'GET', 20, lambda ctx, state, rng: f'/api/announcements/{rng.choice(ctx.announcement_ids)}/'),
+    Scenario('search_announcements', 'GET', 15, lambda ctx, state, rng: rng.choice([
+        '/api/announcements/search/?q=matematyka', '/api/announcements/search/?subject=Fizyka',
+        f'/api/announcements/search/?min_rate={rng.randrange(30, 100)}&max_rate={rng.randrange(100, 250)}',
+    ])),
+    Scenario('announcement_facets', 'GET', 5, lambda ctx, state, rng: rng.choice([
+        '/api/announcements/facets/', '/api/announcements/facets/?q=matematyka',
+        f'/api/announcements/facets/?min_rate={rng.randrange(30, 100)}',
+    ])),
+    Scenario('get_current_user', 'GET', 8, lambda ctx, state, rng: '/api/user/me/', auth='user'),
+    Scenario('login', 'POST', 3, lambda ctx, state, rng: '/api/login/',
+             body=lambda ctx, state, rng: {'username': rng.choice(ctx.usernames), 'password': "password"}),
+    Scenario('register', 'POST', 1, lambda ctx, state, rng: '/api/register/', body=_registration),
+    Scenario('add_announcement', 'POST', 3, lambda ctx, state, rng: '/api/announcements/add/', auth='user',
+             body=lambda ctx, state, rng: _announcement_data(rng)),
+    Scenario('edit_announcement', 'PUT', 3,
+             lambda ctx, state, rng: f'/api/announcements/edit/{rng.choice(ctx.own_announcement_ids)}/', auth='user',
+             body=lambda ctx, state, rng: _announcement_data(rng)),
+    Scenario('delete_announcement', 'DELETE', 1,
+             lambda ctx, state, rng: f"/api/announcements/delete/{state['announcement']}/", auth='user',
+             prepare=_announcement),
+    Scenario('announcement_batch', 'POST', 1, lambda ctx, state, rng: '/api/announcements/batch/', auth='user',
+             prepare=_announcement, body=lambda ctx, state, rng: {'operations': [
+                 {'op': 'create', 'data': _announcement_data(rng)},
+                 {'op': 'update', 'id': rng.choice(ctx.own_announcement_ids), 'data': {'hourly_rate': "99.00"}},
+                 {'op': 'delete', 'id': state['announcement']},
+             ]}),
+    Scenario('edit_user', 'PUT', 1, lambda ctx, state, rng: '/api/user/edit/', auth='user',
+             body=lambda ctx, state, rng: {'first_name': rng.choice(["Anna", "Jan"]), 'last_name': "Benchmark"}),
+    Scenario('user_list', 'GET', 2, lambda ctx, state, rng: rng.choice([
+        '/api/users/', '/api/users/?cursor=&page_size=50', '/api/users/?username=bench1',
+    ]), auth='admin'),
+    Scenario('export_users', 'GET', 0.2,
+             lambda ctx, state, rng: f'/api/users/export/?username={rng.choice(ctx.usernames)}', auth='admin'),
+    Scenario('delete_user', 'DELETE', 0.5, lambda ctx, state, rng: f"/api/users/delete/{state['user']}/",
+             auth='admin', prepare=_throwaway_user),
+    Scenario('user_deletion_job', 'GET', 0.5, lambda ctx, state, rng: f"/api/users/delete-jobs/{state['job']}/",
+             auth='admin', prepare=_deletion_job),
+    Scenario('db_pool_status', 'GET', 0.2, lambda ctx, state, rng: '/api/db/pool/', auth='admin'),
+    Scenario('metrics', 'GET', 0.2, lambda ctx, state, rng: '/api/metrics', auth='metrics'),
+    Scenario('request_profile', 'GET', 0.1, lambda ctx, state, rng: f"/api/profiles/{state['profile']}/",
+             auth='admin', prepare=_stored_profile),
+]
+
+
+def missing_scenarios(scenarios=SCENARIOS):
+    """
+    Names of routes in ``api.urls.urlpatterns`` no scenario exercises.
+    """
+    covered = {scenario.name for scenario in scenarios}
+    return [pattern.name for pattern in urls.urlpatterns if pattern.name not in covered]
+
+
+class BenchmarkContext:
+    """
+    Fixtures shared by all scenarios: a regular user owning a few
+    announcements, an admin, their tokens and samples of existing rows.
+    """
+
+    def __init__(self, rng, sample_size=1000):
+        self.user = self._get_user('benchmark-user', is_staff=False)
+        self.admin = self._get_user('benchmark-admin', is_staff=True)
+        self.tokens = {
+            'user': str(RefreshToken.for_user(self.user).access_token),
+            'admin': str(RefreshToken.for_user(self.admin).access_token),
+            'metrics': settings.METRICS_TOKEN,
+        }
+        own = list(Announcement.objects.filter(author=self.user).values_list('id', flat=True)[:20])
+        for _ in range(20 - len(own)):
+            own.append(_announcement(self, rng)['announcement'])
+        self.own_announcement_ids = own
+        self.announcement_ids = self._sample(Announcement.objects.all(), rng, sample_size) or own
+        # Klienci przeglądają głównie pierwsze strony listy.
+        self.pages = max(1, min(20, Announcement.objects.count() // AnnouncementPageNumberPagination.page_size))
+        self.usernames = list(
+            SystemUser.objects.filter(pk__in=self._sample(self._seeded_users(), rng, sample_size))
+            .values_list('username', flat=True)
+        ) or [self.user.username]
+
+    @staticmethod
+    def _seeded_users():
+        # Użytkownicy z seed_benchmark_data (hasło "password"), bez tworzonych w trakcie testu.
+        return SystemUser.objects.filter(username__startswith='bench').exclude(username__startswith='bench-')
+
+    @staticmethod
+    def _get_user(username, is_staff):
+        user, created = SystemUser.objects.get_or_create(
+            username=username, defaults={'email': f"{username}@example.com", 'is_staff': is_staff},
+        )
+        if created:
+            user.set_password("password")
+            user.save()
+        return user
+
+    @staticmethod
+    def _sample(queryset, rng, size):
+        # Losowe id z zakresu zamiast ORDER BY random() - tanie także przy 1M wierszy.
+        bounds = queryset.order_by('pk').values_list('pk', flat=True)
+        first, last = bounds.first(), bounds.last()
+        if first is None:
+            return []
+        candidates = {rng.randint(first, last) for _ in range(size * 2)}
+        return sorted(queryset.filter(pk__in=candidates).values_list('pk', flat=True)[:size])
+
+
+class InProcessTransport:
+    """
+    Requests through the Django test client in the current process; counts
+    the SQL queries each request runs (including streamed bodies).
+    """
+    sql = True
+
+    def __init__(self):
+        self.client = Client(raise_request_exception=False)
+
+    def request(self, method, path, body, headers, client_ip):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.generic(
+                method, path, json.dumps(body) if body is not None else '', content_type='application/json',
+                headers={'Host': request_host(), **headers}, REMOTE_ADDR=client_ip,
+            )
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return response.status_code, len(queries)
+
+
+class HTTPTransport:
+    """
+    Requests to a live server. All of them come from this machine's address,
+    so raise LOGIN_THROTTLE_IP on the server for long runs.
+    """
+    sql = False
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, body, headers, client_ip):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json', **headers})
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                response.read()
+                return response.status, None
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, None
+
+
+def build_schedule(scenarios, total, rng, min_per_route=5):
+    """
+    ``total`` scenarios drawn by weight, topped up so every route runs at
+    least ``min_per_route`` times, in a reproducible order.
+    """
+    schedule = rng.choices(scenarios, weights=[scenario.weight for scenario in scenarios], k=total)
+    counts = Counter(scenario.name for scenario in schedule)
+    for scenario in scenarios:
+        schedule.extend([scenario] * max(0, min_per_route - counts[scenario.name]))
+    rng.shuffle(schedule)
+    return schedule
+
+
+def summarize(samples, duration):
+    latencies = sorted(sample[0] for sample in samples)
+    statuses = Counter(sample[1] for sample in samples)
+    queries = [sample[2] for sample in samples if sample[2] is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(count for code, count in statuses.items() if code is None or code >= 500),
+        'statuses': {str(code): count for code, count in sorted(statuses.items(), key=lambda item: str(item[0]))},
+        'rps': len(samples) / duration if duration else 0.0,
+        'mean': sum(latencies) / len(latencies) if latencies else 0.0,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'sql_queries': {'mean': sum(queries) / len(queries), 'max': max(queries)} if queries else None,
+    }
+
+
+def run_benchmark(transport_factory, total=1000, concurrency=4, seed=0, scenarios=SCENARIOS, min_per_route=5):
+    """
+    Run the route mix and return the report dict (see ``summarize``, per
+    route and in total).
+    """
+    rng = random.Random(seed)
+    ctx = BenchmarkContext(rng)
+    schedule = iter(enumerate(build_schedule(scenarios, total, rng, min_per_route)))
+    samples = defaultdict(list)
+    lock = threading.Lock()
+
+    failures = []
+
+    def worker(index):
+        thread_rng = random.Random(seed * 1000 + index)
+        transport = transport_factory()
+        try:
+            while not failures:
+                with lock:
+                    item = next(schedule, None)
+                if item is None:
+                    return
+                number, scenario = item
+                state = scenario.prepare(ctx, thread_rng) if scenario.prepare else None
+                path = scenario.path(ctx, state, thread_rng)
+                body = scenario.body(ctx, state, thread_rng) if scenario.body else None
+                # Różne adresy klientów (w procesie przez REMOTE_ADDR), żeby limity
+                # logowania per IP nie zdominowały wyniku.
+                client_ip = f"10.{number // 65536 % 256}.{number // 256 % 256}.{number % 256}"
+                headers = {}
+                if scenario.auth:
+                    headers['Authorization'] = f"Bearer {ctx.tokens[scenario.auth]}"
+                started = time.perf_counter()
+                try:
+                    status_code, queries = transport.request(scenario.method, path, body, headers, client_ip)
+                except OSError:
+                    status_code, queries = None, None
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    samples[scenario.name].append((elapsed, status_code, queries))
+        except Exception as e:
+            failures.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    started_at = timezone.now()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+    if failures:
+        raise failures[0]
+
+    methods = {scenario.name: scenario.method for scenario in scenarios}
+    return {
+        'meta': {
+            'started_at': started_at.isoformat(),
+            'duration': duration,
+            'requests': sum(len(route) for route in samples.values()),
+            'concurrency': concurrency,
+            'seed': seed,
+            'dataset': {'users': SystemUser.objects.count(), 'announcements': Announcement.objects.count()},
+        },
+        'routes': {
+            name: {'method': methods[name], **summarize(route, duration)}
+            for name, route in sorted(samples.items())
+        },
+        'total': summarize([sample for route in samples.values() for sample in route], duration),
+    }
+
+
+def error_rate(route):
+    return route['errors'] / route['requests'] if route['requests'] else 0.0
+
+
+# Percentyl porównujemy tylko, gdy ponad nim leży co najmniej tyle próbek.
+TAIL_SAMPLES = 5
+PERCENTILES = {'p50': 0.50, 'p95': 0.95, 'p99': 0.99}
+
+
+def compare_reports(base, current, threshold=0.10, min_delta_ms=1.0):
+    """
+    Compare two reports route by route. Returns ``(route, metric, before,
+    after, regression)`` rows; a regression is a latency percentile growing
+    by more than ``threshold`` and ``min_delta_ms``, any extra SQL query per
+    request, a higher 5xx rate, a route missing from ``current`` or total
+    throughput dropping by more than ``threshold``. Percentiles with fewer
+    than ``TAIL_SAMPLES`` samples above them are reported but never flagged.
+    """
+    rows = []
+    for name, before in sorted(base['routes'].items()):
+        after = current['routes'].get(name)
+        if after is None:
+            rows.append((name, 'missing', before['requests'], None, True))
+            continue
+        for metric, fraction in PERCENTILES.items():
+            delta = after[metric] - before[metric]
+            enough = min(before['requests'], after['requests']) * (1 - fraction) >= TAIL_SAMPLES
+            regression = enough and delta > min_delta_ms and delta > before[metric] * threshold
+            rows.append((name, metric, before[metric], after[metric], regression))
+        if before.get('sql_queries') and after.get('sql_queries'):
+            rows.append((name, 'sql_queries', before['sql_queries']['mean'], after['sql_queries']['mean'],
+                         after['sql_queries']['mean'] >= before['sql_queries']['mean'] + 0.5))
+        rows.append((name, 'error_rate', error_rate(before), error_rate(after),
+                     error_rate(after) > error_rate(before)))
+    before, after = base['total'], current['total']
+    rows.append(('total', 'rps', before['rps'], after['rps'], after['rps'] < before['rps'] * (1 - threshold)))
+    return rows
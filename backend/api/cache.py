@@ -0,0 +1,149 @@
+"""
+Read-through cache for serialized API payloads.
+
+Entries are never deleted on writes. Every key embeds one or more generation
+counters instead, and views that change data bump the matching counter, so
+stale entries simply stop being addressed and expire on their own:
+
+- ``announcements``  - every list page (any write to any announcement or author)
+- ``announcement:<pk>`` - the detail payload of one announcement
+- ``user:<pk>`` - everything rendered from one user (nested author data)
+- ``token:<pk>`` - the user resolved from a JWT (``CachedJWTAuthentication``)
+
+Misses are recomputed by one caller at a time (lock in the cache itself, so it
+works across processes with a shared backend); concurrent callers wait briefly
+for the fresh value instead of all hitting the database.
+
+Generations only invalidate entries in the cache they were bumped in, so
+several worker processes (and the Celery workers, which invalidate too) need a
+shared backend - see ``is_shared_cache``.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+PREFIX = 'api:'
+ANNOUNCEMENTS = 'announcements'
+
+# Backend, którego zawartość widzi tylko proces, który ją zapisał.
+PROCESS_LOCAL_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+def announcement_generation(pk):
+    return f'announcement:{pk}'
+
+
+def user_generation(pk):
+    return f'user:{pk}'
+
+
+def token_version(pk):
+    return f'token:{pk}'
+
+
+def is_shared_cache():
+    """
+    Whether the default cache is visible to every process (redis, memcached,
+    database, files) rather than private to one worker (LocMemCache).
+    """
+    return settings.CACHES['default']['BACKEND'] != PROCESS_LOCAL_BACKEND
+
+
+def _generation_key(name):
+    return f'{PREFIX}gen:{name}'
+
+
+def _initial_generation():
+    # Licznik startuje od znacznika czasu: po wyrzuceniu klucza z cache nowa
+    # wartość nie pokryje się z żadną wcześniej użytą.
+    return time.time_ns() // 1000
+
+
+def get_generation(name):
+    key = _generation_key(name)
+    value = cache.get(key)
+    if value is None:
+        value = _initial_generation()
+        if not cache.add(key, value, None):
+            value = cache.get(key, value)
+    return value
+
+
+def bump_generation(*names):
+    for name in names:
+        key = _generation_key(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_generation(), None)
+
+
+def invalidate_announcement(pk):
+    bump_generation(ANNOUNCEMENTS, announcement_generation(pk))
+
+
+def invalidate_announcements(*pks):
+    bump_generation(ANNOUNCEMENTS, *(announcement_generation(pk) for pk in pks))
+
+
+def invalidate_user(pk):
+    bump_generation(ANNOUNCEMENTS, user_generation(pk), token_version(pk))
+
+
+def invalidate_token_user(pk):
+    bump_generation(token_version(pk))
+
+
+def make_key(*parts):
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'{PREFIX}{digest}'
+
+
+def get_or_compute(key, compute, timeout=None):
+    """
+    Return the cached value for ``key`` or compute and store it, letting only
+    one caller recompute a missing entry at a time.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, settings.API_CACHE_LOCK_TIMEOUT):
+        try:
+            value = compute()
+            cache.set(key, value, settings.API_CACHE_TIMEOUT if timeout is None else timeout)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    deadline = time.monotonic() + settings.API_CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.01)
+        value = cache.get(key)
+        if value is not None:
+            return value
+    # Właściciel blokady nie zdążył - liczymy sami zamiast czekać dalej.
+    return compute()
+
+
+def cached_list_payload(request, compute):
+    key = make_key('list', get_generation(ANNOUNCEMENTS), request.build_absolute_uri())
+    return get_or_compute(key, compute)
+
+
+def cached_announcement_payload(pk, variant, get_author_id, compute):
+    """
+    Cache the detail payload of announcement ``pk``. The key covers both the
+    announcement and its author, so editing either makes the entry unreachable.
+    The author of an announcement never changes, so its id is cached by pk.
+    """
+    author_id = get_or_compute(make_key('author-of', pk), get_author_id)
+    generations = (
+        get_generation(announcement_generation(pk)),
+        get_generation(user_generation(author_id)),
+    )
+    key = make_key('announcement', pk, variant, *generations)
+    return get_or_compute(key, compute)
@@ -0,0 +1,347 @@
+"""
+Negotiated response compression (zstd, brotli, gzip).
+
+``CompressionMiddleware`` picks the encoding from ``Accept-Encoding`` (the
+client's q-values first, then the order of ``COMPRESSION_ENCODINGS``) and
+compresses responses whose content type is in ``COMPRESSION_CONTENT_TYPES``
+and whose body is at least ``COMPRESSION_MIN_SIZE`` bytes. zstd and brotli
+need the ``zstandard`` / ``brotli`` packages and are skipped without them;
+gzip is always available.
+
+Streaming responses (NDJSON / CSV exports) are compressed on the fly and
+flushed every ``COMPRESSION_STREAM_FLUSH`` bytes of input, so the client
+keeps receiving rows without the stream being flushed after every line.
+
+Requests carrying credentials (an ``Authorization`` header or the session
+cookie) are never compressed: their responses can mix secrets (contact
+details, tokens) with reflected input such as the search query, which is
+what BREACH-style attacks recover through the compressed length.
+
+Responses with a strong ETag (list, search, detail, facets - see
+api.conditional) are the same bytes until the ETag changes, so their
+compressed bodies are kept in the cache under (encoding, ETag) and served
+without compressing again. The ETag is made weak, as Django's GZipMiddleware
+does, on every response that could be compressed for the client's
+Accept-Encoding - including small bodies and 304s, which cannot tell whether
+the full response would have been - so revalidations see the same ETag.
+"""
+import time
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+from .cache import make_key
+from .metrics import COMPRESSION_BYTES, COMPRESSION_SECONDS
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli jest opcjonalny
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard jest opcjonalny
+    zstandard = None
+
+
+class GzipCodec:
+    name = 'gzip'
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        compressor = self.compressor()
+        return compressor.compress(data) + compressor.finish()
+
+    def compressor(self):
+        return _ZlibCompressor(zlib.compressobj(self.level, zlib.DEFLATED, 31))
+
+
+class _ZlibCompressor:
+    def __init__(self, compressobj):
+        self._compressobj = compressobj
+
+    def compress(self, data):
+        return self._compressobj.compress(data)
+
+    def flush(self):
+        return self._compressobj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressobj.flush(zlib.Z_FINISH)
+
+
+class BrotliCodec:
+    name = 'br'
+
+    def __init__(self, level):
+        self.level = level
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.level)
+
+    def compressor(self):
+        return _BrotliCompressor(brotli.Compressor(quality=self.level))
+
+
+class _BrotliCompressor:
+    def __init__(self, compressor):
+        self._compressor = compressor
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ZstdCodec:
+    name = 'zstd'
+
+    def __init__(self, level):
+        self.level = level
+
+    # ZstdCompressor nie jest bezpieczny wątkowo - nowy na każdą odpowiedź.
+    def compress(self, data):
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def compressor(self):
+        return _ZstdCompressor(zstandard.ZstdCompressor(level=self.level).compressobj())
+
+
+class _ZstdCompressor:
+    def __init__(self, compressobj):
+        self._compressobj = compressobj
+
+    def compress(self, data):
+        return self._compressobj.compress(data)
+
+    def flush(self):
+        return self._compressobj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressobj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+CODECS = {
+    'gzip': (GzipCodec, True),
+    'br': (BrotliCodec, brotli is not None),
+    'zstd': (ZstdCodec, zstandard is not None),
+}
+
+
+def available_codecs():
+    """
+    ``{encoding: codec}`` for the configured encodings whose library is
+    installed, in server preference order.
+    """
+    codecs = {}
+    for name in settings.COMPRESSION_ENCODINGS:
+        codec_class, available = CODECS[name]
+        if available:
+            codecs[name] = codec_class(settings.COMPRESSION_LEVELS[name])
+    return codecs
+
+
+def parse_accept_encoding(header):
+    """
+    ``{coding: q}`` from an Accept-Encoding header; malformed q-values count as 0.
+    """
+    accepted = {}
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate(header, codecs):
+    """
+    The name of the codec to use for ``header``, or None for identity.
+    """
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_q = None, 0.0
+    for name in codecs:
+        q = accepted.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compressible_type(content_type):
+    return content_type.split(';')[0].strip().lower() in settings.COMPRESSION_CONTENT_TYPES
+
+
+def cache_key(encoding, etag, content_type, size):
+    # Ten sam ETag może mieć kilka reprezentacji (np. JSON i przeglądarkowe API).
+    return make_key('compressed', encoding, settings.COMPRESSION_LEVELS[encoding], etag, content_type, size)
+
+
+def carries_credentials(request):
+    return 'HTTP_AUTHORIZATION' in request.META or settings.SESSION_COOKIE_NAME in request.COOKIES
+
+
+def weaken_etag(response):
+    etag = response.get('ETag')
+    if etag and not etag.startswith('W/'):
+        response['ETag'] = f'W/{etag}'
+
+
+def record(encoding, raw_size, compressed_size, seconds):
+    COMPRESSION_BYTES.labels(encoding, 'raw').inc(raw_size)
+    COMPRESSION_BYTES.labels(encoding, 'compressed').inc(compressed_size)
+    COMPRESSION_SECONDS.labels(encoding).inc(seconds)
+
+
+def compress_body(codec, content, etag, content_type):
+    """
+    Compressed ``content``, from the cache when the strong ``etag`` was seen
+    before.
+    """
+    cacheable = etag and not etag.startswith('W/')
+    if cacheable:
+        key = cache_key(codec.name, etag, content_type, len(content))
+        compressed = cache.get(key)
+        if compressed is not None:
+            return compressed
+    started = time.perf_counter()
+    compressed = codec.compress(content)
+    record(codec.name, len(content), len(compressed), time.perf_counter() - started)
+    if cacheable and len(compressed) <= settings.COMPRESSION_CACHE_MAX_SIZE:
+        cache.set(key, compressed, settings.API_CACHE_TIMEOUT)
+    return compressed
+
+
+class _StreamCompressor:
+    """
+    Compress a stream of chunks, flushing every ``flush_size`` bytes of input.
+    """
+
+    def __init__(self, codec, flush_size):
+        self.name = codec.name
+        self.compressor = codec.compressor()
+        self.flush_size = flush_size
+        self.pending = 0
+        self.raw_size = 0
+        self.compressed_size = 0
+        self.seconds = 0.0
+
+    def feed(self, chunk):
+        started = time.perf_counter()
+        data = self.compressor.compress(chunk)
+        self.pending += len(chunk)
+        if self.pending >= self.flush_size:
+            data += self.compressor.flush()
+            self.pending = 0
+        self.seconds += time.perf_counter() - started
+        self.raw_size += len(chunk)
+        self.compressed_size += len(data)
+        return data
+
+    def finish(self):
+        started = time.perf_counter()
+        data = self.compressor.finish()
+        self.seconds += time.perf_counter() - started
+        self.compressed_size += len(data)
+        record(self.name, self.raw_size, self.compressed_size, self.seconds)
+        return data
+
+
+def compress_stream(codec, chunks):
+    stream = _StreamCompressor(codec, settings.COMPRESSION_STREAM_FLUSH)
+    for chunk in chunks:
+        data = stream.feed(chunk)
+        if data:
+            yield data
+    yield stream.finish()
+
+
+async def acompress_stream(codec, chunks):
+    stream = _StreamCompressor(codec, settings.COMPRESSION_STREAM_FLUSH)
+    async for chunk in chunks:
+        data = stream.feed(chunk)
+        if data:
+            yield data
+    yield stream.finish()
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with the best encoding the client accepts; works in
+    sync and async stacks.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.codecs = available_codecs() if settings.COMPRESSION_ENABLED else {}
+        if not self.codecs:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or carries_credentials(request):
+            return response
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.codecs)
+        if response.status_code == 304:
+            # 304 nie ma ciała ani Content-Type - ETag jak w odpowiedzi 200 dla tego Accept-Encoding.
+            patch_vary_headers(response, ('Accept-Encoding',))
+            if encoding is not None:
+                weaken_etag(response)
+            return response
+        if not compressible_type(response.get('Content-Type', '')):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if encoding is None:
+            return response
+        etag = response.get('ETag')
+        weaken_etag(response)
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        codec = self.codecs[encoding]
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(codec, response.streaming_content)
+            else:
+                response.streaming_content = compress_stream(codec, response.streaming_content)
+            del response['Content-Length']
+        else:
+            compressed = compress_body(codec, response.content, etag, response.get('Content-Type'))
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,88 @@
+"""
+Conditional GET support (ETag / Last-Modified / 304) for API views.
+
+Validators are computed from cheap metadata - ``updated_at`` or a cache
+generation - before the view runs, so a matching ``If-None-Match`` /
+``If-Modified-Since`` is answered with 304 without touching the serializer.
+
+Collections (list, search, facets) only get an ETag built from the URL and
+the announcement list generation, which every write - deletions included -
+bumps. They have no Last-Modified: ``MAX(updated_at)`` does not move when a
+row is deleted, and computing it cost a full aggregate per page URL.
+"""
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.views.decorators.http import condition
+
+from . import cache as api_cache
+from .models import Announcement
+from .search import filter_announcements
+
+
+def conditional(validators):
+    """
+    Wrap Django's ``condition`` decorator around a view, computing the ETag
+    and the last-modified time with one ``validators(request, *args, **kwargs)``
+    call that returns ``(etag, last_modified)`` or ``None``.
+    """
+    def get_validators(request, *args, **kwargs):
+        if not hasattr(request, '_api_validators'):
+            request._api_validators = validators(request, *args, **kwargs) or (None, None)
+        return request._api_validators
+
+    def etag_func(request, *args, **kwargs):
+        return get_validators(request, *args, **kwargs)[0]
+
+    def last_modified_func(request, *args, **kwargs):
+        return get_validators(request, *args, **kwargs)[1]
+
+    return condition(etag_func=etag_func, last_modified_func=last_modified_func)
+
+
+def make_etag(*parts):
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'"{digest}"'
+
+
+def _collection_validators(request):
+    # Ta sama generacja co w cache payloadów listy - ETag bez zapytania do bazy.
+    generation = api_cache.get_generation(api_cache.ANNOUNCEMENTS)
+    return make_etag(request.get_full_path(), generation), None
+
+
+def announcement_list_validators(request):
+    return _collection_validators(request)
+
+
+def search_validators(request):
+    if request.GET.get('stream'):
+        return None
+    try:
+        filter_announcements(request.GET)
+    except ValidationError:
+        # Niepoprawne filtry (np. min_rate=abc) - błąd zgłosi sam widok.
+        return None
+    return _collection_validators(request)
+
+
+def facets_validators(request):
+    return _collection_validators(request)
+
+
+def announcement_validators(request, pk):
+    generation = api_cache.get_generation(api_cache.announcement_generation(pk))
+    row = api_cache.get_or_compute(
+        api_cache.make_key('meta', pk, generation),
+        lambda: Announcement.objects.filter(pk=pk).values_list('updated_at', 'author_id').first() or False,
+    )
+    if not row:
+        return None
+    updated_at, author_id = row
+    etag = make_etag(
+        request.get_full_path(),
+        updated_at,
+        generation,
+        api_cache.get_generation(api_cache.user_generation(author_id)),
+    )
+    return etag, updated_at
@@ -0,0 +1,193 @@
+"""
+Small thread-safe connection pool used by the ``api.db.postgresql_pool``
+database backend.
+
+Django 4.2 has no connection pool of its own: a thread either opens a new
+connection per request (``CONN_MAX_AGE = 0``) or keeps one per thread
+(``CONN_MAX_AGE > 0``). With the pool the connection is handed back when
+Django closes it at the end of the request, so threaded and ASGI workers
+share ``MAX_SIZE`` warm connections instead of holding one per thread or
+reconnecting every time.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class PooledConnection:
+    __slots__ = ('connection', 'created_at', 'returned_at')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = self.returned_at = time.monotonic()
+
+
+class ConnectionPool:
+    """
+    Up to ``max_size`` connections made by ``connect()``.
+
+    ``getconn`` waits at most ``timeout`` seconds for a free connection and
+    then raises ``PoolTimeout``. Idle connections older than ``max_idle``
+    seconds (or opened more than ``max_lifetime`` seconds ago) are closed
+    instead of reused; ``min_size`` of them are kept regardless of idleness.
+    """
+
+    def __init__(self, connect, min_size=0, max_size=10, timeout=5.0, max_idle=300.0, max_lifetime=3600.0):
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self._idle = deque()
+        self._in_use = {}
+        self._size = 0
+        self._waiting = 0
+        self._condition = threading.Condition()
+        self.stats = {
+            'connections_opened': 0,
+            'connections_closed': 0,
+            'checkouts': 0,
+            'timeouts': 0,
+            'wait_seconds_total': 0.0,
+        }
+
+    def getconn(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        with self._condition:
+            self._waiting += 1
+            try:
+                while True:
+                    pooled = self._take_idle()
+                    if pooled is not None:
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        pooled = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats['timeouts'] += 1
+                        raise PoolTimeout(
+                            f"No database connection available within {self.timeout}s "
+                            f"(pool size {self.max_size})"
+                        )
+                    self._condition.wait(remaining)
+            finally:
+                self._waiting -= 1
+                self.stats['wait_seconds_total'] += time.monotonic() - started
+
+        if pooled is None:
+            # Nowe połączenie otwieramy poza blokadą - to najdłuższa operacja.
+            try:
+                pooled = PooledConnection(self.connect())
+            except BaseException:
+                with self._condition:
+                    self._size -= 1
+                    self._condition.notify()
+                raise
+            with self._condition:
+                self.stats['connections_opened'] += 1
+
+        with self._condition:
+            self._in_use[id(pooled.connection)] = pooled
+            self.stats['checkouts'] += 1
+        return pooled.connection
+
+    def putconn(self, connection, discard=False):
+        with self._condition:
+            pooled = self._in_use.pop(id(connection), None)
+            if pooled is None:
+                discard = True
+            elif not discard and time.monotonic() - pooled.created_at > self.max_lifetime:
+                discard = True
+            if not discard:
+                pooled.returned_at = time.monotonic()
+                self._idle.append(pooled)
+            elif pooled is not None:
+                self._size -= 1
+            self._condition.notify()
+        if discard:
+            self._close(connection)
+
+    def _take_idle(self):
+        now = time.monotonic()
+        while self._idle:
+            # LIFO: najświeższe połączenie, stare wygasają same.
+            pooled = self._idle.pop()
+            expired = (
+                now - pooled.created_at > self.max_lifetime
+                or (now - pooled.returned_at > self.max_idle and self._size > self.min_size)
+            )
+            if not expired:
+                return pooled
+            self._size -= 1
+            self._close(pooled.connection)
+        return None
+
+    def _close(self, connection):
+        self.stats['connections_closed'] += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+        for pooled in idle:
+            self._close(pooled.connection)
+
+    def metrics(self):
+        with self._condition:
+            return {
+                **self.stats,
+                'size': self._size,
+                'max_size': self.max_size,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'waiting': self._waiting,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_inherited = []
+
+
+def _after_fork_in_child():
+    # Gniazda odziedziczone po rodzicu (gunicorn --preload, prefork Celery)
+    # należą do niego: dziecko buduje własne pule, a starych nie zamyka -
+    # close() wysłałby Terminate na połączeniu rodzica.
+    global _pools_lock
+    _pools_lock = threading.Lock()
+    _inherited.extend(_pools.values())
+    _pools.clear()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def get_pool(alias, factory=None):
+    with _pools_lock:
+        if alias not in _pools and factory is not None:
+            _pools[alias] = factory()
+        return _pools.get(alias)
+
+
+def pool_metrics():
+    """
+    ``{alias: metrics}`` for every pool created in this process.
+    """
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.metrics() for alias, pool in pools.items()}
@@ -0,0 +1,50 @@
+"""
+PostgreSQL backend that takes connections from ``api.db.pool.ConnectionPool``.
+
+Configured with ``ENGINE = 'api.db.postgresql_pool'`` and a ``POOL`` dict
+(MIN_SIZE, MAX_SIZE, TIMEOUT, MAX_IDLE, MAX_LIFETIME) in the database
+settings; keep ``CONN_MAX_AGE = 0`` so connections go back to the pool at
+the end of every request or Celery task.
+"""
+from django.db.backends.postgresql import base
+
+from ..pool import ConnectionPool, get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_pool(self, conn_params):
+        options = self.settings_dict.get('POOL', {})
+        connect = super().get_new_connection
+        return get_pool(self.alias, lambda: ConnectionPool(
+            lambda: connect(conn_params),
+            min_size=options.get('MIN_SIZE', 0),
+            max_size=options.get('MAX_SIZE', 10),
+            timeout=options.get('TIMEOUT', 5.0),
+            max_idle=options.get('MAX_IDLE', 300.0),
+            max_lifetime=options.get('MAX_LIFETIME', 3600.0),
+        ))
+
+    def get_new_connection(self, conn_params):
+        connection = self.get_pool(conn_params).getconn()
+        if connection.closed:
+            # Serwer zamknął połączenie w puli - wyrzucamy je i bierzemy kolejne.
+            self.get_pool(conn_params).putconn(connection, discard=True)
+            return self.get_new_connection(conn_params)
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = get_pool(self.alias)
+        connection = self.connection
+        discard = connection.closed or self.errors_occurred
+        if not discard:
+            with self.wrap_database_errors:
+                try:
+                    # Połączenie wraca do puli bez otwartej transakcji.
+                    connection.rollback()
+                    connection.autocommit = True
+                except Exception:
+                    discard = True
+        pool.putconn(connection, discard=discard)
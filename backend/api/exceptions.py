@@ -13,6 +13,16 @@ class AnnouncementNotFoundException(APIException):
     default_detail = "Announcement not found"
     default_code = "announcement_not_found"
 
+class JobNotFoundException(APIException):
+    status_code = 404
+    default_detail = "Job not found"
+    default_code = "job_not_found"
+
+class ProfileNotFoundException(APIException):
+    status_code = 404
+    default_detail = "Profile not found or expired"
+    default_code = "profile_not_found"
+
 class UnauthorizedAccessException(APIException):
     status_code = 403
     default_detail = "You do not have permission to perform this action"
@@ -23,6 +33,11 @@ class ValidationErrorException(APIException):
     default_detail = "Validation error"
     default_code = "validation_error"
 
+class LoginBusyException(APIException):
+    status_code = 503
+    default_detail = "Too many login attempts in progress, try again shortly"
+    default_code = "login_busy"
+
 def custom_exception_handler(exc, context):
     # Wywołaj domyślny handler DRF, aby uzyskać standardową odpowiedź
     response = exception_handler(exc, context)
@@ -35,6 +50,8 @@ def custom_exception_handler(exc, context):
                 "status": response.status_code,
             },
             status=response.status_code,
+            # Retry-After (429), WWW-Authenticate (401) itp. z odpowiedzi DRF.
+            headers=dict(response.items()),
         )
 
     # Jeśli odpowiedź nie istnieje (np. błąd serwera), zwróć ogólny błąd
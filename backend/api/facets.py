@@ -0,0 +1,79 @@
+"""
+Facet counts for the search filters.
+
+``compute_facets`` answers both facets - the top subjects and the
+``hourly_rate`` histogram over ``FACETS_RATE_BANDS`` - with one grouped
+aggregate: ``COUNT(*) GROUP BY subject, band``. The result has one row per
+(subject, band) pair present in the filtered set, and both facets are summed
+up from it in Python. ``cached_facets`` keeps the result under the
+announcement list generation, so every announcement write (which already
+bumps that generation) makes stale facets unreachable.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Case, Count, IntegerField, Value, When
+
+from . import cache as api_cache
+from .search import filter_announcements
+
+# Parametry zapytania, od których zależą fasety - reszta nie rozbija klucza cache.
+FILTER_PARAMS = ('q', 'subject', 'min_rate', 'max_rate')
+
+
+def rate_bands():
+    """
+    ``[(min, max), ...]`` for the configured band edges; the last band has no
+    upper bound.
+    """
+    edges = [Decimal(str(edge)) for edge in settings.FACETS_RATE_BANDS]
+    lower = [Decimal(0)] + edges
+    upper = edges + [None]
+    return list(zip(lower, upper))
+
+
+def band_expression(bands):
+    whens = [When(hourly_rate__lt=upper, then=Value(index)) for index, (_, upper) in enumerate(bands[:-1])]
+    return Case(*whens, default=Value(len(bands) - 1), output_field=IntegerField())
+
+
+def compute_facets(queryset, top):
+    bands = rate_bands()
+    rows = (
+        queryset.order_by()
+        .values('subject', band=band_expression(bands))
+        .annotate(count=Count('id'))
+    )
+
+    subjects = {}
+    band_counts = [0] * len(bands)
+    for row in rows:
+        subjects[row['subject']] = subjects.get(row['subject'], 0) + row['count']
+        band_counts[row['band']] += row['count']
+
+    ranked = sorted(subjects.items(), key=lambda item: (-item[1], item[0]))
+    return {
+        'total': sum(band_counts),
+        'subjects': [{'subject': subject, 'count': count} for subject, count in ranked[:top]],
+        'other_subjects': len(ranked) - min(top, len(ranked)),
+        'hourly_rate': [
+            {
+                'min': f'{lower:.2f}',
+                'max': None if upper is None else f'{upper:.2f}',
+                'count': count,
+            }
+            for (lower, upper), count in zip(bands, band_counts)
+        ],
+    }
+
+
+def facets_key(query_params, top):
+    filters = [(name, query_params.get(name, '')) for name in FILTER_PARAMS]
+    return api_cache.make_key('facets', api_cache.get_generation(api_cache.ANNOUNCEMENTS), top, *filters)
+
+
+def cached_facets(query_params, top):
+    return api_cache.get_or_compute(
+        facets_key(query_params, top),
+        lambda: compute_facets(filter_announcements(query_params), top),
+    )
@@ -0,0 +1,145 @@
+"""
+Serializer-free read path for hot list endpoints.
+
+``RowMapper`` inspects a read-only ``ModelSerializer`` once and compiles a
+function turning ``.values()`` rows into exactly the dicts the serializer
+would produce (same keys, key order, nesting and value formatting), so list
+and search responses skip per-row field introspection and model
+instantiation. Fields it cannot reproduce make it refuse the serializer
+instead of guessing.
+"""
+import decimal
+from functools import lru_cache
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# Pola, których reprezentacja to po prostu wartość z bazy.
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+)
+
+
+def _decimal(field):
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize or field.decimal_places is None:
+        return lambda: field.to_representation
+
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+
+    def factory():
+        def convert(value):
+            if value is None:
+                return None
+            return '{:f}'.format(value.quantize(exponent, rounding=field.rounding, context=context))
+        return convert
+    return factory
+
+
+def _datetime(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return lambda: field.to_representation
+
+    def factory():
+        # Strefa jest ustalana raz na wywołanie, a nie dla każdego wiersza.
+        tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+        def convert(value):
+            if value is None:
+                return None
+            if tz is None or value.tzinfo is None:
+                return field.to_representation(value)
+            value = value.astimezone(tz).isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return convert
+    return factory
+
+
+class RowMapper:
+    """
+    Compiled ``.values()`` row -> serializer output mapping.
+
+    ``lookups`` are the names to pass to ``QuerySet.values()``; calling the
+    mapper with those rows returns a list of dicts.
+    """
+
+    def __init__(self, serializer_class):
+        self.lookups = []
+        self._factories = []
+        expression = self._compile(serializer_class(), prefix='')
+        names = ', '.join(f'c{index}' for index in range(len(self._factories)))
+        source = f'lambda rows, {names}: [{expression} for r in rows]' if names else \
+            f'lambda rows: [{expression} for r in rows]'
+        self._map = eval(compile(source, f'<RowMapper {serializer_class.__name__}>', 'eval'))
+
+    def _compile(self, serializer, prefix):
+        items = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == '*' and isinstance(field, serializers.BaseSerializer) \
+                    and not getattr(field, 'many', False):
+                # Zagnieżdżony serializer na tym samym obiekcie - kolumny z tego samego wiersza.
+                items.append(f'{name!r}: {self._compile(field, prefix=prefix)}')
+                continue
+            if field.source == '*' or '.' in field.source:
+                raise ImproperlyConfigured(f"RowMapper cannot map field '{name}' (source={field.source!r}).")
+            lookup = f'{prefix}{field.source}'
+
+            if isinstance(field, serializers.BaseSerializer):
+                if getattr(field, 'many', False) or self._nullable(serializer, field.source):
+                    raise ImproperlyConfigured(f"RowMapper cannot map nested field '{name}'.")
+                value = self._compile(field, prefix=f'{lookup}__')
+            elif isinstance(field, serializers.DecimalField):
+                value = self._convert(lookup, _decimal(field))
+            elif isinstance(field, serializers.DateTimeField):
+                value = self._convert(lookup, _datetime(field))
+            elif isinstance(field, PASSTHROUGH_FIELDS):
+                self.lookups.append(lookup)
+                value = f'r[{lookup!r}]'
+            else:
+                raise ImproperlyConfigured(
+                    f"RowMapper cannot map field '{name}' ({type(field).__name__})."
+                )
+            items.append(f'{name!r}: {value}')
+        return '{' + ', '.join(items) + '}'
+
+    @staticmethod
+    def _nullable(serializer, source):
+        # Dla pustej relacji serializer zwraca None, a .values() - słownik samych None.
+        return serializer.Meta.model._meta.get_field(source).null
+
+    def _convert(self, lookup, factory):
+        self.lookups.append(lookup)
+        index = len(self._factories)
+        self._factories.append(factory)
+        return f'c{index}(r[{lookup!r}])'
+
+    def __call__(self, rows):
+        return self._map(rows, *(factory() for factory in self._factories))
+
+
+@lru_cache(maxsize=None)
+def get_row_mapper(serializer_class):
+    return RowMapper(serializer_class)
+
+
+def values_for(queryset, serializer_class):
+    """
+    Turn ``queryset`` into a ``.values()`` queryset with the columns needed by
+    ``get_row_mapper(serializer_class)``.
+    """
+    return queryset.values(*get_row_mapper(serializer_class).lookups)
+
+
+def serialize_rows(rows, serializer_class):
+    return get_row_mapper(serializer_class)(rows)
@@ -0,0 +1,94 @@
+"""
+Credential check for ``api.views.login`` with a bounded hashing cost.
+
+Password hashing (PBKDF2 by default) is the only expensive step of a login,
+so it runs on a small per-process thread pool: at most
+``LOGIN_HASH_WORKERS`` hashes run at once, and once ``LOGIN_HASH_QUEUE``
+logins are waiting further attempts are refused with 503 instead of piling
+up and starving other requests. Database access stays in the request thread.
+
+Hashes created with a hasher other than the first of ``PASSWORD_HASHERS``
+(or with outdated parameters) are recomputed with it on the next successful
+login, so switching the hasher needs no bulk migration.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+from .exceptions import LoginBusyException, ValidationErrorException
+from .models import SystemUser
+
+INVALID_CREDENTIALS = "No active account found with the given credentials"
+
+
+class HashingPool:
+    def __init__(self, workers, queue_limit):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+
+    def run(self, func, *args, timeout=None):
+        if not self._slots.acquire(blocking=False):
+            raise LoginBusyException()
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Wynik i tak zwolni slot po zakończeniu - klient dostaje 503 od razu.
+            raise LoginBusyException()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashingPool(settings.LOGIN_HASH_WORKERS, settings.LOGIN_HASH_QUEUE)
+        return _pool
+
+
+def verify(raw_password, encoded):
+    """
+    Return ``(is_correct, new_encoded)``; ``new_encoded`` is set when the
+    stored hash should be replaced with one from the preferred hasher.
+    """
+    rehashed = []
+    is_correct = check_password(raw_password, encoded, setter=lambda raw: rehashed.append(make_password(raw)))
+    return is_correct, (rehashed[0] if rehashed else None)
+
+
+def authenticate_credentials(username, password):
+    """
+    Return the active user matching ``username``/``password`` or raise
+    ``ValidationErrorException``.
+    """
+    # Liczba czy lista z JSON-a wywróciłaby hashowanie (500) tylko dla nieistniejących kont.
+    if not isinstance(username, str) or not isinstance(password, str) or not username or not password:
+        raise ValidationErrorException(detail=INVALID_CREDENTIALS)
+
+    pool = get_pool()
+    timeout = settings.LOGIN_HASH_TIMEOUT
+    try:
+        user = SystemUser._default_manager.get_by_natural_key(username)
+    except SystemUser.DoesNotExist:
+        # Tyle samo pracy co dla istniejącego konta - bez wycieku, czy login istnieje.
+        pool.run(make_password, password, timeout=timeout)
+        raise ValidationErrorException(detail=INVALID_CREDENTIALS)
+
+    is_correct, new_encoded = pool.run(verify, password, user.password, timeout=timeout)
+    if not is_correct or not user.is_active:
+        raise ValidationErrorException(detail=INVALID_CREDENTIALS)
+    if new_encoded:
+        user.password = new_encoded
+        user.save(update_fields=['password'])
+    return user
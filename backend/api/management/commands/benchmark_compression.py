@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+
+from api.benchmarks.data import seed_announcements
+from api.compression import available_codecs
+from api.warmup import request_host
+
+# Typowe odpowiedzi: strona listy (10 ogłoszeń) i wyszukiwanie z limitem 1000 wierszy.
+PAYLOADS = {
+    'list page (10 rows)': '/api/announcements/',
+    'search (1000 rows)': '/api/announcements/search/?min_rate=0',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Report size, compression CPU time and transfer time on a slow link for "
+        "a list page and a 1000-row search with every available encoding. Rows "
+        "are seeded inside a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help="Announcements to seed (0 = use existing data).")
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--link-kbps', type=int, default=1600, help="Link speed for transfer estimates (kbit/s).")
+
+    def handle(self, *args, **options):
+        codecs = available_codecs()
+        if not codecs:
+            raise CommandError("Compression is disabled (COMPRESSION_ENABLED / COMPRESSION_ENCODINGS).")
+        with transaction.atomic():
+            if options['rows']:
+                seed_announcements(options['rows'])
+            client = Client(HTTP_HOST=request_host())
+            for name, path in PAYLOADS.items():
+                body = client.get(path).content
+                self.report(name, body, codecs, options['repeat'], options['link_kbps'])
+            transaction.set_rollback(True)
+
+    def report(self, name, body, codecs, repeat, link_kbps):
+        def transfer_ms(size):
+            return size * 8 / link_kbps
+
+        self.stdout.write(f"{name}: {len(body)} B, {transfer_ms(len(body)):.0f} ms at {link_kbps} kbit/s")
+        for encoding, codec in codecs.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                compressed = codec.compress(body)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"  {encoding:<5} level {codec.level}: {len(compressed)} B "
+                f"({len(compressed) / len(body):.1%}), CPU median {timings[len(timings) // 2]:.2f} ms, "
+                f"transfer {transfer_ms(len(compressed)):.0f} ms"
+            )
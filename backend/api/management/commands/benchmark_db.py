@@ -0,0 +1,112 @@
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.utils import ConnectionHandler
+
+from api.db.pool import pool_metrics
+
+MODES = {
+    'new connection per request': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+    'persistent (CONN_MAX_AGE + health checks)': {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True},
+    'pool (api.db.postgresql_pool)': {'ENGINE': 'api.db.postgresql_pool', 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-request database latency with a new connection per "
+        "request, persistent connections and the in-process pool. Each "
+        "simulated request goes through the same connection lifecycle as a "
+        "Django request (close_old_connections at start and end) and runs "
+        "--query. Needs the PostgreSQL server from settings (docker-compose)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Requests per thread and mode.")
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--pool-size', type=int, default=4)
+        parser.add_argument('--query', default='SELECT id FROM api_announcement ORDER BY id DESC LIMIT 20')
+
+    def handle(self, *args, **options):
+        base = connections[DEFAULT_DB_ALIAS].settings_dict
+        if 'postgresql' not in base['ENGINE']:
+            raise CommandError("benchmark_db needs a PostgreSQL database.")
+
+        results = {}
+        for name, overrides in MODES.items():
+            alias = f"benchmark_{len(results)}"
+            settings_dict = {
+                **base, **overrides,
+                'POOL': {'MIN_SIZE': 0, 'MAX_SIZE': options['pool_size'], 'TIMEOUT': 30},
+            }
+            handler = ConnectionHandler({DEFAULT_DB_ALIAS: base, alias: settings_dict})
+            try:
+                timings = self.run(handler, alias, options)
+            except OperationalError as e:
+                raise CommandError(f"Cannot connect to {base['HOST']}:{base['PORT']}: {e}")
+            finally:
+                handler.close_all()
+            results[name] = timings
+            self.report(name, timings, options)
+
+        metrics = pool_metrics().get(f"benchmark_{len(MODES) - 1}")
+        if metrics:
+            self.stdout.write(self.style.MIGRATE_HEADING("Pool metrics"))
+            self.stdout.write(", ".join(f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+                                        for key, value in metrics.items()))
+
+        baseline = statistics.mean(results['new connection per request'])
+        for name, timings in results.items():
+            saved = baseline - statistics.mean(timings)
+            self.stdout.write(f"{name}: {saved:+.2f} ms saved per request")
+
+    def run(self, handler, alias, options):
+        timings = []
+        lock = threading.Lock()
+
+        def worker():
+            local = []
+            connection = handler[alias]
+            try:
+                for _ in range(options['requests']):
+                    started = time.perf_counter()
+                    # To samo co request_started / request_finished w Django.
+                    connection.close_if_unusable_or_obsolete()
+                    with connection.cursor() as cursor:
+                        cursor.execute(options['query'])
+                        cursor.fetchall()
+                    connection.close_if_unusable_or_obsolete()
+                    local.append((time.perf_counter() - started) * 1000)
+            finally:
+                connection.close()
+            with lock:
+                timings.extend(local)
+
+        errors = []
+
+        def guarded():
+            try:
+                worker()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=guarded) for _ in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return timings
+
+    def report(self, name, timings, options):
+        timings = sorted(timings)
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        self.stdout.write(
+            f"  {len(timings)} requests on {options['threads']} threads: "
+            f"mean {statistics.mean(timings):.2f} ms, p50 {timings[len(timings) // 2]:.2f} ms, "
+            f"p95 {timings[int(len(timings) * 0.95)]:.2f} ms, p99 {timings[int(len(timings) * 0.99)]:.2f} ms"
+        )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from api.benchmarks.http import run_load
+
+DEFAULT_PATHS = [
+    '/api/announcements/',
+    '/api/announcements/?cursor=',
+    '/api/announcements/search/?subject=math',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive concurrent GET requests against a running server and report "
+        "throughput and latency percentiles. Start the server under test "
+        "separately, e.g. 'uvicorn backend.asgi:application --workers 1' "
+        "versus 'python manage.py runserver --noreload'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Base URL of the server.")
+        parser.add_argument('--path', action='append', dest='paths', help="Path to request (repeatable).")
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--token', help="JWT access token sent as a Bearer header.")
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or DEFAULT_PATHS
+        urls = [options['url'].rstrip('/') + path for path in paths]
+        headers = {'Authorization': f"Bearer {options['token']}"} if options['token'] else {}
+
+        result = run_load(urls, options['concurrency'], options['requests'], headers)
+        self.stdout.write(
+            f"{result['requests']} requests, {result['errors']} errors in {result['duration']:.1f}s "
+            f"(concurrency {options['concurrency']})"
+        )
+        self.stdout.write(f"throughput: {result['rps']:,.0f} req/s")
+        self.stdout.write(
+            f"latency p50 {result['p50']:.1f} ms, p95 {result['p95']:.1f} ms, p99 {result['p99']:.1f} ms"
+        )
@@ -0,0 +1,60 @@
+import json
+import threading
+
+from django.core.management.base import BaseCommand
+
+from api.benchmarks.http import run_load
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure browse latency alone and while a login flood (wrong passwords, "
+        "rotating usernames) hits POST /api/login/ on a running server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Base URL of the server.")
+        parser.add_argument('--path', default='/api/announcements/?cursor=', help="Browse path.")
+        parser.add_argument('--browse-concurrency', type=int, default=8)
+        parser.add_argument('--browse-requests', type=int, default=1000)
+        parser.add_argument('--login-concurrency', type=int, default=16)
+        parser.add_argument('--usernames', type=int, default=50, help="Distinct usernames in the flood.")
+
+    def handle(self, *args, **options):
+        base = options['url'].rstrip('/')
+        browse = [base + options['path']]
+
+        def browse_run():
+            return run_load(browse, options['browse_concurrency'], options['browse_requests'])
+
+        self.report("browse only", browse_run())
+
+        stop = threading.Event()
+        login_result = {}
+
+        def body(index):
+            username = f"bench{index % options['usernames']}"
+            return json.dumps({'username': username, 'password': 'wrong-password'}).encode('utf-8')
+
+        def flood():
+            login_result.update(run_load(
+                [base + '/api/login/'], options['login_concurrency'], 10 ** 9,
+                headers={'Content-Type': 'application/json'}, body=body, stop=stop,
+            ))
+
+        thread = threading.Thread(target=flood, daemon=True)
+        thread.start()
+        try:
+            self.report("browse during login flood", browse_run())
+        finally:
+            stop.set()
+            thread.join()
+        self.report("login flood", login_result)
+
+    def report(self, name, result):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"== {name}"))
+        self.stdout.write(
+            f"{result['requests']} requests, {result['rps']:,.0f} req/s, "
+            f"p50 {result['p50']:.1f} ms, p95 {result['p95']:.1f} ms, p99 {result['p99']:.1f} ms, "
+            f"statuses {result['statuses']}, errors {result['errors']}"
+        )
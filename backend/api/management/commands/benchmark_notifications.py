@@ -0,0 +1,61 @@
+import time
+
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from api.tasks import NotificationBatcher, build_notification, deliver
+
+
+class HandshakeEmailBackend(LocmemEmailBackend):
+    """
+    locmem backend that pays a fixed cost per connection, standing in for the
+    TCP + TLS + AUTH handshake of a real SMTP session.
+    """
+    connect_latency = 0.0
+
+    def send_messages(self, messages):
+        time.sleep(self.connect_latency)
+        return super().send_messages(messages)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure notification throughput: one connection per message versus "
+        "batched delivery, against a local e-mail backend."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=10000)
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument(
+            '--connect-latency', type=float, default=0.0,
+            help="Simulated per-connection handshake in milliseconds (locmem stand-in only).",
+        )
+        parser.add_argument(
+            '--backend',
+            help="E-mail backend to use instead of the locmem stand-in, e.g. the console backend.",
+        )
+
+    def handle(self, *args, **options):
+        count = options['messages']
+        messages = [build_notification(f"user{i}@example.com", "Welcome to our service!") for i in range(count)]
+        HandshakeEmailBackend.connect_latency = options['connect_latency'] / 1000
+        backend = options['backend'] or f'{__name__}.HandshakeEmailBackend'
+
+        with override_settings(EMAIL_BACKEND=backend):
+            started = time.perf_counter()
+            for message in messages:
+                deliver([message])
+            single = time.perf_counter() - started
+
+            batcher = NotificationBatcher(batch_size=options['batch_size'], max_wait=60)
+            started = time.perf_counter()
+            for message in messages:
+                batcher.add(message)
+            batcher.flush()
+            batched = time.perf_counter() - started
+
+        self.stdout.write(f"backend: {backend}, messages: {count}, connect latency: {options['connect_latency']} ms")
+        self.stdout.write(f"per-message connection: {count / single:,.0f} msg/s")
+        self.stdout.write(f"batched ({options['batch_size']}/connection): {count / batched:,.0f} msg/s")
@@ -0,0 +1,97 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks.routes import (
+    SCENARIOS,
+    HTTPTransport,
+    InProcessTransport,
+    compare_reports,
+    missing_scenarios,
+    run_benchmark,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a weighted read/write mix over every route in api.urls and write "
+        "a JSON report with throughput, p50/p95/p99 latency and SQL queries "
+        "per route. Runs in-process by default (SQL counted per request); "
+        "--url drives a live server sharing this database instead (all requests "
+        "then share one client IP - raise LOGIN_THROTTLE_IP on that server). "
+        "'--compare BASE CURRENT' compares two reports and fails on regressions. "
+        "Writes go to the configured database - seed one with seed_benchmark_data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help="Base URL of a running server (default: in-process).")
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--min-per-route', type=int, default=5)
+        parser.add_argument('--route', action='append', dest='routes', help="Only this route (repeatable).")
+        parser.add_argument('--output', help="Write the JSON report here instead of stdout.")
+        parser.add_argument('--compare', nargs=2, metavar=('BASE', 'CURRENT'), help="Compare two JSON reports.")
+        parser.add_argument('--threshold', type=float, default=10.0, help="Allowed slowdown in percent (compare).")
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            return self.compare(*options['compare'], threshold=options['threshold'] / 100)
+
+        missing = missing_scenarios()
+        if missing:
+            raise CommandError(f"No benchmark scenario for routes: {', '.join(missing)} (api/benchmarks/routes.py)")
+        scenarios = SCENARIOS
+        if options['routes']:
+            unknown = set(options['routes']) - {scenario.name for scenario in SCENARIOS}
+            if unknown:
+                raise CommandError(f"Unknown routes: {', '.join(sorted(unknown))}")
+            scenarios = [scenario for scenario in SCENARIOS if scenario.name in options['routes']]
+
+        if options['url']:
+            transport = lambda: HTTPTransport(options['url'])
+        else:
+            transport = InProcessTransport
+        report = run_benchmark(
+            transport, options['requests'], options['concurrency'], options['seed'], scenarios, options['min_per_route'],
+        )
+        report['meta']['target'] = options['url'] or 'in-process'
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+        else:
+            self.stdout.write(output)
+        total = report['total']
+        sys.stderr.write(
+            f"{total['requests']} requests, {total['errors']} errors in {report['meta']['duration']:.1f}s: "
+            f"{total['rps']:,.0f} req/s, p50 {total['p50']:.1f} ms, p95 {total['p95']:.1f} ms, "
+            f"p99 {total['p99']:.1f} ms\n"
+        )
+
+    def compare(self, base_path, current_path, threshold):
+        try:
+            with open(base_path) as handle:
+                base = json.load(handle)
+            with open(current_path) as handle:
+                current = json.load(handle)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read report: {e}")
+
+        regressions = 0
+        for route, metric, before, after, regression in compare_reports(base, current, threshold):
+            if after is None:
+                line = f"{route:24} {metric:12} missing from {current_path}"
+            else:
+                change = (after - before) / before * 100 if before else 0.0
+                line = f"{route:24} {metric:12} {before:10.2f} -> {after:10.2f} ({change:+.1f}%)"
+            if regression:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(f"{line}  REGRESSION"))
+            else:
+                self.stdout.write(line)
+        if regressions:
+            raise CommandError(f"{regressions} regressions (threshold {threshold:.0%})")
+        self.stdout.write(self.style.SUCCESS("No regressions"))
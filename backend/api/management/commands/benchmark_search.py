@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.benchmarks.data import seed_announcements
+from api.models import Announcement
+from api.search import full_text_search
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the query plans of subject__icontains and full-text search. "
+        "Use --seed to insert synthetic announcements first (e.g. --seed 1000000)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help="Announcements to insert before measuring.")
+        parser.add_argument('--query', default="matematyka", help="Text to search for.")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed executions per query.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("EXPLAIN ANALYZE comparison requires PostgreSQL.")
+
+        if options['seed']:
+            started = time.perf_counter()
+            seed_announcements(options['seed'])
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE api_announcement")
+            self.stdout.write(f"Seeded {options['seed']} announcements in {time.perf_counter() - started:.1f}s")
+
+        text = options['query']
+        total = Announcement.objects.count()
+        shapes = {
+            'icontains (old)': Announcement.objects.filter(subject__icontains=text).order_by('-date_added', '-id'),
+            'full-text (new)': full_text_search(Announcement.objects.all(), text).order_by('-rank', '-date_added', '-id'),
+        }
+        self.stdout.write(f"Rows in api_announcement: {total}")
+        for name, queryset in shapes.items():
+            queryset = queryset[:10]
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {name}"))
+            self.stdout.write(queryset.explain(analyze=True, buffers=True))
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                list(queryset)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"min {timings[0]:.2f} ms, median {timings[len(timings) // 2]:.2f} ms over {len(timings)} runs"
+            )
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from api.benchmarks.data import seed_announcements
+from api.fastpath import serialize_rows, values_for
+from api.models import Announcement
+from api.renderers import FastJSONRenderer
+from api.serializers import AnnouncementSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare AnnouncementSerializer(many=True) + JSONRenderer with the "
+        ".values() row mapper + FastJSONRenderer on the same rows. Rows are "
+        "seeded inside a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            seed_announcements(options['rows'])
+            queryset = Announcement.objects.order_by('-date_added', '-id')[:options['rows']]
+            self.run(queryset, options['repeat'])
+            transaction.set_rollback(True)
+
+    def run(self, queryset, repeat):
+        def serializer_path():
+            rows = list(queryset.with_author())
+            data = AnnouncementSerializer(rows, many=True).data
+            return JSONRenderer().render(data)
+
+        def fast_path():
+            rows = list(values_for(queryset, AnnouncementSerializer))
+            return FastJSONRenderer().render(serialize_rows(rows, AnnouncementSerializer))
+
+        if serializer_path() != fast_path():
+            self.stderr.write(self.style.ERROR("Outputs differ!"))
+            return
+
+        for name, func in (('serializer + JSONRenderer', serializer_path), ('values() + FastJSONRenderer', fast_path)):
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"{name}: min {timings[0]:.1f} ms, median {timings[len(timings) // 2]:.1f} ms "
+                f"({queryset.count()} rows, {len(timings)} runs)"
+            )
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.cache import invalidate_announcements
+from api.models import Announcement
+
+
+class Command(BaseCommand):
+    help = (
+        "Find announcements whose denormalized author_first_name/author_last_name "
+        "differ from the author's current name, and repair them with --fix."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Copy the current names from the user table.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Announcements repaired per UPDATE.")
+        parser.add_argument('--show', type=int, default=10, help="How many drifted rows to print.")
+
+    def handle(self, *args, **options):
+        drifted = list(
+            Announcement.objects.author_name_drift().order_by('pk').values_list('pk', flat=True)
+        )
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("Author names are consistent."))
+            return
+
+        self.stdout.write(f"{len(drifted)} announcement(s) with stale author names:")
+        sample = Announcement.objects.filter(pk__in=drifted[:options['show']]).order_by('pk').values_list(
+            'pk', 'author_id', 'author_first_name', 'author_last_name', 'author__first_name', 'author__last_name',
+        )
+        for pk, author_id, first_name, last_name, current_first_name, current_last_name in sample:
+            self.stdout.write(
+                f"  #{pk} (author {author_id}): {first_name!r} {last_name!r} "
+                f"-> {current_first_name!r} {current_last_name!r}"
+            )
+
+        if not options['fix']:
+            raise CommandError("Author names out of sync - run with --fix to repair them.")
+
+        batch_size = options['batch_size']
+        for offset in range(0, len(drifted), batch_size):
+            batch = drifted[offset:offset + batch_size]
+            Announcement.objects.filter(pk__in=batch).sync_author_names()
+            invalidate_announcements(*batch)
+        self.stdout.write(self.style.SUCCESS(f"Repaired {len(drifted)} announcement(s)."))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import QueryDict
+
+from api.models import Announcement
+from api.search import filter_announcements, order_by_rank
+
+# Kształty zapytań wysyłane przez UI i klientów API.
+SEARCH_SHAPES = {
+    'list page 1': None,
+    'subject': 'subject=matematyka',
+    'rate range': 'min_rate=50&max_rate=120',
+    'subject + rate range': 'subject=matematyka&min_rate=50&max_rate=120',
+    'min_rate only (broad)': 'min_rate=0',
+    'full-text': 'q=matura',
+    'full-text + rate range': 'q=matura&min_rate=50&max_rate=120',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Print query plans (EXPLAIN ANALYZE on PostgreSQL) for the standard "
+        "announcement list and search shapes, to catch plan regressions before deploys."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10, help="Rows fetched per query (page size).")
+        parser.add_argument('--no-analyze', action='store_true', help="Only plan the queries, do not run them.")
+        parser.add_argument('--shape', action='append', help="Run only the named shape(s).")
+
+    def handle(self, *args, **options):
+        analyze = connection.vendor == 'postgresql' and not options['no_analyze']
+        explain_options = {'analyze': True, 'buffers': True} if analyze else {}
+        for name, query in SEARCH_SHAPES.items():
+            if options['shape'] and name not in options['shape']:
+                continue
+            if query is None:
+                queryset = Announcement.objects.order_by('-date_added', '-id')
+            else:
+                queryset = order_by_rank(filter_announcements(QueryDict(query)))
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {name} ({query or '/announcements/'})"))
+            self.stdout.write(queryset[:options['limit']].explain(**explain_options))
+            self.stdout.write("")
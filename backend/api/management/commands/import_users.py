@@ -0,0 +1,168 @@
+import csv
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from api.models import SystemUser
+from api.tasks import send_notification_batch
+
+FIELDS = ('username', 'email', 'first_name', 'last_name', 'phone_number')
+
+
+def read_csv(handle):
+    for line, row in enumerate(csv.DictReader(handle), start=2):
+        yield line, row
+
+
+def read_ndjson(handle):
+    for line, raw in enumerate(handle, start=1):
+        if not raw.strip():
+            continue
+        try:
+            yield line, json.loads(raw)
+        except ValueError:
+            yield line, None
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Import users from a CSV (header row) or NDJSON file, streaming the "
+        "file and inserting in batches with bulk_create. Columns: username, "
+        "email, first_name, last_name, phone_number and either password_hash "
+        "(already encoded, stored as is), password (hashed on --hash-workers "
+        "processes) or neither (unusable password, e.g. for a reset e-mail). "
+        "Rows whose username or e-mail already exists are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help="Default: from the file extension.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--hash-workers', type=int, default=1, help="Processes hashing plain passwords.")
+        parser.add_argument('--notify', action='store_true', help="Queue a welcome e-mail per batch.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        reader = read_ndjson if fmt == 'ndjson' else read_csv
+        executor = ProcessPoolExecutor(options['hash_workers']) if options['hash_workers'] > 1 else None
+
+        self.created = self.skipped = self.invalid = 0
+        started = time.perf_counter()
+        try:
+            with open(path, newline='', encoding='utf-8') as handle:
+                for batch in batches(reader(handle), options['batch_size']):
+                    self.import_batch(batch, executor, options['notify'])
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Created {self.created} users, skipped {self.skipped} existing, "
+            f"{self.invalid} invalid rows in {elapsed:.1f}s"
+        )
+
+    def import_batch(self, rows, executor, notify):
+        users, passwords = [], []
+        seen_usernames, seen_emails = set(), set()
+        for line, row in rows:
+            user, password = self.build_user(line, row)
+            if user is None:
+                continue
+            if user.username in seen_usernames or user.email in seen_emails:
+                self.skipped += 1
+                continue
+            seen_usernames.add(user.username)
+            seen_emails.add(user.email)
+            users.append(user)
+            passwords.append(password)
+
+        # Jedno zapytanie na partię zamiast exists() dla każdego wiersza.
+        existing = SystemUser.objects.filter(
+            Q(username__in=seen_usernames) | Q(email__in=seen_emails)
+        ).values_list('username', 'email')
+        taken_usernames, taken_emails = set(), set()
+        for username, email in existing:
+            taken_usernames.add(username)
+            taken_emails.add(email)
+
+        pending = [
+            (user, password) for user, password in zip(users, passwords)
+            if user.username not in taken_usernames and user.email not in taken_emails
+        ]
+        self.skipped += len(users) - len(pending)
+        if not pending:
+            return
+
+        to_hash = [password for _, password in pending if password is not None]
+        hashed = iter(executor.map(make_password, to_hash, chunksize=64) if executor else map(make_password, to_hash))
+        for user, password in pending:
+            if password is not None:
+                user.password = next(hashed)
+
+        users = [user for user, _ in pending]
+        # Wiersze dodane równolegle (np. rejestracja) pomija baza zamiast przerywać import.
+        SystemUser.objects.bulk_create(users, ignore_conflicts=True)
+        # bulk_create z ignore_conflicts nie mówi, które wiersze weszły - sprawdzamy to w bazie.
+        # Hash hasła ma losową sól, więc para login/e-mail z innym hashem to cudzy wiersz.
+        inserted = set(SystemUser.objects.filter(username__in=[user.username for user in users]).values_list(
+            'username', 'email', 'password',
+        ))
+        lost = [user for user in users if (user.username, user.email, user.password) not in inserted]
+        for user in lost:
+            self.stderr.write(f"{user.username}: already exists (created concurrently), skipped")
+        users = [user for user in users if (user.username, user.email, user.password) in inserted]
+        self.skipped += len(lost)
+        self.created += len(users)
+        if notify and users:
+            send_notification_batch.delay([(user.email, "Welcome to our service!") for user in users])
+
+    def build_user(self, line, row):
+        if not isinstance(row, dict):
+            self.invalid += 1
+            self.stderr.write(f"line {line}: not a JSON object")
+            return None, None
+        # NDJSON może mieć liczby i wartości logiczne - wiersz jest wtedy błędny, nie cały import.
+        not_text = [
+            field for field in FIELDS + ('password', 'password_hash')
+            if row.get(field) is not None and not isinstance(row[field], str)
+        ]
+        if not_text:
+            self.invalid += 1
+            self.stderr.write(f"line {line}: {', '.join(not_text)} must be text")
+            return None, None
+        user = SystemUser(**{field: (row.get(field) or '').strip() for field in FIELDS})
+        user.phone_number = user.phone_number or None
+        password = None
+        if row.get('password_hash'):
+            user.password = row['password_hash']
+        elif row.get('password'):
+            password = row['password']
+        else:
+            user.set_unusable_password()
+        try:
+            if not user.username or not user.email:
+                raise ValidationError("username and email are required")
+            if row.get('password_hash'):
+                identify_hasher(user.password)
+            user.clean_fields(exclude=['password', 'last_login', 'date_joined'])
+        except (ValidationError, ValueError) as e:
+            self.invalid += 1
+            self.stderr.write(f"line {line}: {getattr(e, 'messages', e)}")
+            return None, None
+        return user, password
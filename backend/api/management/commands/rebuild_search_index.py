@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.search import get_search_configs, install_search_trigger
+
+
+class Command(BaseCommand):
+    help = "Recreate the full-text search trigger and recompute search_vector for all announcements."
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Full-text search index is only maintained on PostgreSQL.")
+        with transaction.atomic():
+            install_search_trigger(connection)
+        configs = ", ".join(get_search_configs(connection))
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt using: {configs}"))
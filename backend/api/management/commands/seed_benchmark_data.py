@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.benchmarks.data import seed_dataset
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a reproducible benchmark dataset for "
+        "benchmark_routes: --size 10k, 100k or 1m announcements and as many "
+        "users (override with --announcements / --users). Every seeded user "
+        "has the password 'password'. Data is added to what is already there."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=SIZES, default='10k')
+        parser.add_argument('--announcements', type=int)
+        parser.add_argument('--users', type=int)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        announcements = options['announcements'] if options['announcements'] is not None else SIZES[options['size']]
+        users = options['users'] if options['users'] is not None else SIZES[options['size']]
+        started = time.perf_counter()
+
+        def progress(kind, done, total):
+            self.stdout.write(f"{kind}: {done}/{total} ({time.perf_counter() - started:.0f}s)")
+
+        seed_dataset(announcements, max(1, users), options['batch_size'], options['seed'], progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {users} users and {announcements} announcements in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,160 @@
+import multiprocessing
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from api.cache import is_shared_cache
+from api.warmup import warm_up_app, warm_up_worker
+
+
+def format_timings(timings):
+    return ", ".join(f"{name} {ms:.0f} ms" for name, ms in timings.items())
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the API under gunicorn with several workers: WSGI with sync or "
+        "gthread workers, or ASGI (--asgi) with uvicorn workers. The app is "
+        "loaded and warmed up once in the master before forking (preload), "
+        "each worker connects to the database and serves one in-process "
+        "request before accepting traffic, and the command reports the cold "
+        "start and the latency of the first HTTP request. Migrations are "
+        "applied only with --migrate and never generated."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default=os.environ.get('SERVE_BIND', '0.0.0.0:8000'))
+        parser.add_argument(
+            '--workers', type=int,
+            default=int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1)),
+        )
+        parser.add_argument('--threads', type=int, default=1, help="Threads per WSGI worker (gthread when > 1).")
+        parser.add_argument('--asgi', action='store_true', help="Serve backend.asgi with uvicorn workers.")
+        parser.add_argument('--timeout', type=int, default=30)
+        parser.add_argument('--max-requests', type=int, default=0, help="Recycle workers after N requests (0 = never).")
+        parser.add_argument('--migrate', action='store_true', help="Apply migrations before starting.")
+        parser.add_argument('--no-warmup', action='store_true')
+        parser.add_argument('--probe-path', default='/api/announcements/',
+                            help="Path requested once the server is up to report first-request latency.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            from gunicorn.app.base import BaseApplication
+        except ImportError:
+            raise CommandError("serve needs gunicorn (pip install -r requirements.txt).")
+
+        if options['workers'] > 1 and not is_shared_cache():
+            # Unieważnienia, limity logowania i profile żyłyby osobno w każdym workerze.
+            raise CommandError(
+                "--workers > 1 needs a shared cache: set CACHE_BACKEND/CACHE_LOCATION "
+                "(e.g. django.core.cache.backends.redis.RedisCache, redis://redis:6379/1) "
+                "or run with --workers 1."
+            )
+
+        metrics_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+        if metrics_dir:
+            # Pliki poprzedniego uruchomienia zawyżałyby liczniki.
+            os.makedirs(metrics_dir, exist_ok=True)
+            for name in os.listdir(metrics_dir):
+                if name.endswith('.db'):
+                    os.remove(os.path.join(metrics_dir, name))
+        elif options['workers'] > 1:
+            self.stdout.write(self.style.WARNING(
+                "PROMETHEUS_MULTIPROC_DIR is not set: /api/metrics will only show the worker serving the scrape."
+            ))
+
+        if options['asgi'] and 'DB_CONN_MAX_AGE' not in os.environ:
+            # Ustawienia są już wczytane, więc domyślne 0 z backend/asgi.py trzeba nadać tutaj.
+            for database in settings.DATABASES.values():
+                database['CONN_MAX_AGE'] = 0
+
+        if options['migrate']:
+            call_command('migrate', interactive=False, verbosity=1)
+
+        warmup = not options['no_warmup']
+        asgi = options['asgi']
+        command = self
+        # Licznik gotowych workerów, współdzielony z procesami po forku.
+        ready = multiprocessing.Value('i', 0)
+
+        def load():
+            app = import_string('backend.asgi.application' if asgi else 'backend.wsgi.application')
+            if warmup:
+                command.stdout.write(f"Preloaded and warmed up: {format_timings(warm_up_app())}")
+            return app
+
+        def post_worker_init(worker):
+            if warmup:
+                timings = warm_up_worker(asgi=asgi)
+                command.stdout.write(f"Worker {worker.pid} ready: {format_timings(timings)}")
+            with ready.get_lock():
+                ready.value += 1
+
+        def child_exit(server, worker):
+            if metrics_dir:
+                from prometheus_client import multiprocess
+                multiprocess.mark_process_dead(worker.pid)
+
+        def when_ready(server):
+            threading.Thread(target=self.probe, args=(started, ready, options), daemon=True).start()
+
+        config = {
+            'bind': options['bind'],
+            'workers': options['workers'],
+            'threads': options['threads'],
+            'worker_class': 'uvicorn.workers.UvicornWorker' if asgi else ('gthread' if options['threads'] > 1 else 'sync'),
+            'timeout': options['timeout'],
+            'max_requests': options['max_requests'],
+            'max_requests_jitter': options['max_requests'] // 10,
+            # Moduły i cache z warm_up_app są współdzielone przez workery (copy-on-write).
+            'preload_app': True,
+            'accesslog': '-',
+            'post_worker_init': post_worker_init,
+            'when_ready': when_ready,
+            'child_exit': child_exit,
+        }
+
+        class Application(BaseApplication):
+            def load_config(self):
+                for key, value in config.items():
+                    self.cfg.set(key, value)
+
+            def load(self):
+                return load()
+
+        Application().run()
+
+    def probe(self, started, ready, options):
+        host, _, port = options['bind'].rpartition(':')
+        if host in ('', '0.0.0.0', '[::]'):
+            host = '127.0.0.1'
+        url = f"http://{host}:{port}{options['probe_path']}"
+        request = urllib.request.Request(url, headers={'Host': f'localhost:{port}'})
+        deadline = time.monotonic() + 60
+        # Pierwsze żądanie dopiero gdy wszystkie workery są gotowe.
+        while ready.value < options['workers'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        while time.monotonic() < deadline:
+            request_started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=10) as response:
+                    response.read()
+            except urllib.error.HTTPError:
+                pass
+            except OSError:
+                time.sleep(0.05)
+                continue
+            now = time.perf_counter()
+            self.stdout.write(self.style.SUCCESS(
+                f"Cold start {now - started:.2f}s (command start to first response), first request {(now - request_started) * 1000:.1f} ms ({url})"
+            ))
+            return
+        self.stderr.write(f"No response from {url} within 60s")
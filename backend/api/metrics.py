@@ -0,0 +1,267 @@
+"""
+Per-route request metrics exposed in the Prometheus text format at
+``/api/metrics``.
+
+``MetricsMiddleware`` times every request and records, per resolved route,
+the status, latency, SQL query count and time, render time and response
+size. SQL is counted by an execute wrapper installed on every database
+connection, which attributes queries to the request through a context
+variable - so queries run by async views in ``sync_to_async`` threads are
+counted as well. For streaming responses the queries run while the body is
+consumed, so the stream is wrapped to count them and the request is recorded
+(latency included) when the stream ends. Methods outside the standard set are
+recorded as ``OTHER`` so clients cannot create new label values. Celery
+publish latency comes from the publish signals.
+
+With several worker processes set ``PROMETHEUS_MULTIPROC_DIR`` to an empty
+directory before start: every process then writes its samples to its own
+memory-mapped files there and ``/api/metrics`` aggregates all of them.
+"""
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from rest_framework.permissions import BasePermission
+from rest_framework.renderers import BaseRenderer
+
+REQUESTS = Counter('api_requests_total', "HTTP requests", ['route', 'method', 'status'])
+LATENCY = Histogram('api_request_duration_seconds', "Request latency", ['route', 'method'])
+SQL_QUERIES = Histogram(
+    'api_request_sql_queries', "SQL queries per request", ['route'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+SQL_DURATION = Histogram(
+    'api_request_sql_duration_seconds', "Time spent in SQL per request", ['route'],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5),
+)
+SERIALIZATION = Histogram(
+    'api_serialization_duration_seconds', "Time spent rendering the response body", ['route'],
+    buckets=(.0001, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5),
+)
+RESPONSE_SIZE = Histogram(
+    'api_response_size_bytes', "Response body size (non-streaming responses)", ['route'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+COMPRESSION_BYTES = Counter(
+    'api_compression_bytes_total', "Response bytes before and after compression", ['encoding', 'stage'],
+)
+COMPRESSION_SECONDS = Counter('api_compression_seconds_total', "CPU time spent compressing responses", ['encoding'])
+CELERY_PUBLISH = Histogram(
+    'celery_publish_duration_seconds', "Time to publish a task to the broker", ['task'],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1),
+)
+
+
+class RequestStats:
+    __slots__ = ('sql_queries', 'sql_seconds', 'render_seconds')
+
+    def __init__(self):
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+        self.render_seconds = 0.0
+
+
+current_request = ContextVar('api_metrics_request', default=None)
+
+# Etykieta "method" pochodzi od klienta - spoza tej listy trafia do OTHER.
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    stats = current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.sql_queries += 1
+        stats.sql_seconds += time.perf_counter() - started
+
+
+def install_sql_wrapper(sender, connection, **kwargs):
+    """
+    ``connection_created`` receiver: wrap every query on the new connection.
+    """
+    if sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_wrapper)
+
+
+def record_render(seconds):
+    stats = current_request.get()
+    if stats is not None:
+        stats.render_seconds += seconds
+
+
+def method_label(request):
+    return request.method if request.method in METHODS else 'OTHER'
+
+
+def count_stream(chunks, stats, on_close):
+    """
+    Iterate ``chunks`` with ``stats`` as the current request, so queries run
+    while the body is consumed are counted; ``on_close`` runs at the end.
+    """
+    try:
+        iterator = iter(chunks)
+        while True:
+            token = current_request.set(stats)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                current_request.reset(token)
+            yield chunk
+    finally:
+        on_close()
+
+
+async def acount_stream(chunks, stats, on_close):
+    try:
+        iterator = aiter(chunks)
+        while True:
+            token = current_request.set(stats)
+            try:
+                chunk = await anext(iterator)
+            except StopAsyncIteration:
+                return
+            finally:
+                current_request.reset(token)
+            yield chunk
+    finally:
+        on_close()
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.url_name or match.route
+
+
+class MetricsMiddleware:
+    """
+    Record the metrics above for every request; works in sync and async stacks.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self.finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self.finish(request, response, stats, started)
+
+    def finish(self, request, response, stats, started):
+        if not response.streaming:
+            self.record(request, response, stats, time.perf_counter() - started)
+            return response
+
+        def on_close():
+            self.record(request, response, stats, time.perf_counter() - started)
+
+        if response.is_async:
+            response.streaming_content = acount_stream(response.streaming_content, stats, on_close)
+        else:
+            response.streaming_content = count_stream(response.streaming_content, stats, on_close)
+        return response
+
+    @staticmethod
+    def record(request, response, stats, seconds):
+        route = route_name(request)
+        method = method_label(request)
+        REQUESTS.labels(route, method, str(response.status_code)).inc()
+        LATENCY.labels(route, method).observe(seconds)
+        SQL_QUERIES.labels(route).observe(stats.sql_queries)
+        SQL_DURATION.labels(route).observe(stats.sql_seconds)
+        SERIALIZATION.labels(route).observe(stats.render_seconds)
+        if not response.streaming:
+            RESPONSE_SIZE.labels(route).observe(len(response.content))
+
+
+# Czas publikacji taska: od before_task_publish do after_task_publish w tym samym wątku.
+_publishing = threading.local()
+
+
+def _publish_started():
+    if not hasattr(_publishing, 'started'):
+        _publishing.started = {}
+    return _publishing.started
+
+
+def before_task_publish(sender=None, headers=None, **kwargs):
+    _publish_started()[(headers or {}).get('id')] = time.perf_counter()
+
+
+def after_task_publish(sender=None, headers=None, **kwargs):
+    started = _publish_started().pop((headers or {}).get('id'), None)
+    if started is not None:
+        CELERY_PUBLISH.labels(sender).observe(time.perf_counter() - started)
+
+
+def collect():
+    """
+    The exposition for all worker processes (multiprocess mode) or this one.
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = CONTENT_TYPE_LATEST.split(';')[0]
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+class HasMetricsToken(BasePermission):
+    """
+    Allow scrapes carrying ``Authorization: Bearer <METRICS_TOKEN>``, or
+    everyone when no token is configured.
+    """
+
+    def has_permission(self, request, view):
+        if not settings.METRICS_TOKEN:
+            return True
+        return constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f"Bearer {settings.METRICS_TOKEN}")
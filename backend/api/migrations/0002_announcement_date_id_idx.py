@@ -0,0 +1,17 @@
+# Generated by Django 4.2.5 on 2026-10-18 20:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['-date_added', '-id'], name='announcement_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.5 on 2026-10-18 20:07
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Zamrożona kopia SQL z api.search z chwili tej migracji - migracje nie importują
+# kodu aplikacji, który może się później zmienić (manage.py rebuild_search_index
+# instaluje aktualną wersję triggera).
+TRIGGER_NAME = 'api_announcement_search_vector_trigger'
+FUNCTION_NAME = 'api_announcement_search_vector_update'
+SEARCH_CONFIGS = ['polish', 'english', 'simple']
+
+
+def search_configs(cursor):
+    cursor.execute("SELECT cfgname FROM pg_ts_config")
+    existing = {row[0] for row in cursor.fetchall()}
+    return [config for config in SEARCH_CONFIGS if config in existing] or ['simple']
+
+
+def search_document_sql(configs, prefix=''):
+    parts = []
+    for column, weight in (('subject', 'A'), ('content', 'B')):
+        for config in configs:
+            parts.append(
+                f"setweight(to_tsvector('{config}'::regconfig, coalesce({prefix}{column}, '')), '{weight}')"
+            )
+    return ' || '.join(parts)
+
+
+def create_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        configs = search_configs(cursor)
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {FUNCTION_NAME}() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := {search_document_sql(configs, prefix='NEW.')};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        cursor.execute(f"DROP TRIGGER IF EXISTS {TRIGGER_NAME} ON api_announcement")
+        cursor.execute(f"""
+            CREATE TRIGGER {TRIGGER_NAME}
+            BEFORE INSERT OR UPDATE OF subject, content ON api_announcement
+            FOR EACH ROW EXECUTE FUNCTION {FUNCTION_NAME}()
+        """)
+        cursor.execute(f"UPDATE api_announcement SET search_vector = {search_document_sql(configs)}")
+
+
+def remove_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {TRIGGER_NAME} ON api_announcement")
+        cursor.execute(f"DROP FUNCTION IF EXISTS {FUNCTION_NAME}()")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_announcement_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='announcement',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # Trigger i wypełnienie kolumny przed indeksem - szybszy backfill.
+        migrations.RunPython(create_trigger, remove_trigger),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='announcement_search_gin'),
+        ),
+    ]
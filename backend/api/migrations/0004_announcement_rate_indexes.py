@@ -0,0 +1,41 @@
+# Generated by Django 4.2.5 on 2026-10-18 20:09
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+# subject__icontains na PostgreSQL to UPPER("subject"::text) LIKE UPPER(%s),
+# więc indeks trigramowy musi być na tym samym wyrażeniu.
+TRIGRAM_INDEX_SQL = (
+    'CREATE INDEX IF NOT EXISTS announcement_subject_trgm '
+    'ON api_announcement USING gin ((UPPER("subject"::text)) gin_trgm_ops)'
+)
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(TRIGRAM_INDEX_SQL)
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS announcement_subject_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_announcement_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['hourly_rate'], name='announcement_rate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['subject', 'hourly_rate'], name='announcement_subject_rate_idx'),
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
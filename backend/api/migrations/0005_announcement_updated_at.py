@@ -0,0 +1,30 @@
+# Generated by Django 4.2.5 on 2026-10-18 20:14
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Istniejące ogłoszenia nie były edytowane po dodaniu.
+    Announcement = apps.get_model('api', 'Announcement')
+    Announcement.objects.update(updated_at=F('date_added'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_announcement_rate_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='announcement',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['updated_at'], name='announcement_updated_idx'),
+        ),
+    ]
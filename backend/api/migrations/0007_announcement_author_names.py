@@ -0,0 +1,36 @@
+# Generated by Django 4.2.5 on 2026-10-18 21:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_author_names(apps, schema_editor):
+    # Jeden UPDATE z podzapytaniem skorelowanym po kluczu głównym użytkownika.
+    Announcement = apps.get_model('api', 'Announcement')
+    SystemUser = apps.get_model('api', 'SystemUser')
+    authors = SystemUser.objects.filter(pk=OuterRef('author_id'))
+    Announcement.objects.update(
+        author_first_name=Subquery(authors.values('first_name')[:1]),
+        author_last_name=Subquery(authors.values('last_name')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_user_deletion_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='announcement',
+            name='author_first_name',
+            field=models.CharField(blank=True, default='', max_length=150),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='author_last_name',
+            field=models.CharField(blank=True, default='', max_length=150),
+        ),
+        migrations.RunPython(backfill_author_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.5 on 2026-10-18 22:15
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_announcement_author_names'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='announcement',
+            name='announcement_updated_idx',
+        ),
+    ]
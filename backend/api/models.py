@@ -1,5 +1,11 @@
 from django.db import models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Now
 from django.contrib.auth.models import AbstractUser, Group, Permission
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+
+from .cache import invalidate_token_user
 
 # Create your models here.
 class SystemUser(AbstractUser):
@@ -16,13 +22,127 @@ class SystemUser(AbstractUser):
         related_name="custom_user_permissions_set",  
         blank=True,
     )
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Hasło, is_active, is_staff... - uwierzytelnianie musi od razu widzieć zmiany.
+        invalidate_token_user(self.pk)
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        invalidate_token_user(pk)
+        return result
     
+class AnnouncementQuerySet(models.QuerySet):
+    def with_author(self, public=False):
+        """
+        Fetch the author in the same query. The public author representation
+        is read from the denormalized ``author_*`` columns - no join at all.
+        """
+        if public:
+            return self.only(
+                'id', 'subject', 'content', 'hourly_rate', 'date_added',
+                'author_id', 'author_first_name', 'author_last_name',
+            )
+        return self.select_related('author')
+
+    def set_author_names(self, first_name, last_name):
+        """
+        Rewrite the denormalized author names with one UPDATE.
+        """
+        return self.update(author_first_name=first_name, author_last_name=last_name, updated_at=Now())
+
+    def sync_author_names(self):
+        """
+        Copy the names from ``SystemUser`` in one UPDATE (correlated subquery).
+        """
+        authors = SystemUser.objects.filter(pk=OuterRef('author_id'))
+        return self.update(
+            author_first_name=Subquery(authors.values('first_name')[:1]),
+            author_last_name=Subquery(authors.values('last_name')[:1]),
+            updated_at=Now(),
+        )
+
+    def author_name_drift(self):
+        """
+        Announcements whose denormalized names differ from the author's.
+        """
+        return self.exclude(
+            author_first_name=models.F('author__first_name'),
+            author_last_name=models.F('author__last_name'),
+        )
+
+
+class AnnouncementManager(models.Manager.from_queryset(AnnouncementQuerySet)):
+    def get_queryset(self):
+        # search_vector utrzymuje trigger w bazie - nie pobieramy go przy odczytach.
+        return super().get_queryset().defer('search_vector')
+
+
 class Announcement(models.Model):
     subject = models.CharField(max_length=255)
     content = models.TextField()
     hourly_rate = models.DecimalField(max_digits=10, decimal_places=2)
     author = models.ForeignKey(SystemUser, on_delete=models.CASCADE)
+    # Kopia imienia i nazwiska autora - publiczne listy nie robią JOIN-a z użytkownikami.
+    # Zmiany w edit_user przepisuje jeden UPDATE; rozjazdy wykrywa check_author_names.
+    author_first_name = models.CharField(max_length=150, blank=True, default='')
+    author_last_name = models.CharField(max_length=150, blank=True, default='')
     date_added = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = AnnouncementManager()
+
+    class Meta:
+        indexes = [
+            # Kolejność listy ogłoszeń i pozycja kursora (date_added, id).
+            models.Index(fields=['-date_added', '-id'], name='announcement_date_id_idx'),
+            GinIndex(fields=['search_vector'], name='announcement_search_gin'),
+            # Filtry min_rate/max_rate oraz przedmiot + zakres stawki.
+            models.Index(fields=['hourly_rate'], name='announcement_rate_idx'),
+            models.Index(fields=['subject', 'hourly_rate'], name='announcement_subject_rate_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    def copy_author_names(self):
+        self.author_first_name = self.author.first_name
+        self.author_last_name = self.author.last_name
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.copy_author_names()
+        super().save(*args, **kwargs)
+
+class UserDeletionJob(models.Model):
+    """
+    Background removal of a user and their announcements (api.tasks.delete_user_job).
+
+    ``user_id`` is a plain column, not a foreign key - the job outlives the user.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    user_id = models.IntegerField(db_index=True)
+    username = models.CharField(max_length=150)
+    requested_by = models.ForeignKey(SystemUser, null=True, on_delete=models.SET_NULL, related_name='+')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    total_announcements = models.IntegerField(default=0)
+    deleted_announcements = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f"Deletion of {self.username} ({self.status})"
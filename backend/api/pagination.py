@@ -0,0 +1,258 @@
+import base64
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import InvalidPage, Page
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .exceptions import ValidationErrorException
+
+
+class AnnouncementPageNumberPagination(PageNumberPagination):
+    """
+    Klasyczna paginacja ?page=N, z której korzysta obecne UI.
+    """
+    page_size = 10
+
+    async def apaginate_queryset(self, queryset, request):
+        """
+        Async counterpart of ``paginate_queryset`` using ``acount()`` and
+        ``async for``; produces the same page, links and errors.
+        """
+        paginator = self.django_paginator_class(queryset, self.page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        bottom = (number - 1) * self.page_size
+        rows = [row async for row in queryset[bottom:bottom + self.page_size]]
+        self.page = Page(rows, number, paginator)
+        self.request = request
+        return rows
+
+
+class KeysetPagination:
+    """
+    Keyset (cursor) pagination over a fixed, unique ordering.
+
+    Instead of ``OFFSET`` the next page is selected with a ``WHERE`` on the
+    ordering columns of the last row seen, so every page costs one index range
+    scan no matter how deep it is. The cursor is an opaque, url-safe token
+    encoding the position and the direction of travel.
+    """
+    ordering = ('-date_added', '-id')
+    page_size = 10
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'with_count'
+
+    def __init__(self, ordering=None, page_size=None, max_page_size=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        if page_size is not None:
+            self.page_size = page_size
+        if max_page_size is not None:
+            self.max_page_size = max_page_size
+
+    @classmethod
+    def is_requested(cls, request):
+        return cls.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request):
+        page_queryset = self.get_page_queryset(queryset, request)
+        if self.with_count:
+            self.count = approximate_count(queryset)
+        return self.paginate_rows(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request):
+        page_queryset = self.get_page_queryset(queryset, request)
+        if self.with_count:
+            self.count = await sync_to_async(approximate_count)(queryset)
+        return self.paginate_rows([row async for row in page_queryset])
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Return the (unevaluated) queryset for the requested page.
+
+        It fetches one row more than the page size, which tells
+        ``paginate_rows`` whether another page exists.
+        """
+        self.request = request
+        self.model = queryset.model
+        self.page_size = self.get_page_size(request)
+        self.position, self.reverse = self.decode_cursor(request)
+        self.with_count = request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes')
+        self.count = None
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(self._invert(field) for field in ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self._seek_filter(ordering, self.position))
+        return queryset.order_by(*ordering)[:self.page_size + 1]
+
+    def paginate_rows(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        self.next_position = self.previous_position = None
+        if rows:
+            if self.reverse:
+                self.next_position = self.get_position(rows[-1])
+                if has_more:
+                    self.previous_position = self.get_position(rows[0])
+            else:
+                if has_more:
+                    self.next_position = self.get_position(rows[-1])
+                if self.position is not None:
+                    self.previous_position = self.get_position(rows[0])
+        elif self.position is not None:
+            # Pusta strona (np. wszystko za kursorem usunięto) - pozwól wrócić.
+            if self.reverse:
+                self.next_position = self.position
+            else:
+                self.previous_position = self.position
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        payload = OrderedDict()
+        if self.with_count:
+            payload['count'] = self.count
+        payload['next'] = self.get_link(self.next_position, reverse=False)
+        payload['previous'] = self.get_link(self.previous_position, reverse=True)
+        payload['results'] = data
+        return payload
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_position(self, row):
+        names = [field.lstrip('-') for field in self.ordering]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    def get_link(self, position, reverse):
+        if position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position, reverse))
+
+    def encode_cursor(self, position, reverse):
+        token = {'p': [self._dump_value(value) for value in position]}
+        if reverse:
+            token['r'] = 1
+        raw = json.dumps(token, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param, '')
+        if not encoded:
+            return None, False
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            token = json.loads(raw.decode('utf-8'))
+            values = token['p']
+            if len(values) != len(self.ordering):
+                raise ValueError('Cursor does not match the ordering')
+            position = [
+                self.model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except Exception:
+            raise ValidationErrorException(detail="Invalid cursor")
+        return position, bool(token.get('r'))
+
+    @staticmethod
+    def _dump_value(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    @staticmethod
+    def _invert(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    @staticmethod
+    def _seek_filter(ordering, position):
+        """
+        Build ``(a, b, ...) > (x, y, ...)`` in the given ordering as a
+        disjunction of equality prefixes. The leading column also gets a
+        redundant inclusive bound so the planner can use it as an index range.
+        """
+        condition = Q()
+        equal_prefix = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal_prefix, **{f'{name}__{lookup}': value})
+            equal_prefix[name] = value
+        first = ordering[0]
+        bound = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{bound}': position[0]}) & condition
+
+
+def approximate_count(queryset):
+    """
+    Return the number of rows matched by ``queryset`` without running
+    ``COUNT(*)`` on every request.
+
+    Unfiltered counts on large PostgreSQL tables come from the planner's
+    ``reltuples`` estimate; anything else is counted exactly and cached for
+    ``PAGINATION_COUNT_CACHE_TIMEOUT`` seconds.
+    """
+    estimate = _estimated_table_count(queryset)
+    if estimate is not None:
+        return estimate
+
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.md5(f'{sql}|{params!r}'.encode('utf-8')).hexdigest()
+    key = f'pagination:count:{queryset.db}:{digest}'
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, getattr(settings, 'PAGINATION_COUNT_CACHE_TIMEOUT', 60))
+    return count
+
+
+def _estimated_table_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql' or queryset.query.where:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    threshold = getattr(settings, 'PAGINATION_ESTIMATE_THRESHOLD', 100000)
+    if row is None or row[0] < threshold:
+        return None
+    return row[0]
@@ -0,0 +1,250 @@
+"""
+On-demand profiling of single requests for staff users.
+
+A request carrying ``X-Profile: 1`` (or ``?profile=1``) from a staff user runs
+under cProfile, with every SQL statement and its duration captured. The
+profile is kept for ``PROFILING_TTL`` seconds and the response
+gets ``X-Profile-Id`` / ``X-Profile-Url`` headers pointing at
+``/api/profiles/<id>/`` (JSON summary, or ``?download=pstats`` for the raw
+stats to open in snakeviz / pstats). ``X-Profile: download`` returns the JSON
+profile as an attachment instead of the normal response.
+
+Requests without the flag only pay for one header lookup and a substring
+check of the query string. One request per process is profiled at a time;
+under ASGI cProfile only sees the event loop thread, the SQL log covers all
+threads.
+
+Profiles are written as files to ``PROFILING_DIR`` (``<id>.json`` summary and
+``<id>.prof`` stats), so any worker on the host can serve them; files older
+than ``PROFILING_TTL`` are treated as missing and removed when the next
+profile is stored.
+"""
+import cProfile
+import json
+import marshal
+import os
+import pstats
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+
+from .authentication import CachedJWTAuthentication
+
+MODES = ('1', 'download')
+TOP_FUNCTIONS = 50
+
+current_profile = ContextVar('api_profile', default=None)
+# Jeden profilowany request na proces - cProfile nie obsłuży dwóch naraz w jednym wątku.
+_profiler_lock = threading.Lock()
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = []
+        self.profiler = cProfile.Profile()
+
+    def record_query(self, sql, params, many, seconds):
+        if len(self.queries) < settings.PROFILING_MAX_QUERIES:
+            self.queries.append({
+                'sql': sql,
+                'params': repr(params)[:500],
+                'many': many,
+                'duration_ms': seconds * 1000,
+            })
+
+    def summary(self, profile_id, request, response, seconds):
+        stats = pstats.Stats(self.profiler)
+        functions = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+        return {
+            'id': profile_id,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'created_at': timezone.now().isoformat(),
+            'duration_ms': seconds * 1000,
+            'sql_count': len(self.queries),
+            'sql_ms': sum(query['duration_ms'] for query in self.queries),
+            'sql': self.queries,
+            'functions': [
+                {
+                    'function': f"{filename}:{line}({name})",
+                    'calls': calls,
+                    'primitive_calls': primitive_calls,
+                    'tottime_ms': tottime * 1000,
+                    'cumtime_ms': cumtime * 1000,
+                }
+                for (filename, line, name), (primitive_calls, calls, tottime, cumtime, _) in functions
+            ],
+        }
+
+    def pstats_dump(self):
+        # Ten sam format co Profile.dump_stats() - otwiera go pstats i snakeviz.
+        self.profiler.create_stats()
+        return marshal.dumps(self.profiler.stats)
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record_query(sql, params, many, time.perf_counter() - started)
+
+
+def install_sql_wrapper(sender, connection, **kwargs):
+    if sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_wrapper)
+
+
+def profile_paths(profile_id):
+    base = os.path.join(settings.PROFILING_DIR, profile_id)
+    return f'{base}.json', f'{base}.prof'
+
+
+def is_expired(path, now):
+    return os.path.getmtime(path) < now - settings.PROFILING_TTL
+
+
+def remove_expired_profiles():
+    now = time.time()
+    for name in os.listdir(settings.PROFILING_DIR):
+        path = os.path.join(settings.PROFILING_DIR, name)
+        try:
+            if is_expired(path, now):
+                os.remove(path)
+        except FileNotFoundError:
+            pass  # Usunięty w międzyczasie przez inny worker.
+
+
+def write_file(path, data):
+    # Zapis do pliku tymczasowego i rename - inny worker nie przeczyta połowy.
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as handle:
+        handle.write(data)
+    os.replace(temporary, path)
+
+
+def store_profile(summary, pstats_data):
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    remove_expired_profiles()
+    summary_path, pstats_path = profile_paths(summary['id'])
+    write_file(pstats_path, pstats_data)
+    write_file(summary_path, json.dumps(summary).encode('utf-8'))
+
+
+def load_profile(profile_id):
+    summary_path, pstats_path = profile_paths(profile_id)
+    try:
+        if is_expired(summary_path, time.time()):
+            return None
+        with open(summary_path, 'rb') as handle:
+            summary = json.load(handle)
+        with open(pstats_path, 'rb') as handle:
+            pstats_data = handle.read()
+    except FileNotFoundError:
+        return None
+    return {'summary': summary, 'pstats': pstats_data}
+
+
+def requested_mode(request):
+    mode = request.META.get('HTTP_X_PROFILE')
+    if mode is None and 'profile=' in request.META.get('QUERY_STRING', ''):
+        mode = request.GET.get('profile')
+    return mode if mode in MODES else None
+
+
+def is_staff(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    # Uwierzytelnianie JWT robi dopiero DRF w widoku - tutaj sprawdzamy token sami.
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return result is not None and result[0].is_staff
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        mode = requested_mode(request)
+        if mode is None or not is_staff(request) or not _profiler_lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            profile = RequestProfile()
+            token = current_profile.set(profile)
+            started = time.perf_counter()
+            try:
+                profile.profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profile.profiler.disable()
+            finally:
+                current_profile.reset(token)
+            return self.finish(request, response, profile, mode, time.perf_counter() - started)
+        finally:
+            _profiler_lock.release()
+
+    async def __acall__(self, request):
+        mode = requested_mode(request)
+        if mode is None or not await sync_to_async(is_staff)(request) or not _profiler_lock.acquire(blocking=False):
+            return await self.get_response(request)
+        try:
+            profile = RequestProfile()
+            token = current_profile.set(profile)
+            started = time.perf_counter()
+            try:
+                profile.profiler.enable()
+                try:
+                    response = await self.get_response(request)
+                finally:
+                    profile.profiler.disable()
+            finally:
+                current_profile.reset(token)
+            return self.finish(request, response, profile, mode, time.perf_counter() - started)
+        finally:
+            _profiler_lock.release()
+
+    @staticmethod
+    def finish(request, response, profile, mode, seconds):
+        profile_id = uuid.uuid4().hex
+        summary = profile.summary(profile_id, request, response, seconds)
+        if mode == 'download':
+            download = JsonResponse(summary)
+            download['Content-Disposition'] = f'attachment; filename="profile-{profile_id}.json"'
+            return download
+        store_profile(summary, profile.pstats_dump())
+        response['X-Profile-Id'] = profile_id
+        response['X-Profile-Url'] = reverse('request_profile', args=[profile_id])
+        return response
+
+
+def pstats_response(profile_id, data):
+    response = HttpResponse(data, content_type='application/octet-stream')
+    response['Content-Disposition'] = f'attachment; filename="profile-{profile_id}.prof"'
+    return response
@@ -0,0 +1,42 @@
+import time
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .metrics import record_render
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson jest opcjonalny
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` backed by orjson when it is installed.
+
+    The output is byte-for-byte what the stock renderer produces for the
+    compact, non-indented case: values orjson would format differently
+    (datetimes, Decimal, lazy strings, ...) go through DRF's ``JSONEncoder``,
+    and U+2028/U+2029 are escaped the same way. Anything orjson rejects
+    (e.g. integers beyond 64 bits) falls back to the stock renderer.
+    """
+    _options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS if orjson else 0
+    _default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        started = time.perf_counter()
+        try:
+            return self._render(data, accepted_media_type, renderer_context)
+        finally:
+            record_render(time.perf_counter() - started)
+
+    def _render(self, data, accepted_media_type, renderer_context):
+        if (orjson is None or data is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self._default, option=self._options)
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
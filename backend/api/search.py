@@ -0,0 +1,131 @@
+"""
+Full-text search over announcements.
+
+On PostgreSQL every announcement keeps a weighted ``tsvector`` in
+``search_vector`` (subject weighted 'A', content 'B'), maintained by a
+``BEFORE INSERT OR UPDATE`` trigger so bulk writes stay in sync too, and
+indexed with GIN. The document is built with every configuration from
+``SEARCH_CONFIGS`` that exists in the database, so English stemming,
+Polish stemming (once a ``polish`` configuration is installed) and plain
+lower-cased words all match. Other databases fall back to ``icontains`` over
+subject and content.
+"""
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection as default_connection, connections
+from django.db.models import F, Q
+
+from .models import Announcement
+
+TRIGGER_NAME = 'api_announcement_search_vector_trigger'
+FUNCTION_NAME = 'api_announcement_search_vector_update'
+
+_available_configs = {}
+
+
+def get_search_configs(connection=None):
+    """
+    Return the configured text search configurations that exist in the
+    database, in the order given by ``SEARCH_CONFIGS``.
+    """
+    connection = connection or default_connection
+    if connection.vendor != 'postgresql':
+        return []
+    if connection.alias not in _available_configs:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT cfgname FROM pg_ts_config")
+            existing = {row[0] for row in cursor.fetchall()}
+        configs = [config for config in settings.SEARCH_CONFIGS if config in existing]
+        _available_configs[connection.alias] = configs or ['simple']
+    return _available_configs[connection.alias]
+
+
+def search_document_sql(configs, prefix=''):
+    parts = []
+    for column, weight in (('subject', 'A'), ('content', 'B')):
+        for config in configs:
+            parts.append(
+                f"setweight(to_tsvector('{config}'::regconfig, coalesce({prefix}{column}, '')), '{weight}')"
+            )
+    return ' || '.join(parts)
+
+
+def install_search_trigger(connection):
+    """
+    (Re)create the trigger that keeps ``search_vector`` in sync and recompute
+    the column for existing rows.
+    """
+    _available_configs.pop(connection.alias, None)
+    configs = get_search_configs(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {FUNCTION_NAME}() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := {search_document_sql(configs, prefix='NEW.')};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        cursor.execute(f"DROP TRIGGER IF EXISTS {TRIGGER_NAME} ON api_announcement")
+        cursor.execute(f"""
+            CREATE TRIGGER {TRIGGER_NAME}
+            BEFORE INSERT OR UPDATE OF subject, content ON api_announcement
+            FOR EACH ROW EXECUTE FUNCTION {FUNCTION_NAME}()
+        """)
+        cursor.execute(f"UPDATE api_announcement SET search_vector = {search_document_sql(configs)}")
+
+
+def drop_search_trigger(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {TRIGGER_NAME} ON api_announcement")
+        cursor.execute(f"DROP FUNCTION IF EXISTS {FUNCTION_NAME}()")
+
+
+def build_search_query(text, configs):
+    query = None
+    for config in configs:
+        part = SearchQuery(text, config=config, search_type='websearch')
+        query = part if query is None else query | part
+    return query
+
+
+def full_text_search(queryset, text):
+    """
+    Filter ``queryset`` to announcements matching ``text``. On PostgreSQL the
+    rows are annotated with ``rank`` for ``order_by_rank``.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.filter(Q(subject__icontains=text) | Q(content__icontains=text))
+
+    query = build_search_query(text, get_search_configs(connection))
+    return queryset.filter(search_vector=query).annotate(rank=SearchRank(F('search_vector'), query))
+
+
+def order_by_rank(queryset):
+    if 'rank' not in queryset.query.annotations:
+        return queryset
+    return queryset.order_by('-rank', '-date_added', '-id')
+
+
+def filter_announcements(query_params):
+    """
+    Apply the search filters (q, subject, min_rate, max_rate) from the query string.
+    """
+    text = query_params.get('q', None)
+    subject = query_params.get('subject', None)
+    min_rate = query_params.get('min_rate', None)
+    max_rate = query_params.get('max_rate', None)
+
+    announcements = Announcement.objects.all()
+
+    if text:
+        announcements = full_text_search(announcements, text)
+    if subject:
+        announcements = announcements.filter(subject__icontains=subject)
+    if min_rate:
+        announcements = announcements.filter(hourly_rate__gte=min_rate)
+    if max_rate:
+        announcements = announcements.filter(hourly_rate__lte=max_rate)
+
+    return announcements.order_by('-date_added', '-id')
@@ -1,5 +1,47 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from .models import SystemUser, Announcement
+from .models import SystemUser, Announcement, UserDeletionJob
+
+
+UNIQUE_VIOLATION_MESSAGES = {
+    'email': "Email already exists",
+    'username': "A user with that username already exists.",
+}
+
+
+def violated_unique_field(error):
+    """
+    Name of the ``SystemUser`` field whose unique constraint ``error`` reports,
+    or None. Decided by the constraint name (PostgreSQL) or the column named by
+    SQLite - never by the message text, which also contains the duplicate value.
+    """
+    table = SystemUser._meta.db_table
+    constraint = getattr(getattr(error.__cause__, 'diag', None), 'constraint_name', None)
+    message = str(error).strip()
+    for field in SystemUser._meta.concrete_fields:
+        if not field.unique or field.primary_key:
+            continue
+        if constraint is not None:
+            # <tabela>_<kolumna>_key z CREATE TABLE albo <tabela>_<kolumna>_<hash>_uniq z AlterField.
+            prefix = f'{table}_{field.column}_'
+            if constraint == f'{prefix}key' or (
+                    constraint.startswith(prefix) and constraint.endswith('_uniq')
+                    and len(constraint) == len(prefix) + len('12345678_uniq')):
+                return field.name
+        elif message == f'UNIQUE constraint failed: {table}.{field.column}':
+            return field.name
+    return None
+
+
+def unique_violation_errors(error):
+    """
+    Map a unique constraint violation on ``SystemUser`` to field errors.
+    """
+    field = violated_unique_field(error)
+    if field in UNIQUE_VIOLATION_MESSAGES:
+        return {field: [UNIQUE_VIOLATION_MESSAGES[field]]}
+    return {'non_field_errors': ["User already exists"]}
+
 
 class SystemUserSerializer(serializers.ModelSerializer):
 
@@ -20,20 +62,20 @@ class RegisterSerializer(serializers.ModelSerializer):
         model = SystemUser
         fields = ['username', 'email', 'password', 'first_name', 'last_name', 'phone_number']
 
-    def validate_email(self, value):
-        if SystemUser.objects.filter(email=value).exists():
-            raise serializers.ValidationError("Email already exists")
-        return value
-
     def create(self, validated_data):
-        user = SystemUser.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data['email'],
-            password=validated_data['password'],
-            first_name=validated_data['first_name'],
-            last_name=validated_data['last_name'],
-            phone_number=validated_data.get('phone_number', '')
-        )
+        # Unikalność sprawdza baza (jedno zapytanie, bez wyścigu między exists() a INSERT).
+        try:
+            with transaction.atomic():
+                user = SystemUser.objects.create_user(
+                    username=validated_data['username'],
+                    email=validated_data['email'],
+                    password=validated_data['password'],
+                    first_name=validated_data['first_name'],
+                    last_name=validated_data['last_name'],
+                    phone_number=validated_data.get('phone_number', '')
+                )
+        except IntegrityError as e:
+            raise serializers.ValidationError(unique_violation_errors(e))
         return user
     
 class AnnouncementSerializer(serializers.ModelSerializer):
@@ -41,4 +83,33 @@ class AnnouncementSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Announcement
-        fields = ['id', 'subject', 'content', 'hourly_rate', 'author', 'date_added']
\ No newline at end of file
+        fields = ['id', 'subject', 'content', 'hourly_rate', 'author', 'date_added']
+
+
+class PublicAuthorSerializer(serializers.Serializer):
+    """
+    Author as shown on public listings - without contact details or staff flag.
+
+    Read from the announcement's own denormalized columns (``source='*'``),
+    so public listings do not join the user table.
+    """
+    id = serializers.IntegerField(source='author_id', read_only=True)
+    first_name = serializers.CharField(source='author_first_name', read_only=True)
+    last_name = serializers.CharField(source='author_last_name', read_only=True)
+
+
+class PublicAnnouncementSerializer(AnnouncementSerializer):
+    author = PublicAuthorSerializer(source='*', read_only=True)
+
+    class Meta(AnnouncementSerializer.Meta):
+        pass
+
+
+class UserDeletionJobSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = UserDeletionJob
+        fields = [
+            'id', 'user_id', 'username', 'status', 'total_announcements',
+            'deleted_announcements', 'error', 'created_at', 'updated_at',
+        ]
@@ -0,0 +1,59 @@
+import csv
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def iter_ndjson(queryset, serializer_class, chunk_size=None):
+    """
+    Yield one JSON document per row, reading the queryset in chunks so the
+    whole result never sits in memory (server-side cursor on PostgreSQL).
+    """
+    chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+    for instance in queryset.iterator(chunk_size=chunk_size):
+        data = serializer_class(instance).data
+        yield json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+async def aiter_ndjson(queryset, serializer_class, chunk_size=None):
+    chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+    async for instance in queryset.aiterator(chunk_size=chunk_size):
+        data = serializer_class(instance).data
+        yield json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def ndjson_response(queryset, serializer_class, filename=None, chunk_size=None, asynchronous=False):
+    iterate = aiter_ndjson if asynchronous else iter_ndjson
+    response = StreamingHttpResponse(
+        iterate(queryset, serializer_class, chunk_size),
+        content_type='application/x-ndjson',
+    )
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+class Echo:
+    """
+    File-like object whose ``write`` returns the value, for ``csv.writer``.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset, fields, chunk_size=None):
+    chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in queryset.values_list(*fields).iterator(chunk_size=chunk_size):
+        yield writer.writerow(row)
+
+
+def csv_response(queryset, fields, filename=None, chunk_size=None):
+    response = StreamingHttpResponse(iter_csv(queryset, fields, chunk_size), content_type='text/csv; charset=utf-8')
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
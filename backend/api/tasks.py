@@ -1,8 +1,199 @@
+import logging
+import threading
+
 from celery import shared_task
-import time
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection
+
+from .cache import invalidate_announcements, invalidate_user
+from .models import Announcement, SystemUser, UserDeletionJob
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationBatch:
+    """
+    Messages flushed together. ``wait()`` blocks until the batch was handed to
+    the mail connection and re-raises the delivery error, if any.
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.error = None
+        self._done = threading.Event()
+
+    def finish(self, error=None):
+        self.error = error
+        self._done.set()
+
+    def wait(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Notification batch not delivered within {timeout} s")
+        if self.error is not None:
+            raise self.error
+
+
+class NotificationBatcher:
+    """
+    Buffers notification e-mails inside a worker process and delivers them in
+    batches over a single reused mail connection.
+
+    A batch is flushed when it reaches ``batch_size`` messages or when the
+    oldest buffered message has waited ``max_wait`` seconds, whichever comes
+    first. ``add`` returns the batch the message landed in, so the task that
+    produced it can wait for delivery before it is acknowledged. A failed
+    batch is logged and its error handed to the waiting tasks, which are
+    retried by Celery - the messages are not kept in memory.
+    """
+
+    def __init__(self, batch_size=None, max_wait=None):
+        self.batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+        self.max_wait = settings.NOTIFICATION_BATCH_MAX_WAIT if max_wait is None else max_wait
+        self._batch = NotificationBatch()
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def add(self, message):
+        with self._lock:
+            batch = self._batch
+            batch.messages.append(message)
+            full = len(batch.messages) >= self.batch_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.max_wait, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+        return batch
+
+    def flush(self):
+        with self._lock:
+            batch, self._batch = self._batch, NotificationBatch()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not batch.messages:
+            batch.finish()
+            return 0
+        try:
+            sent = deliver(batch.messages)
+        except Exception as e:
+            recipients = ', '.join(address for message in batch.messages for address in message.to)
+            logger.exception("Delivery of %d notification(s) failed: %s", len(batch.messages), recipients)
+            batch.finish(e)
+            return 0
+        batch.finish()
+        return sent
+
+
+def build_notification(email, message):
+    return EmailMessage(
+        subject=settings.NOTIFICATION_SUBJECT,
+        body=message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email],
+    )
 
-@shared_task(queue='notifications')
+
+def deliver(messages):
+    """
+    Send ``messages`` over one connection (one SMTP session for the batch).
+    """
+    connection = get_connection()
+    return connection.send_messages(messages) or 0
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher():
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = NotificationBatcher()
+        return _batcher
+
+
+@worker_process_shutdown.connect
+def flush_notifications(**kwargs):
+    if _batcher is not None:
+        _batcher.flush()
+
+
+# acks_late: wiadomość z kolejki jest potwierdzana dopiero po wysłaniu e-maila,
+# więc awaria workera albo SMTP kończy się ponownym dostarczeniem zadania.
+@shared_task(
+    queue='notifications', acks_late=True, reject_on_worker_lost=True,
+    autoretry_for=(Exception,), retry_backoff=True, max_retries=5,
+)
 def send_notification(email, message):
-    print(f"Sending notification to {email}: {message}")
-    time.sleep(2)
-    return f"Notification sent to {email}"
\ No newline at end of file
+    get_batcher().add(build_notification(email, message)).wait()
+    return f"Notification sent to {email}"
+
+
+@shared_task(
+    queue='notifications', acks_late=True, reject_on_worker_lost=True,
+    autoretry_for=(Exception,), retry_backoff=True, max_retries=5,
+)
+def send_notification_batch(notifications):
+    """
+    Deliver a list of ``(email, message)`` pairs that the caller already
+    grouped, e.g. bulk user imports.
+    """
+    sent = deliver([build_notification(email, message) for email, message in notifications])
+    return f"{sent} notifications sent"
+
+
+def delete_announcements_chunk(user_id, chunk_size):
+    """
+    Delete up to ``chunk_size`` announcements of ``user_id`` with one
+    set-based statement (no collector, no per-row signals) in its own
+    short transaction. Returns the ids of the deleted rows.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "DELETE FROM api_announcement WHERE id IN "
+            "(SELECT id FROM api_announcement WHERE author_id = %s LIMIT %s) RETURNING id",
+            [user_id, chunk_size],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+@shared_task(queue='maintenance')
+def delete_user_job(job_id):
+    """
+    Remove the announcements of a (deactivated) user in chunks of
+    ``USER_DELETION_CHUNK_SIZE``, then the user row itself.
+    """
+    job = UserDeletionJob.objects.get(pk=job_id)
+    if job.status == UserDeletionJob.DONE:
+        return f"Job {job_id} already done"
+    job.status = UserDeletionJob.RUNNING
+    job.total_announcements = job.deleted_announcements + Announcement.objects.filter(author_id=job.user_id).count()
+    job.save(update_fields=['status', 'total_announcements', 'updated_at'])
+
+    chunk_size = settings.USER_DELETION_CHUNK_SIZE
+    try:
+        while True:
+            deleted = delete_announcements_chunk(job.user_id, chunk_size)
+            if deleted:
+                job.deleted_announcements += len(deleted)
+                job.save(update_fields=['deleted_announcements', 'updated_at'])
+                # Lista i szczegóły usuniętych ogłoszeń - bez czekania na koniec zadania.
+                invalidate_announcements(*deleted)
+            if len(deleted) < chunk_size:
+                break
+        # Zostały tylko wiersze M2M (grupy, uprawnienia) - usuwa je kolektor.
+        SystemUser.objects.filter(pk=job.user_id).delete()
+        invalidate_user(job.user_id)
+    except Exception as e:
+        job.status = UserDeletionJob.FAILED
+        job.error = str(e)
+        job.save(update_fields=['status', 'error', 'updated_at'])
+        raise
+    job.status = UserDeletionJob.DONE
+    job.save(update_fields=['status', 'updated_at'])
+    return f"Deleted user {job.user_id} and {job.deleted_announcements} announcements"
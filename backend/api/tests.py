@@ -1,7 +1,41 @@
-from rest_framework.test import APITestCase, APIClient
-from rest_framework import status
+import json
+import os
+import pstats
+import tempfile
+import threading
+import zlib
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail import get_connection
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, IntegrityError, connection
+from django.db.models import QuerySet
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase, APITransactionTestCase, APIClient
+from rest_framework import serializers, status
+from rest_framework.renderers import JSONRenderer
 from .models import SystemUser, Announcement
+from .fastpath import RowMapper, serialize_rows, values_for
+from .renderers import FastJSONRenderer
+from .serializers import AnnouncementSerializer, PublicAnnouncementSerializer, unique_violation_errors
+from .tasks import NotificationBatcher, build_notification, send_notification, send_notification_batch
+from . import async_views, cache as api_cache, compression, login as login_module, metrics, tasks, warmup
+from .benchmarks import routes as benchmark_routes
+from .db import pool as db_pool
+from .db.pool import ConnectionPool, PoolTimeout
+from .db.postgresql_pool.base import DatabaseWrapper as PooledDatabaseWrapper
 from rest_framework_simplejwt.tokens import RefreshToken
+from prometheus_client import REGISTRY, Counter, values
 
 def generate_token(user):
     refresh = RefreshToken.for_user(user)
@@ -156,4 +190,1686 @@ class DeleteAnnouncementTestCase(APITestCase):
     def test_delete_announcement_not_found(self):
         self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
         response = self.client.delete("/api/announcements/delete/999/")
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+class AnnouncementCursorPaginationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = SystemUser.objects.create_user(
+            username="testuser",
+            email="testuser@example.com",
+            password="password123"
+        )
+        for i in range(25):
+            Announcement.objects.create(
+                subject=f"Subject {i}",
+                content="Content",
+                hourly_rate=50.00,
+                author=self.user
+            )
+        # Część ogłoszeń z identyczną datą - kolejność rozstrzyga id.
+        Announcement.objects.filter(subject__in=["Subject 10", "Subject 11", "Subject 12"]).update(
+            date_added=timezone.now()
+        )
+        self.expected = list(
+            Announcement.objects.order_by("-date_added", "-id").values_list("id", flat=True)
+        )
+
+    def test_cursor_walks_all_pages_forward_and_back(self):
+        response = self.client.get("/api/announcements/?cursor=")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["previous"])
+        self.assertNotIn("count", response.data)
+
+        seen, pages = [], []
+        while True:
+            pages.append(response)
+            seen.extend(item["id"] for item in response.data["results"])
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(pages), 3)
+
+        response = self.client.get(pages[-1].data["previous"])
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            [item["id"] for item in pages[1].data["results"]],
+        )
+
+    def test_cursor_with_count_and_page_size(self):
+        response = self.client.get("/api/announcements/?cursor=&page_size=5&with_count=true")
+        self.assertEqual(response.data["count"], 25)
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/announcements/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("error", response.data)
+
+    def test_page_number_mode_still_works(self):
+        response = self.client.get("/api/announcements/?page=2")
+        self.assertEqual(response.data["count"], 25)
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]],
+            self.expected[10:20],
+        )
+
+class SearchAnnouncementsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = SystemUser.objects.create_user(
+            username="testuser",
+            email="testuser@example.com",
+            password="password123"
+        )
+        for i in range(6):
+            Announcement.objects.create(
+                subject="Math Tutoring" if i % 2 else "Physics Tutoring",
+                content="Learn with me!",
+                hourly_rate=40 + i * 10,
+                author=self.user
+            )
+
+    def test_search_filters(self):
+        response = self.client.get("/api/announcements/search/", {"subject": "math", "min_rate": 60})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["hourly_rate"] for item in response.data], ["90.00", "70.00"])
+
+    @override_settings(SEARCH_MAX_RESULTS=4)
+    def test_search_is_capped(self):
+        response = self.client.get("/api/announcements/search/", {"min_rate": 0})
+        self.assertEqual(len(response.data), 4)
+        self.assertEqual(response["X-Results-Truncated"], "true")
+
+    def test_search_cursor_pagination(self):
+        response = self.client.get("/api/announcements/search/", {"cursor": "", "page_size": 4, "subject": "tutoring"})
+        self.assertEqual(len(response.data["results"]), 4)
+        response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNone(response.data["next"])
+
+    def test_search_stream_ndjson(self):
+        response = self.client.get("/api/announcements/search/", {"stream": "ndjson", "max_rate": 60})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["hourly_rate"] for line in lines], ["60.00", "50.00", "40.00"])
+
+    def test_search_unknown_stream_format(self):
+        response = self.client.get("/api/announcements/search/", {"stream": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class SearchFacetsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = SystemUser.objects.create_user(
+            username="testuser",
+            email="testuser@example.com",
+            password="password123"
+        )
+        for i in range(6):
+            Announcement.objects.create(
+                subject="Math Tutoring" if i % 2 else "Physics Tutoring",
+                content="Learn with me!",
+                hourly_rate=40 + i * 10,
+                author=self.user
+            )
+
+    def test_facets_in_one_grouped_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/announcements/facets/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total"], 6)
+        self.assertEqual(response.data["subjects"], [
+            {"subject": "Math Tutoring", "count": 3},
+            {"subject": "Physics Tutoring", "count": 3},
+        ])
+        self.assertEqual(response.data["other_subjects"], 0)
+        self.assertEqual([band["count"] for band in response.data["hourly_rate"]], [0, 1, 3, 2, 0, 0, 0])
+        self.assertEqual(response.data["hourly_rate"][1], {"min": "25.00", "max": "50.00", "count": 1})
+        self.assertEqual(response.data["hourly_rate"][-1], {"min": "200.00", "max": None, "count": 0})
+
+    def test_facets_follow_filters(self):
+        response = self.client.get("/api/announcements/facets/", {"subject": "math", "min_rate": 60, "top": 1})
+        self.assertEqual(response.data["total"], 2)
+        self.assertEqual(response.data["subjects"], [{"subject": "Math Tutoring", "count": 2}])
+        response = self.client.get("/api/announcements/facets/", {"q": "learn", "top": 1})
+        self.assertEqual(response.data["subjects"], [{"subject": "Math Tutoring", "count": 3}])
+        self.assertEqual(response.data["other_subjects"], 1)
+
+    def test_facets_cached_until_announcements_change(self):
+        response = self.client.get("/api/announcements/facets/")
+        with self.assertNumQueries(0):
+            cached = self.client.get("/api/announcements/facets/?unrelated=1")
+        self.assertEqual(cached.data, response.data)
+        self.assertEqual(
+            self.client.get("/api/announcements/facets/", HTTP_IF_NONE_MATCH=response["ETag"]).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.user)}")
+        self.client.post("/api/announcements/add/", {
+            "subject": "Chemistry", "content": "Learn!", "hourly_rate": "180.00",
+        }, format="json")
+        response = self.client.get("/api/announcements/facets/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total"], 7)
+        self.assertEqual(response.data["hourly_rate"][5]["count"], 1)
+
+    def test_invalid_parameters(self):
+        for params in ({"top": "x"}, {"top": 0}, {"min_rate": "abc"}):
+            response = self.client.get("/api/announcements/facets/", params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+class FullTextSearchTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = SystemUser.objects.create_user(
+            username="testuser",
+            email="testuser@example.com",
+            password="password123"
+        )
+        self.in_content = Announcement.objects.create(
+            subject="Physics Tutoring",
+            content="We also cover algebra for exams.",
+            hourly_rate=60.00,
+            author=self.user
+        )
+        self.in_subject = Announcement.objects.create(
+            subject="Algebra lessons",
+            content="Weekly lessons for high school students.",
+            hourly_rate=50.00,
+            author=self.user
+        )
+        Announcement.objects.create(
+            subject="Chemistry",
+            content="Laboratory basics.",
+            hourly_rate=40.00,
+            author=self.user
+        )
+
+    def test_query_matches_subject_and_content(self):
+        response = self.client.get("/api/announcements/search/", {"q": "algebra"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {item["id"] for item in response.data},
+            {self.in_content.id, self.in_subject.id},
+        )
+
+    def test_query_combines_with_rate_filters(self):
+        response = self.client.get("/api/announcements/search/", {"q": "algebra", "max_rate": 55})
+        self.assertEqual([item["id"] for item in response.data], [self.in_subject.id])
+
+    @skipUnless(connection.vendor == "postgresql", "tsvector ranking requires PostgreSQL")
+    def test_subject_matches_rank_first(self):
+        response = self.client.get("/api/announcements/search/", {"q": "algebra"})
+        self.assertEqual(
+            [item["id"] for item in response.data],
+            [self.in_subject.id, self.in_content.id],
+        )
+
+class ExplainSearchCommandTestCase(APITestCase):
+    def test_prints_plan_for_every_shape(self):
+        out = StringIO()
+        call_command("explain_search", stdout=out)
+        self.assertIn("subject + rate range", out.getvalue())
+        self.assertIn("full-text", out.getvalue())
+
+class AnnouncementAuthorQueriesTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(4):
+            author = SystemUser.objects.create_user(
+                username=f"tutor{i}",
+                email=f"tutor{i}@example.com",
+                password="password123",
+                first_name="Tutor",
+                last_name=str(i),
+                phone_number="123456789"
+            )
+            for _ in range(3):
+                Announcement.objects.create(
+                    subject="Math Tutoring",
+                    content="Learn math with me!",
+                    hourly_rate=50.00,
+                    author=author
+                )
+        self.announcement = Announcement.objects.first()
+
+    def test_list_fetches_authors_in_one_join(self):
+        # Przy pustym cache: COUNT(*) + strona z autorami (ETag bez zapytania)
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/announcements/")
+        self.assertEqual(len(response.data["results"]), 10)
+        with self.assertNumQueries(1):
+            self.client.get("/api/announcements/?cursor=")
+
+    def test_search_fetches_authors_in_one_join(self):
+        with self.assertNumQueries(1):  # wyniki z autorami
+            response = self.client.get("/api/announcements/search/", {"subject": "math"})
+        self.assertEqual(len(response.data), 12)
+
+    def test_detail_fetches_author_in_one_join(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.announcement.author)}")
+        # Przy pustym cache: użytkownik z tokena, updated_at/autor dla walidatora,
+        # id autora dla klucza cache + ogłoszenie razem z autorem
+        with self.assertNumQueries(4):
+            response = self.client.get(f"/api/announcements/{self.announcement.id}/?author_fields=full")
+        self.assertIn("email", response.data["author"])
+
+    def test_contact_details_require_opt_in_and_authentication(self):
+        url = f"/api/announcements/{self.announcement.id}/"
+        response = self.client.get(url)
+        self.assertEqual(set(response.data["author"]), {"id", "first_name", "last_name"})
+        response = self.client.get("/api/announcements/")
+        self.assertNotIn("email", response.data["results"][0]["author"])
+
+        for path in (url, "/api/announcements/", "/api/announcements/search/"):
+            response = self.client.get(path, {"author_fields": "full"})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED, path)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.announcement.author)}")
+        response = self.client.get(url)
+        self.assertNotIn("email", response.data["author"])
+        response = self.client.get(url, {"author_fields": "full"})
+        self.assertEqual(response.data["author"]["email"], self.announcement.author.email)
+
+    def test_public_author_fields(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/announcements/search/", {"author_fields": "public"})
+        self.assertEqual(set(response.data[0]["author"]), {"id", "first_name", "last_name"})
+        response = self.client.get(f"/api/announcements/{self.announcement.id}/?author_fields=public")
+        self.assertEqual(set(response.data["author"]), {"id", "first_name", "last_name"})
+
+    def test_public_listings_do_not_join_users(self):
+        with CaptureQueriesContext(connection) as queries:
+            listing = self.client.get("/api/announcements/?cursor=&author_fields=public")
+            search = self.client.get("/api/announcements/search/", {"subject": "math", "author_fields": "public"})
+            detail = self.client.get(f"/api/announcements/{self.announcement.id}/?author_fields=public")
+        self.assertFalse([query["sql"] for query in queries if "api_systemuser" in query["sql"]])
+        author = self.announcement.author
+        expected = {"id": author.id, "first_name": "Tutor", "last_name": author.last_name}
+        self.assertEqual(detail.data["author"], expected)
+        self.assertIn(expected, [item["author"] for item in listing.data["results"] + search.data])
+
+class AuthorNameDenormalizationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = SystemUser.objects.create_user(
+            username="testuser",
+            email="testuser@example.com",
+            password="password123",
+            first_name="Anna",
+            last_name="Nowak"
+        )
+        self.other = SystemUser.objects.create_user(
+            username="other",
+            email="other@example.com",
+            password="password123",
+            first_name="Jan"
+        )
+        self.announcements = [
+            Announcement.objects.create(subject=f"Math {i}", content="Learn!", hourly_rate=40, author=self.user)
+            for i in range(3)
+        ]
+        self.foreign = Announcement.objects.create(subject="Physics", content="Learn!", hourly_rate=60, author=self.other)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.user)}")
+
+    def names(self, announcement):
+        announcement.refresh_from_db()
+        return announcement.author_first_name, announcement.author_last_name
+
+    def test_names_copied_on_create(self):
+        self.assertEqual(self.names(self.announcements[0]), ("Anna", "Nowak"))
+        response = self.client.post("/api/announcements/batch/", {"operations": [
+            {"op": "create", "data": {"subject": "Chemistry", "content": "Learn!", "hourly_rate": "45.00"}},
+        ]}, format="json")
+        created = Announcement.objects.get(pk=response.data["results"][0]["id"])
+        self.assertEqual(self.names(created), ("Anna", "Nowak"))
+
+    def test_edit_user_rewrites_names_in_one_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.put("/api/user/edit/", {"last_name": "Kowalska"})
+        updates = [query["sql"] for query in queries if query["sql"].startswith('UPDATE "api_announcement"')]
+        self.assertEqual(len(updates), 1)
+        for announcement in self.announcements:
+            self.assertEqual(self.names(announcement), ("Anna", "Kowalska"))
+        self.assertEqual(self.names(self.foreign), ("Jan", ""))
+        response = self.client.get("/api/announcements/search/", {"subject": "math", "author_fields": "public"})
+        self.assertEqual({item["author"]["last_name"] for item in response.data}, {"Kowalska"})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.put("/api/user/edit/", {"phone_number": "123456789"})
+        self.assertFalse([query for query in queries if query["sql"].startswith('UPDATE "api_announcement"')])
+
+    def test_check_author_names_command(self):
+        out = StringIO()
+        call_command("check_author_names", stdout=out)
+        self.assertIn("consistent", out.getvalue())
+
+        SystemUser.objects.filter(pk=self.user.pk).update(first_name="Maria")
+        self.client.get("/api/announcements/search/", {"author_fields": "public"})
+        with self.assertRaises(CommandError):
+            call_command("check_author_names", stdout=StringIO())
+        out = StringIO()
+        call_command("check_author_names", "--fix", "--batch-size", "2", stdout=out)
+        self.assertIn("Repaired 3", out.getvalue())
+        self.assertEqual(self.names(self.announcements[2]), ("Maria", "Nowak"))
+        self.assertEqual(Announcement.objects.author_name_drift().count(), 0)
+        response = self.client.get("/api/announcements/search/", {"author_fields": "public"})
+        self.assertEqual({item["author"]["first_name"] for item in response.data}, {"Maria", "Jan"})
+
+class EditUserTestCase(APITestCase):
+    def setUp(self):
+        self.user = SystemUser.objects.create_user(
+            username="testuser",
+            email="testuser@example.com",
+            password="password123"
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.user)}")
+
+    def edit_queries(self, data):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put("/api/user/edit/", data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_edit_user_updates_profile(self):
+        response = self.client.put("/api/user/edit/", {"first_name": "Anna"})
+        self.assertEqual(response.data["first_name"], "Anna")
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, "Anna")
+
+    def test_query_count_does_not_depend_on_announcements(self):
+        without_announcements = self.edit_queries({"first_name": "Anna"})
+        Announcement.objects.bulk_create([
+            Announcement(subject="Math", content="Learn math", hourly_rate=50, author=self.user)
+            for _ in range(30)
+        ])
+        self.assertEqual(self.edit_queries({"first_name": "Maria"}), without_announcements)
+
+class AnnouncementCacheTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = SystemUser.objects.create_user(
+            username="testuser",
+            email="testuser@example.com",
+            password="password123",
+            first_name="Anna"
+        )
+        self.token = generate_token(self.user)
+        self.announcement = Announcement.objects.create(
+            subject="Math Tutoring",
+            content="Learn math with me!",
+            hourly_rate=50.00,
+            author=self.user
+        )
+
+    def test_hits_do_not_query_the_database(self):
+        self.client.get("/api/announcements/")
+        self.client.get(f"/api/announcements/{self.announcement.id}/")
+        with self.assertNumQueries(0):
+            self.client.get("/api/announcements/")
+            self.client.get(f"/api/announcements/{self.announcement.id}/")
+
+    def test_edit_announcement_invalidates_detail_and_list(self):
+        self.client.get("/api/announcements/")
+        self.client.get(f"/api/announcements/{self.announcement.id}/")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.client.put(f"/api/announcements/edit/{self.announcement.id}/", {"subject": "Algebra"})
+        self.client.credentials()
+        response = self.client.get(f"/api/announcements/{self.announcement.id}/")
+        self.assertEqual(response.data["subject"], "Algebra")
+        response = self.client.get("/api/announcements/")
+        self.assertEqual(response.data["results"][0]["subject"], "Algebra")
+
+    def test_add_and_delete_invalidate_list(self):
+        self.client.get("/api/announcements/")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.client.post("/api/announcements/add/", {"subject": "Physics", "content": "Physics", "hourly_rate": 60})
+        self.client.credentials()
+        self.assertEqual(self.client.get("/api/announcements/").data["count"], 2)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.client.delete(f"/api/announcements/delete/{self.announcement.id}/")
+        self.client.credentials()
+        self.assertEqual(self.client.get("/api/announcements/").data["count"], 1)
+        response = self.client.get(f"/api/announcements/{self.announcement.id}/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_edit_user_invalidates_author_data(self):
+        self.client.get("/api/announcements/")
+        self.client.get(f"/api/announcements/{self.announcement.id}/")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.client.put("/api/user/edit/", {"first_name": "Maria"})
+        self.client.credentials()
+        response = self.client.get(f"/api/announcements/{self.announcement.id}/")
+        self.assertEqual(response.data["author"]["first_name"], "Maria")
+        response = self.client.get("/api/announcements/")
+        self.assertEqual(response.data["results"][0]["author"]["first_name"], "Maria")
+
+    def test_concurrent_miss_waits_for_lock_holder(self):
+        key = api_cache.make_key("test")
+        cache.add(f"{key}:lock", 1)
+        timer = threading.Timer(0.05, cache.set, args=(key, "fresh"))
+        timer.start()
+        computed = []
+        value = api_cache.get_or_compute(key, lambda: computed.append(1) or "recomputed")
+        timer.join()
+        self.assertEqual(value, "fresh")
+        self.assertEqual(computed, [])
+
+class ConditionalRequestsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = SystemUser.objects.create_user(
+            username="testuser",
+            email="testuser@example.com",
+            password="password123"
+        )
+        self.token = generate_token(self.user)
+        self.announcement = Announcement.objects.create(
+            subject="Math Tutoring",
+            content="Learn math with me!",
+            hourly_rate=50.00,
+            author=self.user
+        )
+
+    def assert_revalidates(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["ETag"].startswith('"'))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        return response
+
+    def test_detail_list_and_search_answer_304(self):
+        self.assert_revalidates(f"/api/announcements/{self.announcement.id}/")
+        self.assert_revalidates("/api/announcements/?page=1")
+        self.assert_revalidates("/api/announcements/search/?subject=math")
+
+    def test_collection_etags_need_no_query(self):
+        Announcement.objects.bulk_create([
+            Announcement(subject="Math", content="Learn!", hourly_rate=40 + i, author=self.user) for i in range(15)
+        ])
+        api_cache.invalidate_announcements()
+        first = self.client.get("/api/announcements/", {"cursor": "", "page_size": 5})
+        urls = ["/api/announcements/?page=2", "/api/announcements/?page_size=5", first.data["next"],
+                "/api/announcements/search/?subject=math&page=2"]
+        for url in urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED, url)
+
+    def test_deletion_changes_collection_validators(self):
+        self.assertNotIn("Last-Modified", self.client.get("/api/announcements/"))
+        detail_modified = self.client.get(f"/api/announcements/{self.announcement.id}/")["Last-Modified"]
+        list_etag = self.client.get("/api/announcements/")["ETag"]
+        Announcement.objects.create(subject="Physics", content="Learn!", hourly_rate=60, author=self.user).delete()
+        api_cache.invalidate_announcements()
+        # Samo If-Modified-Since nie daje 304 dla kolekcji - MAX(updated_at) nie widzi usunięć.
+        response = self.client.get("/api/announcements/", HTTP_IF_MODIFIED_SINCE=detail_modified)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get("/api/announcements/", HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_invalid_search_filters_get_no_etag(self):
+        response = self.client.get("/api/announcements/search/", {"min_rate": "abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn("ETag", response)
+        with mock.patch("api.conditional.filter_announcements", side_effect=DatabaseError("connection lost")):
+            with self.assertRaises(DatabaseError):
+                self.client.get("/api/announcements/search/", {"subject": "math"})
+
+    def test_304_skips_the_serializer(self):
+        url = f"/api/announcements/{self.announcement.id}/"
+        etag = self.client.get(url)["ETag"]
+        with mock.patch.object(AnnouncementSerializer, "to_representation") as to_representation:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        to_representation.assert_not_called()
+
+    def test_if_modified_since(self):
+        url = f"/api/announcements/{self.announcement.id}/"
+        last_modified = self.client.get(url)["Last-Modified"]
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_changes_after_edit(self):
+        url = f"/api/announcements/{self.announcement.id}/"
+        detail_etag = self.client.get(url)["ETag"]
+        list_etag = self.client.get("/api/announcements/")["ETag"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.client.put(f"/api/announcements/edit/{self.announcement.id}/", {"subject": "Algebra"})
+        self.client.credentials()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["subject"], "Algebra")
+        response = self.client.get("/api/announcements/", HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_etag_changes_after_author_edit(self):
+        list_etag = self.client.get("/api/announcements/")["ETag"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        self.client.put("/api/user/edit/", {"first_name": "Maria"})
+        self.client.credentials()
+        response = self.client.get("/api/announcements/", HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+class NotificationBatcherTestCase(APITestCase):
+    def test_flushes_full_batches_over_one_connection(self):
+        batcher = NotificationBatcher(batch_size=3, max_wait=60)
+        with mock.patch("api.tasks.get_connection", wraps=get_connection) as connections:
+            for i in range(7):
+                batcher.add(build_notification(f"user{i}@example.com", "Welcome!"))
+            self.assertEqual(len(mail.outbox), 6)
+            self.assertEqual(connections.call_count, 2)
+            self.assertEqual(batcher.flush(), 1)
+        self.assertEqual(len(mail.outbox), 7)
+        self.assertEqual(mail.outbox[0].to, ["user0@example.com"])
+
+    def test_flushes_after_max_wait(self):
+        batcher = NotificationBatcher(batch_size=100, max_wait=0.05)
+        batcher.add(build_notification("user@example.com", "Welcome!"))
+        self.assertEqual(len(mail.outbox), 0)
+        batcher._timer.join(1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_send_notification_batch(self):
+        result = send_notification_batch([("a@example.com", "Hi"), ("b@example.com", "Hi")])
+        self.assertEqual(result, "2 notifications sent")
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_failed_batch_is_logged_and_reported_to_waiting_tasks(self):
+        batcher = NotificationBatcher(batch_size=2, max_wait=60)
+        with mock.patch("api.tasks.deliver", side_effect=ConnectionRefusedError("SMTP down")):
+            first = batcher.add(build_notification("a@example.com", "Hi"))
+            with self.assertLogs("api.tasks", "ERROR") as logs:
+                second = batcher.add(build_notification("b@example.com", "Hi"))
+        self.assertIs(first, second)
+        self.assertIn("a@example.com, b@example.com", logs.output[0])
+        with self.assertRaises(ConnectionRefusedError):
+            first.wait(0)
+        # Paczka nie wraca do bufora - ponowienie należy do zadań Celery.
+        self.assertEqual(batcher.flush(), 0)
+
+    def test_send_notification_returns_after_delivery(self):
+        batcher = NotificationBatcher(batch_size=1, max_wait=60)
+        with mock.patch("api.tasks.get_batcher", return_value=batcher):
+            self.assertEqual(send_notification("a@example.com", "Hi"), "Notification sent to a@example.com")
+            self.assertEqual(len(mail.outbox), 1)
+            with mock.patch("api.tasks.deliver", side_effect=ConnectionRefusedError("SMTP down")):
+                with self.assertLogs("api.tasks", "ERROR"), self.assertRaises(ConnectionRefusedError):
+                    send_notification("b@example.com", "Hi")
+        self.assertTrue(send_notification.acks_late)
+
+class AsyncReadViewsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        self.user = SystemUser.objects.create_user(
+            username="testuser",
+            email="testuser@example.com",
+            password="password123",
+            first_name="Anna"
+        )
+        for i in range(12):
+            self.announcement = Announcement.objects.create(
+                subject="Math Tutoring" if i % 2 else "Physics Tutoring",
+                content="Learn with me!",
+                hourly_rate=40 + i,
+                author=self.user
+            )
+
+    async def test_list_matches_sync_view(self):
+        request = self.factory.get("/api/announcements/?page=2")
+        response = await async_views.announcement_list(request)
+        expected = await sync_to_async(self.client.get)("/api/announcements/?page=2")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+
+    async def test_list_cursor_mode(self):
+        response = await async_views.announcement_list(self.factory.get("/api/announcements/?cursor=&page_size=5"))
+        data = json.loads(response.content)
+        self.assertEqual(len(data["results"]), 5)
+        self.assertIsNotNone(data["next"])
+
+    async def test_get_announcement_and_not_found(self):
+        response = await async_views.get_announcement(self.factory.get("/"), pk=self.announcement.id)
+        self.assertEqual(json.loads(response.content)["author"]["first_name"], "Anna")
+        response = await async_views.get_announcement(self.factory.get("/"), pk=999)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content), {"error": "Announcement not found", "status": 404})
+
+    async def test_search(self):
+        request = self.factory.get("/api/announcements/search/", {"subject": "math", "min_rate": 45})
+        response = await async_views.search_announcements(request)
+        self.assertEqual([item["hourly_rate"] for item in json.loads(response.content)], ["51.00", "49.00", "47.00", "45.00"])
+
+    async def test_get_current_user_requires_token(self):
+        response = await async_views.get_current_user(self.factory.get("/api/user/me/"))
+        self.assertEqual(response.status_code, 401)
+        request = self.factory.get("/api/user/me/", headers={"Authorization": f"Bearer {generate_token(self.user)}"})
+        response = await async_views.get_current_user(request)
+        self.assertEqual(json.loads(response.content)["username"], "testuser")
+
+
+class FastPathTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = SystemUser.objects.create_user(
+            username="testuser",
+            email="testuser@example.com",
+            password="password123",
+            first_name="Zażółć",
+            last_name="O'Brien \"Jr\"",
+        )
+        self.other = SystemUser.objects.create_user(
+            username="other",
+            email="other@example.com",
+            password="password123",
+            phone_number="123456789",
+            is_staff=True,
+        )
+        contents = ["Learn with me!", "Linia\u2028akapit\u2029koniec", "tab\tnull\x00bell\x07 \\ / \U0001F600"]
+        for i, content in enumerate(contents):
+            Announcement.objects.create(
+                subject=f"Matematyka {i}",
+                content=content,
+                hourly_rate="1234567.5" if i == 2 else 40 + i,
+                author=self.user if i % 2 else self.other,
+            )
+
+    def test_rows_match_serializer_output_byte_for_byte(self):
+        queryset = Announcement.objects.order_by('-date_added', '-id')
+        for serializer_class in (AnnouncementSerializer, PublicAnnouncementSerializer):
+            expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+            rows = serialize_rows(values_for(queryset, serializer_class), serializer_class)
+            self.assertEqual(FastJSONRenderer().render(rows), expected)
+            self.assertEqual(JSONRenderer().render(rows), expected)
+
+    def test_renderer_matches_stock_renderer(self):
+        data = {
+            "date": timezone.now(),
+            "rate": Decimal("12.50"),
+            "text": "Linia\u2028akapit",
+            "big": 2 ** 70,
+            "nested": [{"a": None, "b": True}],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_list_and_search_responses(self):
+        response = self.client.get("/api/announcements/?cursor=&page_size=2")
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
+        response = self.client.get(response.data["next"])
+        self.assertEqual(response.data["results"][0]["content"], "Learn with me!")
+
+        response = self.client.get("/api/announcements/search/", {"subject": "matematyka", "author_fields": "public"})
+        self.assertEqual(response.data[0]["author"], {"id": self.other.id, "first_name": "", "last_name": ""})
+        self.assertEqual(response.data[0]["hourly_rate"], "1234567.50")
+
+    def test_unsupported_fields_are_rejected(self):
+        class WithMethodField(AnnouncementSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta(AnnouncementSerializer.Meta):
+                fields = AnnouncementSerializer.Meta.fields + ['label']
+
+        with self.assertRaises(ImproperlyConfigured):
+            RowMapper(WithMethodField)
+
+
+@override_settings(AUTH_USER_CACHE_TIMEOUT=60)
+class CachedJWTAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = SystemUser.objects.create_user(
+            username="testuser",
+            email="testuser@example.com",
+            password="password123",
+            first_name="Anna"
+        )
+        self.admin = SystemUser.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="password123",
+            is_staff=True
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.user)}")
+
+    def test_steady_state_does_no_user_query(self):
+        self.client.get("/api/user/me/")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/user/me/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 0)
+
+    def test_edit_user_is_visible_immediately(self):
+        self.client.get("/api/user/me/")
+        self.client.put("/api/user/edit/", {"first_name": "Maria"}, format="json")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/user/me/")
+        self.assertEqual(response.data["first_name"], "Maria")
+        self.assertEqual(len(queries), 1)
+
+    def test_password_change_and_deactivation_invalidate(self):
+        self.client.get("/api/user/me/")
+        self.user.set_password("new-password")
+        self.user.save()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/user/me/")
+        self.assertEqual(len(queries), 1)
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get("/api/user/me/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_delete_user_is_visible_immediately(self):
+        self.client.get("/api/user/me/")
+        admin_client = APIClient()
+        admin_client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.admin)}")
+        response = admin_client.delete(f"/api/users/delete/{self.user.id}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.get("/api/user/me/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=0)
+    def test_disabled_without_shared_cache(self):
+        self.client.get("/api/user/me/")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/user/me/")
+        self.assertEqual(len(queries), 1)
+        # Bez współdzielonego cache inny worker nie zobaczyłby podbicia wersji.
+        SystemUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.get("/api/user/me/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class LoginPipelineTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        # Zamrożony zegar - kubełki nie uzupełniają się w trakcie testu.
+        clock = mock.patch("api.throttling.TokenBucketThrottle.timer", return_value=1000.0)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.addCleanup(cache.clear)
+        self.user = SystemUser.objects.create_user(
+            username="testuser",
+            email="testuser@example.com",
+            password="password123"
+        )
+
+    def login(self, username="testuser", password="password123", ip="10.0.0.1"):
+        return self.client.post(
+            "/api/login/", {"username": username, "password": password}, REMOTE_ADDR=ip
+        )
+
+    def test_username_throttle_rejects_before_hashing(self):
+        for _ in range(10):
+            self.assertEqual(self.login(password="wrong").status_code, status.HTTP_400_BAD_REQUEST)
+        with mock.patch("api.login.check_password") as check:
+            response = self.login(ip="10.0.0.2")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response.data["status"], 429)
+        self.assertIn("Retry-After", response)
+        check.assert_not_called()
+        # Inne konto z tego samego IP nadal może się logować.
+        SystemUser.objects.create_user(username="other", email="other@example.com", password="password123")
+        self.assertEqual(self.login(username="other").status_code, status.HTTP_200_OK)
+
+    def test_ip_throttle(self):
+        for i in range(30):
+            self.login(username=f"nobody{i}")
+        self.assertEqual(self.login().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # X-Forwarded-For od klienta nie zmienia adresu (NUM_PROXIES = 0).
+        response = self.client.post(
+            "/api/login/", {"username": "testuser", "password": "password123"},
+            REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="192.0.2.99",
+        )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.login(ip="10.0.0.3").status_code, status.HTTP_200_OK)
+
+    def test_non_object_body_is_a_client_error(self):
+        for body in (["testuser"], "testuser", 42):
+            response = self.client.post("/api/login/", body, format="json", REMOTE_ADDR="10.0.0.4")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, body)
+
+    def test_non_string_credentials_are_rejected_before_hashing(self):
+        bodies = (
+            {"username": "nobody", "password": 123},
+            {"username": "testuser", "password": 123},
+            {"username": "testuser", "password": ["x"]},
+            {"username": ["testuser"], "password": "password123"},
+            {"username": 7, "password": {"a": 1}},
+        )
+        with mock.patch("api.login.get_pool") as get_pool:
+            for body in bodies:
+                response = self.client.post("/api/login/", body, format="json", REMOTE_ADDR="10.0.0.5")
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, body)
+                self.assertEqual(response.data["error"], login_module.INVALID_CREDENTIALS)
+        get_pool.assert_not_called()
+
+    def test_full_queue_returns_503(self):
+        pool = login_module.HashingPool(workers=1, queue_limit=0)
+        pool._slots.acquire()
+        with mock.patch("api.login.get_pool", return_value=pool):
+            response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.data["error"], "Too many login attempts in progress, try again shortly")
+
+    def test_inactive_user_is_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+        response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rehash_on_login(self):
+        hashers = ["django.contrib.auth.hashers.MD5PasswordHasher"] + settings.PASSWORD_HASHERS
+        with override_settings(PASSWORD_HASHERS=hashers):
+            self.user.set_password("password123")
+            self.user.save()
+        self.assertTrue(self.user.password.startswith("md5$"))
+
+        with override_settings(PASSWORD_HASHERS=settings.PASSWORD_HASHERS + hashers[:1]):
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+
+class RegisterUniqueConstraintTestCase(APITestCase):
+    def setUp(self):
+        # Bez brokera Celery .delay() rzuca wyjątek - powitalny e-mail nie jest tu testowany.
+        notification = mock.patch("api.views.send_notification.delay")
+        self.send_notification = notification.start()
+        self.addCleanup(notification.stop)
+        self.data = {
+            "username": "testuser",
+            "email": "testuser@example.com",
+            "password": "password123",
+            "first_name": "Test",
+            "last_name": "User"
+        }
+
+    def test_register_is_a_single_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/register/", self.data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([q["sql"].split()[0] for q in queries if not q["sql"].startswith(("SAVEPOINT", "RELEASE"))], ["INSERT"])
+        self.send_notification.assert_called_once_with("testuser@example.com", "Welcome to our service!")
+
+    def test_duplicates_map_to_field_errors(self):
+        self.client.post("/api/register/", self.data)
+        response = self.client.post("/api/register/", {**self.data, "username": "other"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["status"], 400)
+        response = self.client.post("/api/register/", {**self.data, "email": "other@example.com"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(SystemUser.objects.count(), 1)
+
+    def test_violations_classified_by_constraint_name(self):
+        def violation(constraint, detail):
+            cause = Exception(detail)
+            cause.diag = mock.Mock(constraint_name=constraint)
+            error = IntegrityError(detail)
+            error.__cause__ = cause
+            return error
+
+        # Wartość w DETAIL PostgreSQL nie może decydować o polu.
+        error = violation("api_systemuser_username_key", "DETAIL:  Key (username)=(myemail) already exists.")
+        self.assertEqual(unique_violation_errors(error), {"username": ["A user with that username already exists."]})
+        error = violation("api_systemuser_email_key", "DETAIL:  Key (email)=(username@example.com) already exists.")
+        self.assertEqual(unique_violation_errors(error), {"email": ["Email already exists"]})
+        self.assertEqual(unique_violation_errors(violation("other_key", "email username")),
+                         {"non_field_errors": ["User already exists"]})
+
+
+class ImportUsersCommandTestCase(APITestCase):
+    def write(self, name, content):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, name)
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(content)
+        return path
+
+    def test_csv_import(self):
+        SystemUser.objects.create_user(username="existing", email="existing@example.com", password="x")
+        hashed = make_password("secret")
+        path = self.write("users.csv", (
+            "username,email,first_name,last_name,phone_number,password,password_hash\n"
+            "anna,anna@example.com,Anna,Nowak,123,plain-pass,\n"
+            f"jan,jan@example.com,Jan,Kowalski,,,{hashed}\n"
+            "maria,maria@example.com,Maria,,,,\n"
+            "existing,new@example.com,,,,,\n"
+            "bad,not-an-email,,,,,\n"
+            "anna,anna2@example.com,,,,,\n"
+        ))
+        out, err = StringIO(), StringIO()
+        call_command("import_users", path, "--batch-size", "2", stdout=out, stderr=err)
+
+        self.assertIn("Created 3 users, skipped 2 existing, 1 invalid rows", out.getvalue())
+        self.assertIn("line 6", err.getvalue())
+        self.assertTrue(SystemUser.objects.get(username="anna").check_password("plain-pass"))
+        self.assertEqual(SystemUser.objects.get(username="jan").password, hashed)
+        self.assertFalse(SystemUser.objects.get(username="maria").has_usable_password())
+
+    def test_ndjson_import_queries_per_batch(self):
+        lines = [json.dumps({"username": f"user{i}", "email": f"user{i}@example.com"}) for i in range(10)]
+        path = self.write("users.ndjson", "\n".join(lines + ["{broken"]) + "\n")
+        with CaptureQueriesContext(connection) as queries:
+            call_command("import_users", path, "--batch-size", "5", stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(SystemUser.objects.filter(username__startswith="user").count(), 10)
+        # Na partię: sprawdzenie istniejących + jeden INSERT + odczyt wstawionych wierszy.
+        self.assertLessEqual(len([q for q in queries if q["sql"].startswith(("SELECT", "INSERT"))]), 7)
+
+    def test_non_text_ndjson_values_are_invalid_rows(self):
+        lines = [
+            {"username": "anna", "email": "anna@example.com", "phone_number": 123456789},
+            {"username": "jan", "email": "jan@example.com", "first_name": True},
+            {"username": "ola", "email": "ola@example.com", "password": 123},
+            {"username": "maria", "email": "maria@example.com", "phone_number": "123456789"},
+        ]
+        path = self.write("users.ndjson", "\n".join(json.dumps(line) for line in lines) + "\n")
+        out, err = StringIO(), StringIO()
+        call_command("import_users", path, stdout=out, stderr=err)
+        self.assertIn("Created 1 users, skipped 0 existing, 3 invalid rows", out.getvalue())
+        self.assertIn("line 1: phone_number must be text", err.getvalue())
+        self.assertEqual(list(SystemUser.objects.values_list("username", "phone_number")), [("maria", "123456789")])
+
+    def test_rows_lost_to_concurrent_inserts_are_not_counted_or_notified(self):
+        path = self.write("users.csv", (
+            "username,email,first_name,last_name,phone_number,password,password_hash\n"
+            "anna,anna@example.com,Anna,,,,\n"
+            "jan,jan@example.com,Jan,,,,\n"
+        ))
+        bulk_create = QuerySet.bulk_create
+
+        def racing_bulk_create(queryset, objs, *args, **kwargs):
+            # Rejestracja przez API wygrywa wyścig o login "anna" między SELECT a INSERT.
+            SystemUser.objects.create_user(username="anna", email="anna@example.com", password="x")
+            return bulk_create(queryset, objs, *args, **kwargs)
+
+        out, err = StringIO(), StringIO()
+        with mock.patch.object(QuerySet, "bulk_create", autospec=True, side_effect=racing_bulk_create), \
+                mock.patch("api.management.commands.import_users.send_notification_batch.delay") as delay:
+            call_command("import_users", path, "--notify", stdout=out, stderr=err)
+
+        self.assertIn("Created 1 users, skipped 1 existing", out.getvalue())
+        self.assertIn("anna", err.getvalue())
+        delay.assert_called_once_with([("jan@example.com", "Welcome to our service!")])
+
+
+class AnnouncementBatchTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = SystemUser.objects.create_user(
+            username="testuser",
+            email="testuser@example.com",
+            password="password123"
+        )
+        self.other = SystemUser.objects.create_user(
+            username="other",
+            email="other@example.com",
+            password="password123"
+        )
+        self.admin = SystemUser.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="password123",
+            is_staff=True
+        )
+        self.own = [
+            Announcement.objects.create(subject=f"Math {i}", content="Learn!", hourly_rate=40, author=self.user)
+            for i in range(3)
+        ]
+        self.foreign = Announcement.objects.create(subject="Physics", content="Learn!", hourly_rate=60, author=self.other)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.user)}")
+
+    def batch(self, operations):
+        return self.client.post("/api/announcements/batch/", {"operations": operations}, format="json")
+
+    def test_mixed_batch(self):
+        self.client.get(f"/api/announcements/{self.own[0].id}/")
+        response = self.batch([
+            {"op": "create", "data": {"subject": "Chemia", "content": "Lab", "hourly_rate": "55.50"}},
+            {"op": "update", "id": self.own[0].id, "data": {"hourly_rate": "45.00"}},
+            {"op": "update", "id": self.own[1].id, "data": {"subject": "Algebra"}},
+            {"op": "delete", "id": self.own[2].id},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual([item["status"] for item in results], [201, 200, 200, 204])
+        created = Announcement.objects.get(pk=results[0]["id"])
+        self.assertEqual((created.subject, created.author_id), ("Chemia", self.user.id))
+        self.assertEqual(results[1]["data"]["hourly_rate"], "45.00")
+        self.assertEqual(Announcement.objects.get(pk=self.own[1].id).subject, "Algebra")
+        self.assertFalse(Announcement.objects.filter(pk=self.own[2].id).exists())
+        # Zmienione ogłoszenie nie może zostać w cache w starej wersji.
+        self.assertEqual(self.client.get(f"/api/announcements/{self.own[0].id}/").data["hourly_rate"], "45.00")
+
+    def test_failure_applies_nothing(self):
+        response = self.batch([
+            {"op": "create", "data": {"subject": "Chemia", "content": "Lab", "hourly_rate": "55.50"}},
+            {"op": "update", "id": self.foreign.id, "data": {"subject": "Mine now"}},
+            {"op": "delete", "id": 999999},
+            {"op": "create", "data": {"subject": "No rate"}},
+            {"op": "delete", "id": self.own[0].id},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([item["status"] for item in response.data["results"]], [424, 403, 404, 400, 424])
+        self.assertIn("hourly_rate", response.data["results"][3]["error"])
+        self.assertEqual(Announcement.objects.count(), 4)
+        self.assertEqual(Announcement.objects.get(pk=self.foreign.id).subject, "Physics")
+
+    def test_staff_may_edit_any_announcement(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.admin)}")
+        response = self.batch([
+            {"op": "update", "id": self.foreign.id, "data": {"content": "Edited by staff"}},
+            {"op": "delete", "id": self.own[0].id},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Announcement.objects.get(pk=self.foreign.id).content, "Edited by staff")
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        def run(count):
+            operations = [
+                {"op": "create", "data": {"subject": f"S{i}", "content": "C", "hourly_rate": 10}} for i in range(count)
+            ] + [{"op": "update", "id": a.id, "data": {"content": f"v{count}"}} for a in self.own]
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.batch(operations).status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        run(1)  # rozgrzewa cache użytkownika z tokena
+        self.assertEqual(run(2), run(20))
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.batch([]).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.batch([{"op": "upsert"}, {"op": "delete", "id": "1"}, {"op": "update", "id": self.own[0].id}])
+        self.assertEqual([item["status"] for item in response.data["results"]], [400, 400, 400])
+        with override_settings(ANNOUNCEMENT_BATCH_MAX_OPERATIONS=1):
+            response = self.batch([{"op": "delete", "id": a.id} for a in self.own])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.credentials()
+        self.assertEqual(self.batch([{"op": "delete", "id": self.own[0].id}]).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class UserListTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = SystemUser.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="password123",
+            is_staff=True
+        )
+        for i in range(14):
+            SystemUser.objects.create_user(
+                username=f"student{i}",
+                email=f"student{i}@school.example" if i % 2 else f"student{i}@example.com",
+                password="password123",
+                phone_number="12345" if i == 0 else None
+            )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.admin)}")
+
+    def test_cursor_pages_cover_all_users(self):
+        response = self.client.get("/api/users/")
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertIsNone(response.data["previous"])
+        usernames = [user["username"] for user in response.data["results"]]
+        response = self.client.get(response.data["next"])
+        usernames += [user["username"] for user in response.data["results"]]
+        self.assertIsNone(response.data["next"])
+        self.assertEqual(usernames, ["admin"] + [f"student{i}" for i in range(14)])
+        self.assertEqual(response.data["results"][-1]["phone_number"], None)
+
+    def test_filters(self):
+        response = self.client.get("/api/users/", {"email": "SCHOOL", "page_size": 100, "with_count": "true"})
+        self.assertEqual(response.data["count"], 7)
+        response = self.client.get("/api/users/", {"is_staff": "true"})
+        self.assertEqual([user["username"] for user in response.data["results"]], ["admin"])
+        response = self.client.get("/api/users/", {"username": "student1", "is_staff": "false"})
+        self.assertEqual(len(response.data["results"]), 5)
+        response = self.client.get("/api/users/", {"is_staff": "maybe"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_csv_and_ndjson(self):
+        response = self.client.get("/api/users/export/", {"email": "school"})
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual(lines[0], "id,username,email,first_name,last_name,phone_number,is_staff")
+        self.assertEqual(len(lines), 8)
+
+        response = self.client.get("/api/users/export/", {"stream": "ndjson", "is_staff": "false"})
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 14)
+        self.assertEqual(rows[0]["phone_number"], "12345")
+
+    def test_staff_only(self):
+        user = SystemUser.objects.get(username="student0")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(user)}")
+        self.assertEqual(self.client.get("/api/users/").status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get("/api/users/export/").status_code, status.HTTP_403_FORBIDDEN)
+
+
+class BackgroundUserDeletionTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = SystemUser.objects.create_user(
+            username="admin",
+            email="admin@example.com",
+            password="password123",
+            is_staff=True
+        )
+        self.user = SystemUser.objects.create_user(
+            username="prolific",
+            email="prolific@example.com",
+            password="password123"
+        )
+        Announcement.objects.bulk_create([
+            Announcement(subject=f"Math {i}", content="Learn!", hourly_rate=40, author=self.user) for i in range(10)
+        ])
+        self.keep = Announcement.objects.create(subject="Physics", content="Learn!", hourly_rate=60, author=self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.admin)}")
+
+    @override_settings(USER_DELETION_CHUNK_SIZE=3)
+    def test_background_deletion(self):
+        user_client = APIClient()
+        user_client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.user)}")
+        self.assertEqual(user_client.get("/api/user/me/").status_code, status.HTTP_200_OK)
+
+        with mock.patch("api.views.delete_user_job.delay") as delay:
+            response = self.client.delete(f"/api/users/delete/{self.user.id}/?mode=background")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job_id = response.data["id"]
+        delay.assert_called_once_with(job_id)
+        self.assertEqual(response.data["status"], "pending")
+        # Konto jest wyłączone od razu, zanim zadanie ruszy.
+        self.assertFalse(SystemUser.objects.get(pk=self.user.id).is_active)
+        self.assertEqual(user_client.get("/api/user/me/").status_code, status.HTTP_401_UNAUTHORIZED)
+
+        pks = list(Announcement.objects.filter(author=self.user).values_list("id", flat=True))
+        for pk in pks:
+            self.assertEqual(self.client.get(f"/api/announcements/{pk}/").status_code, status.HTTP_200_OK)
+        stale = []
+
+        def check_chunk(*deleted):
+            api_cache.invalidate_announcements(*deleted)
+            # Usunięte w tej partii znikają od razu, nie dopiero po usunięciu użytkownika.
+            stale.extend(pk for pk in deleted if self.client.get(f"/api/announcements/{pk}/").status_code != 404)
+
+        with CaptureQueriesContext(connection) as queries, \
+                mock.patch("api.tasks.invalidate_announcements", side_effect=check_chunk) as invalidate:
+            tasks.delete_user_job(job_id)
+        self.assertEqual(stale, [])
+        self.assertEqual(sorted(pk for call in invalidate.call_args_list for pk in call.args), sorted(pks))
+        chunk_deletes = [q for q in queries if q["sql"].startswith("DELETE FROM api_announcement WHERE id IN")]
+        self.assertEqual(len(chunk_deletes), 4)
+
+        response = self.client.get(f"/api/users/delete-jobs/{job_id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "done")
+        self.assertEqual((response.data["deleted_announcements"], response.data["total_announcements"]), (10, 10))
+        self.assertFalse(SystemUser.objects.filter(pk=self.user.id).exists())
+        self.assertEqual(list(Announcement.objects.values_list("id", flat=True)), [self.keep.id])
+
+    def test_failed_job_is_reported(self):
+        with mock.patch("api.views.delete_user_job.delay"):
+            job_id = self.client.delete(f"/api/users/delete/{self.user.id}/?mode=background").data["id"]
+        with mock.patch("api.tasks.delete_announcements_chunk", side_effect=RuntimeError("lock timeout")):
+            with self.assertRaises(RuntimeError):
+                tasks.delete_user_job(job_id)
+        response = self.client.get(f"/api/users/delete-jobs/{job_id}/")
+        self.assertEqual((response.data["status"], response.data["error"]), ("failed", "lock timeout"))
+
+    def test_job_status_requires_staff_and_existing_job(self):
+        self.assertEqual(self.client.get("/api/users/delete-jobs/999/").status_code, status.HTTP_404_NOT_FOUND)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.user)}")
+        self.assertEqual(self.client.get("/api/users/delete-jobs/999/").status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.delete(f"/api/users/delete/{self.admin.id}/?mode=background")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_unknown_mode(self):
+        response = self.client.delete(f"/api/users/delete/{self.user.id}/?mode=later")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(SystemUser.objects.get(pk=self.user.id).is_active)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.autocommit = False
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTestCase(TestCase):
+    def test_connections_are_reused(self):
+        pool = ConnectionPool(FakeConnection, max_size=2)
+        first = pool.getconn()
+        pool.putconn(first)
+        self.assertIs(pool.getconn(), first)
+        metrics = pool.metrics()
+        self.assertEqual((metrics["connections_opened"], metrics["checkouts"]), (1, 2))
+        self.assertEqual((metrics["size"], metrics["in_use"], metrics["idle"]), (1, 1, 0))
+
+    def test_exhausted_pool_times_out(self):
+        pool = ConnectionPool(FakeConnection, max_size=1, timeout=0.05)
+        pool.getconn()
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+        self.assertEqual(pool.metrics()["timeouts"], 1)
+
+    def test_waiter_gets_released_connection(self):
+        pool = ConnectionPool(FakeConnection, max_size=1, timeout=5)
+        held = pool.getconn()
+        received = []
+        waiter = threading.Thread(target=lambda: received.append(pool.getconn()))
+        waiter.start()
+        while pool.metrics()["waiting"] == 0:
+            pass
+        pool.putconn(held)
+        waiter.join()
+        self.assertEqual(received, [held])
+        self.assertEqual(pool.metrics()["connections_opened"], 1)
+
+    def test_broken_and_expired_connections_are_closed(self):
+        pool = ConnectionPool(FakeConnection, max_size=2, max_lifetime=60)
+        broken = pool.getconn()
+        pool.putconn(broken, discard=True)
+        self.assertTrue(broken.closed)
+        self.assertEqual(pool.metrics()["size"], 0)
+
+        with mock.patch("api.db.pool.time.monotonic", return_value=0):
+            old = pool.getconn()
+            pool.putconn(old)
+        with mock.patch("api.db.pool.time.monotonic", return_value=120):
+            self.assertIsNot(pool.getconn(), old)
+        self.assertTrue(old.closed)
+        self.assertEqual(pool.metrics()["connections_closed"], 2)
+
+    def test_backend_returns_connection_to_pool(self):
+        settings_dict = {**connection.settings_dict, "POOL": {"MAX_SIZE": 1}}
+        wrapper = PooledDatabaseWrapper(settings_dict, alias="pool-test")
+        self.addCleanup(db_pool._pools.pop, "pool-test", None)
+        with mock.patch("django.db.backends.postgresql.base.DatabaseWrapper.get_new_connection",
+                        side_effect=lambda params: FakeConnection()):
+            raw = wrapper.get_new_connection({})
+            wrapper.connection = raw
+            wrapper._close()
+            self.assertEqual((raw.rollbacks, raw.autocommit), (1, True))
+            self.assertIs(wrapper.get_new_connection({}), raw)
+        self.assertEqual(db_pool.pool_metrics()["pool-test"]["connections_opened"], 1)
+
+    def test_pool_status_requires_staff(self):
+        user = SystemUser.objects.create_user(username="plain", email="plain@example.com", password="password123")
+        admin = SystemUser.objects.create_user(
+            username="admin", email="admin@example.com", password="password123", is_staff=True
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(user)}")
+        self.assertEqual(client.get("/api/db/pool/").status_code, status.HTTP_403_FORBIDDEN)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(admin)}")
+        with mock.patch.dict(db_pool._pools, {"default": ConnectionPool(FakeConnection)}):
+            response = client.get("/api/db/pool/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["default"]["max_size"], 10)
+
+    def test_forked_child_builds_its_own_pools(self):
+        parent = ConnectionPool(FakeConnection)
+        connection_ = parent.getconn()
+        parent.putconn(connection_)
+        with mock.patch.dict(db_pool._pools, {"default": parent}):
+            db_pool._after_fork_in_child()
+            self.assertIsNone(db_pool.get_pool("default"))
+        self.addCleanup(db_pool._inherited.clear)
+        self.assertFalse(connection_.closed)
+
+
+class WarmupTestCase(APITestCase):
+    def test_app_warmup_closes_connections(self):
+        with mock.patch("api.warmup.connections.close_all") as close_all:
+            timings = warmup.warm_up_app()
+        close_all.assert_called_once_with()
+        self.assertEqual(list(timings), ["urls", "models", "serializers", "settings"])
+
+    def test_worker_warmup_sends_a_request(self):
+        Announcement.objects.create(
+            subject="Math", content="Learn!", hourly_rate=40,
+            author=SystemUser.objects.create_user(username="warm", email="warm@example.com", password="password123"),
+        )
+        with mock.patch("api.warmup.Client.get", wraps=warmup.Client().get) as get:
+            timings = warmup.warm_up_worker()
+        self.assertEqual(list(timings), ["db", "request"])
+        self.assertEqual(get.call_args.args, (warmup.WARMUP_PATH,))
+
+    def test_serve_refuses_several_workers_on_process_local_cache(self):
+        with self.assertRaisesMessage(CommandError, "needs a shared cache"):
+            call_command("serve", "--workers", "2")
+        redis = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://redis:6379/1"}}
+        with override_settings(CACHES=redis):
+            self.assertTrue(api_cache.is_shared_cache())
+
+    def test_serve_asgi_disables_persistent_connections(self):
+        environ = {name: value for name, value in os.environ.items() if name != "DB_CONN_MAX_AGE"}
+        with mock.patch.dict(os.environ, environ, clear=True), \
+                mock.patch.dict(settings.DATABASES["default"], CONN_MAX_AGE=60), \
+                mock.patch("gunicorn.app.base.BaseApplication.run") as run:
+            call_command("serve", "--workers", "1", "--no-warmup", stdout=StringIO())
+            self.assertEqual(settings.DATABASES["default"]["CONN_MAX_AGE"], 60)
+            call_command("serve", "--asgi", "--workers", "1", "--no-warmup", stdout=StringIO())
+            self.assertEqual(settings.DATABASES["default"]["CONN_MAX_AGE"], 0)
+        self.assertEqual(run.call_count, 2)
+
+
+class BenchmarkRoutesTestCase(APITransactionTestCase):
+    def test_every_route_has_a_scenario(self):
+        self.assertEqual(benchmark_routes.missing_scenarios(), [])
+
+    def test_in_process_run_reports_every_route(self):
+        call_command("seed_benchmark_data", announcements=30, users=5, stdout=StringIO())
+        self.assertEqual((SystemUser.objects.count(), Announcement.objects.count()), (5, 30))
+
+        # Jeden wątek: współdzielona baza SQLite w pamięci blokuje równoległe zapisy.
+        # Powitalny e-mail z register nie potrzebuje brokera Celery.
+        with mock.patch("api.views.send_notification.delay"):
+            report = benchmark_routes.run_benchmark(
+                benchmark_routes.InProcessTransport, total=20, concurrency=1, min_per_route=1
+            )
+        self.assertEqual(set(report["routes"]), {scenario.name for scenario in benchmark_routes.SCENARIOS})
+        for name, route in report["routes"].items():
+            self.assertEqual(route["errors"], 0, name)
+            self.assertTrue(all(int(code) < 400 for code in route["statuses"]), (name, route["statuses"]))
+            self.assertIsNotNone(route["sql_queries"], name)
+        self.assertEqual(report["total"]["requests"], report["meta"]["requests"])
+
+    def test_compare_flags_regressions(self):
+        def report(p95, queries, rps=100.0):
+            route = {"requests": 200, "errors": 0, "p50": 5.0, "p95": p95, "p99": p95,
+                     "rps": rps, "sql_queries": {"mean": queries, "max": queries}}
+            return {"routes": {"announcement_list": route}, "total": route}
+
+        rows = benchmark_routes.compare_reports(report(10.0, 2), report(10.5, 2))
+        self.assertFalse(any(row[-1] for row in rows))
+        regressions = {row[1] for row in benchmark_routes.compare_reports(report(10.0, 2), report(20.0, 3, 50.0)) if row[-1]}
+        # p99 z 200 próbek ma za mało próbek w ogonie, żeby go oflagować.
+        self.assertEqual(regressions, {"p95", "sql_queries", "rps"})
+
+        with tempfile.TemporaryDirectory() as directory:
+            base, current = os.path.join(directory, "base.json"), os.path.join(directory, "current.json")
+            for path, data in ((base, report(10.0, 2)), (current, report(10.0, 3))):
+                with open(path, "w") as handle:
+                    json.dump(data, handle)
+            with self.assertRaises(CommandError):
+                call_command("benchmark_routes", compare=[base, current], stdout=StringIO())
+
+
+class MetricsTestCase(APITestCase):
+    def sample(self, name, labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_requests_are_recorded_per_route(self):
+        author = SystemUser.objects.create_user(username="tutor", email="tutor@example.com", password="password123")
+        Announcement.objects.create(subject="Math", content="Learn!", hourly_rate=40, author=author)
+        route = {"route": "announcement_list"}
+        before = {
+            "requests": self.sample("api_requests_total", {**route, "method": "GET", "status": "200"}),
+            "queries": self.sample("api_request_sql_queries_sum", route),
+            "size": self.sample("api_response_size_bytes_count", route),
+            "render": self.sample("api_serialization_duration_seconds_count", route),
+        }
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/announcements/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.sample("api_requests_total", {**route, "method": "GET", "status": "200"}), before["requests"] + 1)
+        self.assertEqual(self.sample("api_request_sql_queries_sum", route), before["queries"] + len(queries))
+        self.assertEqual(self.sample("api_response_size_bytes_count", route), before["size"] + 1)
+        self.assertEqual(self.sample("api_serialization_duration_seconds_count", route), before["render"] + 1)
+        self.assertGreater(self.sample("api_request_duration_seconds_count", {**route, "method": "GET"}), 0)
+
+    def test_async_view_queries_are_counted(self):
+        route = {"route": "announcement_list"}
+        before = self.sample("api_request_sql_queries_count", route)
+        middleware = metrics.MetricsMiddleware(async_views.announcement_list)
+        request = AsyncRequestFactory().get("/api/announcements/", HTTP_HOST="testserver")
+        request.resolver_match = mock.Mock(url_name="announcement_list")
+        cache.clear()
+        response = async_to_sync(middleware)(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.sample("api_request_sql_queries_count", route), before + 1)
+        self.assertGreater(self.sample("api_request_sql_queries_sum", route), 0)
+
+    def test_streamed_queries_are_counted_when_the_stream_ends(self):
+        author = SystemUser.objects.create_user(username="tutor", email="tutor@example.com", password="password123")
+        Announcement.objects.create(subject="Math", content="Learn!", hourly_rate=40, author=author)
+        route = {"route": "search_announcements"}
+        before = (self.sample("api_request_sql_queries_count", route), self.sample("api_request_sql_queries_sum", route))
+        response = self.client.get("/api/announcements/search/", {"stream": "ndjson"})
+        self.assertEqual(self.sample("api_request_sql_queries_count", route), before[0])
+        with CaptureQueriesContext(connection) as queries:
+            body = b"".join(response.streaming_content)
+        self.assertIn(b"Math", body)
+        self.assertGreater(len(queries), 0)
+        self.assertEqual(self.sample("api_request_sql_queries_count", route), before[0] + 1)
+        self.assertGreaterEqual(self.sample("api_request_sql_queries_sum", route), before[1] + len(queries))
+
+    def test_async_streamed_queries_are_counted(self):
+        author = SystemUser.objects.create_user(username="tutor", email="tutor@example.com", password="password123")
+        Announcement.objects.create(subject="Math", content="Learn!", hourly_rate=40, author=author)
+        route = {"route": "search_announcements"}
+        before = self.sample("api_request_sql_queries_sum", route)
+        middleware = metrics.MetricsMiddleware(async_views.search_announcements)
+        request = AsyncRequestFactory().get("/api/announcements/search/", {"stream": "ndjson"})
+        request.resolver_match = mock.Mock(url_name="search_announcements")
+
+        async def consume():
+            response = await middleware(request)
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        self.assertIn(b"Math", async_to_sync(consume)())
+        self.assertGreater(self.sample("api_request_sql_queries_sum", route), before)
+
+    def test_unknown_methods_share_one_label(self):
+        labels = {"route": "announcement_list", "status": "405"}
+        before = self.sample("api_requests_total", {**labels, "method": "OTHER"})
+        self.client.generic("BREW", "/api/announcements/")
+        self.client.generic("X-RANDOM-123", "/api/announcements/")
+        self.assertEqual(self.sample("api_requests_total", {**labels, "method": "OTHER"}), before + 2)
+        self.assertEqual(self.sample("api_requests_total", {**labels, "method": "BREW"}), 0)
+
+    def test_celery_publish_latency(self):
+        before = self.sample("celery_publish_duration_seconds_count", {"task": "api.tasks.send_notification"})
+        metrics.before_task_publish(sender="api.tasks.send_notification", headers={"id": "abc"})
+        metrics.after_task_publish(sender="api.tasks.send_notification", headers={"id": "abc"})
+        self.assertEqual(
+            self.sample("celery_publish_duration_seconds_count", {"task": "api.tasks.send_notification"}), before + 1
+        )
+
+    def test_metrics_endpoint(self):
+        self.client.get("/api/announcements/")
+        response = self.client.get("/api/metrics")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn(b'api_requests_total{method="GET",route="announcement_list",status="200"}', response.content)
+
+        with override_settings(METRICS_TOKEN="secret"):
+            self.assertEqual(self.client.get("/api/metrics").status_code, status.HTTP_403_FORBIDDEN)
+            response = self.client.get("/api/metrics", HTTP_AUTHORIZATION="Bearer secret")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_multiprocess_directory_is_aggregated(self):
+        with tempfile.TemporaryDirectory() as directory:
+            values.ValueClass = values.MultiProcessValue(lambda: 4242)
+            self.addCleanup(setattr, values, "ValueClass", values.MutexValue)
+            with mock.patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory}):
+                counter = Counter("test_worker_requests", "Test", ["route"], registry=None)
+                counter.labels("announcement_list").inc(3)
+                exposition = metrics.collect()
+        self.assertIn(b'test_worker_requests_total{route="announcement_list"} 3.0', exposition)
+
+
+class ProfilingTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        profiling_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(profiling_dir.cleanup)
+        settings_override = override_settings(PROFILING_DIR=profiling_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.admin = SystemUser.objects.create_user(
+            username="admin", email="admin@example.com", password="password123", is_staff=True
+        )
+        self.user = SystemUser.objects.create_user(username="plain", email="plain@example.com", password="password123")
+        Announcement.objects.create(subject="Math", content="Learn!", hourly_rate=40, author=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.admin)}")
+
+    def test_profile_is_stored_with_sql(self):
+        response = self.client.get("/api/announcements/search/?subject=Math", HTTP_X_PROFILE="1")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        profile_id = response["X-Profile-Id"]
+        self.assertEqual(response["X-Profile-Url"], f"/api/profiles/{profile_id}/")
+
+        summary = self.client.get(response["X-Profile-Url"]).data
+        self.assertEqual((summary["path"], summary["status"]), ("/api/announcements/search/?subject=Math", 200))
+        self.assertGreater(summary["sql_count"], 0)
+        self.assertTrue(any("api_announcement" in query["sql"] for query in summary["sql"]))
+        self.assertTrue(any("search_announcements" in function["function"] for function in summary["functions"]))
+
+        download = self.client.get(f"/api/profiles/{profile_id}/?download=pstats")
+        self.assertEqual(download["Content-Disposition"], f'attachment; filename="profile-{profile_id}.prof"')
+        with tempfile.NamedTemporaryFile(suffix=".prof") as handle:
+            handle.write(download.content)
+            handle.flush()
+            self.assertGreater(pstats.Stats(handle.name).total_calls, 0)
+
+    def test_profiles_outlive_the_process_cache_and_expire(self):
+        profile_id = self.client.get("/api/announcements/", HTTP_X_PROFILE="1")["X-Profile-Id"]
+        # Inny worker nie ma tego wpisu w swojej pamięci - czyta z PROFILING_DIR.
+        cache.clear()
+        self.assertEqual(self.client.get(f"/api/profiles/{profile_id}/").status_code, status.HTTP_200_OK)
+
+        with override_settings(PROFILING_TTL=-1):
+            self.assertEqual(self.client.get(f"/api/profiles/{profile_id}/").status_code, status.HTTP_404_NOT_FOUND)
+            self.client.get("/api/announcements/", HTTP_X_PROFILE="1")
+        self.assertEqual(len(os.listdir(settings.PROFILING_DIR)), 2)
+
+    def test_download_mode_returns_the_profile(self):
+        response = self.client.get("/api/announcements/?profile=download")
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertIn("attachment", response["Content-Disposition"])
+        self.assertEqual(response.json()["path"], "/api/announcements/?profile=download")
+
+    def test_non_staff_and_unflagged_requests_are_not_profiled(self):
+        self.assertNotIn("X-Profile-Id", self.client.get("/api/announcements/"))
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.user)}")
+        response = self.client.get("/api/announcements/", HTTP_X_PROFILE="1")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("X-Profile-Id", response)
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer broken")
+        self.assertNotIn("X-Profile-Id", self.client.get("/api/announcements/", HTTP_X_PROFILE="1"))
+
+    def test_profile_endpoint_requires_staff(self):
+        self.assertEqual(self.client.get("/api/profiles/missing/").status_code, status.HTTP_404_NOT_FOUND)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.user)}")
+        self.assertEqual(self.client.get("/api/profiles/missing/").status_code, status.HTTP_403_FORBIDDEN)
+
+
+class CompressionTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = SystemUser.objects.create_user(
+            username="testuser", email="testuser@example.com", password="password123", first_name="Anna"
+        )
+        for i in range(20):
+            Announcement.objects.create(
+                subject="Matematyka", content="Korepetycje z matematyki dla liceum. " * 5,
+                hourly_rate=40 + i, author=self.user,
+            )
+
+    def test_negotiation(self):
+        codecs = dict.fromkeys(["zstd", "br", "gzip"])
+        self.assertEqual(compression.negotiate("gzip, deflate, br", codecs), "br")
+        self.assertEqual(compression.negotiate("gzip;q=1.0, br;q=0.5", codecs), "gzip")
+        self.assertEqual(compression.negotiate("*;q=0.3, zstd;q=0", codecs), "br")
+        self.assertEqual(compression.negotiate("identity", codecs), None)
+        self.assertEqual(compression.negotiate("", codecs), None)
+        self.assertFalse(compression.compressible_type("application/octet-stream"))
+        self.assertTrue(compression.compressible_type("application/json; charset=utf-8"))
+
+    def test_gzip_list_response(self):
+        plain = self.client.get("/api/announcements/")
+        response = self.client.get("/api/announcements/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(zlib.decompress(response.content, 31), plain.content)
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertLess(len(response.content), len(plain.content) / 3)
+        self.assertEqual(response["ETag"], f"W/{plain['ETag']}")
+        revalidated = self.client.get("/api/announcements/", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(revalidated["ETag"], response["ETag"])
+        self.assertIn("Accept-Encoding", revalidated["Vary"])
+        revalidated = self.client.get("/api/announcements/", HTTP_IF_NONE_MATCH=plain["ETag"])
+        self.assertEqual(revalidated["ETag"], plain["ETag"])
+
+    def test_compressed_body_cached_by_etag(self):
+        first = self.client.get("/api/announcements/", HTTP_ACCEPT_ENCODING="gzip")
+        with mock.patch.object(compression.GzipCodec, "compress") as compress:
+            second = self.client.get("/api/announcements/", HTTP_ACCEPT_ENCODING="gzip")
+        compress.assert_not_called()
+        self.assertEqual(second.content, first.content)
+
+    def test_small_and_unlisted_responses_are_not_compressed(self):
+        response = self.client.get(f"/api/announcements/{Announcement.objects.first().pk}/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertIn("Accept-Encoding", response["Vary"])
+        # Ten sam ETag co w 304, które nie zna rozmiaru ciała.
+        self.assertTrue(response["ETag"].startswith("W/"))
+        with override_settings(COMPRESSION_CONTENT_TYPES=["text/csv"]):
+            response = self.client.get("/api/announcements/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_credentialed_requests_are_not_compressed(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {generate_token(self.user)}")
+        response = self.client.get("/api/announcements/search/", {"q": "matematyki", "author_fields": "full"}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.client.credentials()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = "session"
+        response = self.client.get("/api/announcements/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    @override_settings(COMPRESSION_STREAM_FLUSH=1024)
+    def test_streaming_response(self):
+        plain = b"".join(self.client.get("/api/announcements/search/", {"stream": "ndjson"}).streaming_content)
+        response = self.client.get("/api/announcements/search/", {"stream": "ndjson"}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertFalse(response.has_header("Content-Length"))
+        chunks = list(response.streaming_content)
+        self.assertGreater(len([chunk for chunk in chunks if chunk]), 2)
+        self.assertEqual(zlib.decompress(b"".join(chunks), 31), plain)
+
+    @skipUnless(compression.brotli and compression.zstandard, "brotli and zstandard are optional")
+    def test_brotli_and_zstd(self):
+        plain = self.client.get("/api/announcements/")
+        response = self.client.get("/api/announcements/", HTTP_ACCEPT_ENCODING="br")
+        self.assertEqual(compression.brotli.decompress(response.content), plain.content)
+        response = self.client.get("/api/announcements/", HTTP_ACCEPT_ENCODING="zstd, br, gzip")
+        self.assertEqual(response["Content-Encoding"], "zstd")
+        reader = compression.zstandard.ZstdDecompressor().decompressobj()
+        self.assertEqual(reader.decompress(response.content), plain.content)
+        response = self.client.get("/api/announcements/search/", {"stream": "ndjson"}, HTTP_ACCEPT_ENCODING="zstd")
+        stream = compression.zstandard.ZstdDecompressor().decompressobj()
+        self.assertIn(b"Matematyka", stream.decompress(b"".join(response.streaming_content)))
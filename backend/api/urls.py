@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.urls import path
+from . import async_views
 from .views import (
     register, 
     login, 
@@ -7,11 +9,18 @@ from .views import (
     edit_announcement, 
     edit_user,
     delete_announcement,
+    announcement_batch,
     get_current_user,
     get_announcement,
     search_announcements,
+    announcement_facets,
     user_list,
-    delete_user
+    export_users,
+    delete_user,
+    user_deletion_job,
+    db_pool_status,
+    metrics,
+    request_profile,
 )
 
 
@@ -24,9 +33,30 @@ urlpatterns = [
     path('announcements/add/', add_announcement, name='add_announcement'),
     path('announcements/edit/<int:pk>/', edit_announcement, name='edit_announcement'),
     path('announcements/delete/<int:pk>/', delete_announcement, name='delete_announcement'),
+    path('announcements/batch/', announcement_batch, name='announcement_batch'),
     path('user/edit/', edit_user, name='edit_user'),
     path('user/me/', get_current_user, name='get_current_user'),
     path('announcements/search/', search_announcements, name='search_announcements'),
+    path('announcements/facets/', announcement_facets, name='announcement_facets'),
     path('users/', user_list, name='user_list'),
+    path('users/export/', export_users, name='export_users'),
     path('users/delete/<int:pk>/', delete_user, name='delete_user'),
-]
\ No newline at end of file
+    path('users/delete-jobs/<int:pk>/', user_deletion_job, name='user_deletion_job'),
+    path('db/pool/', db_pool_status, name='db_pool_status'),
+    path('metrics', metrics, name='metrics'),
+    path('profiles/<slug:profile_id>/', request_profile, name='request_profile'),
+]
+
+if settings.API_ASYNC_READS:
+    # Pod ASGI endpointy odczytu obsługują wersje async (api.async_views).
+    async_read_views = {
+        'announcement_list': async_views.announcement_list,
+        'get_announcement': async_views.get_announcement,
+        'search_announcements': async_views.search_announcements,
+        'get_current_user': async_views.get_current_user,
+    }
+    urlpatterns = [
+        path(str(pattern.pattern), async_read_views[pattern.name], name=pattern.name)
+        if pattern.name in async_read_views else pattern
+        for pattern in urlpatterns
+    ]
@@ -1,5 +1,12 @@
 from django.shortcuts import render, get_object_or_404
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import (
+    api_view,
+    authentication_classes,
+    permission_classes,
+    renderer_classes,
+    throttle_classes,
+)
+from rest_framework.exceptions import NotAuthenticated
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
@@ -7,20 +14,74 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.core.exceptions import ObjectDoesNotExist
-from .serializers import RegisterSerializer, AnnouncementSerializer, SystemUserSerializer
-from .models import Announcement, SystemUser
+from .serializers import (
+    RegisterSerializer,
+    AnnouncementSerializer,
+    PublicAnnouncementSerializer,
+    SystemUserSerializer,
+    UserDeletionJobSerializer,
+)
+from .models import Announcement, SystemUser, UserDeletionJob
 from .exceptions import (
     UserNotFoundException,
     AnnouncementNotFoundException,
+    JobNotFoundException,
+    ProfileNotFoundException,
     UnauthorizedAccessException,
     ValidationErrorException,
 )
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Q
-from .tasks import send_notification
-from rest_framework.pagination import PageNumberPagination
+from .tasks import delete_user_job, send_notification
+from .batch import run_batch
+from .login import authenticate_credentials
+from .throttling import LoginIPThrottle, LoginUsernameThrottle
+from .pagination import AnnouncementPageNumberPagination, KeysetPagination
+from .search import filter_announcements, order_by_rank
+from .streaming import csv_response, ndjson_response
+from .fastpath import serialize_rows, values_for
+from .facets import cached_facets
+from .db.pool import pool_metrics
+from .metrics import CONTENT_TYPE_LATEST, HasMetricsToken, PrometheusRenderer, collect as collect_metrics
+from .profiling import load_profile, pstats_response
+from .conditional import (
+    conditional,
+    announcement_list_validators,
+    announcement_validators,
+    facets_validators,
+    search_validators,
+)
+from .cache import (
+    cached_announcement_payload,
+    cached_list_payload,
+    invalidate_announcement,
+    invalidate_announcements,
+    invalidate_user,
+)
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+
+def wants_public_authors(request):
+    """
+    Authors are returned as id/first_name/last_name unless an authenticated
+    request asks for contact details with ?author_fields=full.
+
+    The representation depends only on the URL (anonymous ?author_fields=full
+    is rejected, not downgraded), so URL-keyed payload caches and ETags stay valid.
+    """
+    if request.query_params.get('author_fields') != 'full':
+        return True
+    if not request.user.is_authenticated:
+        raise NotAuthenticated("author_fields=full requires authentication")
+    return False
+
+
+def announcement_serializer_class(public):
+    return PublicAnnouncementSerializer if public else AnnouncementSerializer
+
+
 @swagger_auto_schema(method='post', request_body=RegisterSerializer)
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -87,11 +148,14 @@ def register(request):
                 }
             }
         ),
-        400: "Invalid credentials"
+        400: "Invalid credentials",
+        429: "Too many login attempts for this IP or username",
+        503: "Login temporarily overloaded"
     }
 )
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginIPThrottle, LoginUsernameThrottle])
 def login(request):
     """
     Authenticate a user and return JWT tokens.
@@ -123,31 +187,61 @@ def login(request):
               description: ID of the authenticated user
       400:
         description: Invalid credentials
+      429:
+        description: Too many login attempts for this IP or username
+      503:
+        description: Too many logins waiting for password verification
     """
     if request.method == 'POST':
-        serializer = TokenObtainPairSerializer(data=request.data)
-        if serializer.is_valid():
-            try:
-                validated_data = serializer.validated_data
-                user = serializer.user
-                response_data = {
-                    'refresh': validated_data['refresh'],
-                    'access': validated_data['access'],
-                    'user_id': user.id
-                }
-                return Response(response_data, status=status.HTTP_200_OK)
-            except Exception as e:
-                raise ValidationErrorException(detail=f"Error during login: {str(e)}")
-        raise ValidationErrorException(detail=serializer.errors)
+        # Throttling (LoginIPThrottle, LoginUsernameThrottle) odrzuca nadmiar żądań przed hashowaniem.
+        data = request.data if isinstance(request.data, dict) else {}
+        user = authenticate_credentials(data.get('username'), data.get('password'))
+        try:
+            refresh = RefreshToken.for_user(user)
+            response_data = {
+                'refresh': str(refresh),
+                'access': str(refresh.access_token),
+                'user_id': user.id
+            }
+            return Response(response_data, status=status.HTTP_200_OK)
+        except Exception as e:
+            raise ValidationErrorException(detail=f"Error during login: {str(e)}")
 
 
+@conditional(announcement_list_validators)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def announcement_list(request):
     """
     Retrieve a list of all announcements.
 
+    Pages are selected with ?page=N by default. Passing ?cursor (empty for the
+    first page) switches to keyset pagination, where next/previous links carry
+    an opaque cursor and every page costs the same; add ?with_count=true to
+    include a cached or estimated total.
+
     ---
+    parameters:
+      - name: page
+        description: Page number (page-number mode)
+        required: false
+        type: integer
+      - name: cursor
+        description: Opaque cursor from a next/previous link (cursor mode)
+        required: false
+        type: string
+      - name: page_size
+        description: Page size in cursor mode (max 100)
+        required: false
+        type: integer
+      - name: with_count
+        description: Include an approximate total count in cursor mode
+        required: false
+        type: boolean
+      - name: author_fields
+        description: Set to 'full' (authenticated requests only) to include the author's email, phone number and staff flag
+        required: false
+        type: string
     responses:
       200:
         description: A list of announcements
@@ -182,12 +276,19 @@ def announcement_list(request):
                     type: string
                     description: Last name of the author
     """
-    paginator = PageNumberPagination()
-    paginator.page_size = 10  # or remove to use global PAGE_SIZE
-    announcements = Announcement.objects.all().order_by('-date_added')
-    result_page = paginator.paginate_queryset(announcements, request)
-    serializer = AnnouncementSerializer(result_page, many=True)
-    return paginator.get_paginated_response(serializer.data)
+    public = wants_public_authors(request)
+
+    def build_payload():
+        serializer_class = announcement_serializer_class(public)
+        announcements = values_for(Announcement.objects.order_by('-date_added', '-id'), serializer_class)
+        if KeysetPagination.is_requested(request):
+            paginator = KeysetPagination()
+        else:
+            paginator = AnnouncementPageNumberPagination()
+        result_page = paginator.paginate_queryset(announcements, request)
+        return paginator.get_paginated_response(serialize_rows(result_page, serializer_class)).data
+
+    return Response(cached_list_payload(request, build_payload))
     
     
 @swagger_auto_schema(
@@ -266,6 +367,7 @@ def add_announcement(request):
     if serializer.is_valid():
         try:
             serializer.save(author=request.user)
+            invalidate_announcements()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         except Exception as e:
             raise ValidationErrorException(detail=str(e))
@@ -334,18 +436,90 @@ def edit_announcement(request, pk):
         description: Validation error
     """
     try:
-        announcement = Announcement.objects.get(pk=pk)
-        if request.user != announcement.author and not request.user.is_staff:
+        announcement = Announcement.objects.with_author().get(pk=pk)
+        if request.user.pk != announcement.author_id and not request.user.is_staff:
             raise UnauthorizedAccessException()
         serializer = AnnouncementSerializer(announcement, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
+            invalidate_announcement(pk)
             return Response(serializer.data, status=status.HTTP_200_OK)
         raise ValidationErrorException(detail=serializer.errors)
     except ObjectDoesNotExist:
         raise AnnouncementNotFoundException()
 
 
+@swagger_auto_schema(
+    method='post',
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        required=['operations'],
+        properties={
+            'operations': openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'op': openapi.Schema(type=openapi.TYPE_STRING, enum=['create', 'update', 'delete']),
+                        'id': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'data': openapi.Schema(type=openapi.TYPE_OBJECT),
+                    },
+                ),
+            ),
+        },
+    ),
+    responses={
+        200: "All operations applied, per-item results",
+        400: "Nothing applied, per-item results with errors",
+    }
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def announcement_batch(request):
+    """
+    Create, update and delete many announcements in one transaction.
+
+    Every operation is validated and permission checked first; if any fails,
+    nothing is applied and the response lists the error of each failed item
+    (other items get status 424). Otherwise all operations are applied with
+    one bulk insert, one bulk update and one delete.
+
+    ---
+    parameters:
+      - name: operations
+        description: >
+          List (at most ANNOUNCEMENT_BATCH_MAX_OPERATIONS) of
+          {"op": "create", "data": {...}}, {"op": "update", "id": N, "data": {...}}
+          or {"op": "delete", "id": N}
+        required: true
+        type: array
+    responses:
+      200:
+        description: All operations applied
+        schema:
+          type: object
+          properties:
+            results:
+              type: array
+              description: Per-operation index, op, id, status and data (create/update) or error
+      400:
+        description: Validation error, permission error or missing announcement in at least one operation
+    """
+    operations = request.data.get('operations') if isinstance(request.data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        raise ValidationErrorException(detail="'operations' must be a non-empty list")
+    if len(operations) > settings.ANNOUNCEMENT_BATCH_MAX_OPERATIONS:
+        raise ValidationErrorException(
+            detail=f"At most {settings.ANNOUNCEMENT_BATCH_MAX_OPERATIONS} operations per batch"
+        )
+
+    applied, results = run_batch(operations, request.user)
+    if not applied:
+        return Response({"error": "No operations were applied", "status": 400, "results": results},
+                        status=status.HTTP_400_BAD_REQUEST)
+    return Response({"results": results}, status=status.HTTP_200_OK)
+
+
 @swagger_auto_schema(
     method='put',
     request_body=SystemUserSerializer,
@@ -406,11 +580,13 @@ def edit_user(request):
     serializer = SystemUserSerializer(user, data=request.data, partial=True)
     if serializer.is_valid():
         try:
-            serializer.save()
-            announcements = Announcement.objects.filter(author=user)
-            for announcement in announcements:
-                announcement.author = user
-                announcement.save()
+            names = (user.first_name, user.last_name)
+            with transaction.atomic():
+                serializer.save()
+                if (user.first_name, user.last_name) != names:
+                    # Kopie imienia i nazwiska w ogłoszeniach - jeden UPDATE dla wszystkich.
+                    Announcement.objects.filter(author_id=user.pk).set_author_names(user.first_name, user.last_name)
+            invalidate_user(user.pk)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
             raise ValidationErrorException(detail=f"Error updating user: {str(e)}")
@@ -450,9 +626,10 @@ def delete_announcement(request, pk):
     """
     try:
         announcement = Announcement.objects.get(pk=pk)
-        if request.user != announcement.author and not request.user.is_staff:
+        if request.user.pk != announcement.author_id and not request.user.is_staff:
             raise UnauthorizedAccessException()
         announcement.delete()
+        invalidate_announcement(pk)
         return Response({"message": "Announcement deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
     except ObjectDoesNotExist:
         raise AnnouncementNotFoundException()
@@ -507,17 +684,28 @@ def get_current_user(request):
 @swagger_auto_schema(
     method='get',
     manual_parameters=[
-        openapi.Parameter('pk', openapi.IN_PATH, description="ID of the announcement", type=openapi.TYPE_INTEGER)
+        openapi.Parameter('pk', openapi.IN_PATH, description="ID of the announcement", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('author_fields', openapi.IN_QUERY, description="Set to 'full' (authenticated requests only) to include the author's email, phone number and staff flag", type=openapi.TYPE_STRING),
     ],
     responses={200: AnnouncementSerializer, 404: "Announcement not found"}
 )
+@conditional(announcement_validators)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_announcement(request, pk):
+    public = wants_public_authors(request)
+
+    def get_author_id():
+        return Announcement.objects.values_list('author_id', flat=True).get(pk=pk)
+
+    def build_payload():
+        announcement = Announcement.objects.with_author(public).get(pk=pk)
+        return announcement_serializer_class(public)(announcement).data
+
     try:
-        announcement = Announcement.objects.get(pk=pk)
-        serializer = AnnouncementSerializer(announcement)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        variant = 'public' if public else 'full'
+        data = cached_announcement_payload(pk, variant, get_author_id, build_payload)
+        return Response(data, status=status.HTTP_200_OK)
     except ObjectDoesNotExist:
         raise AnnouncementNotFoundException()
     except Exception as e:
@@ -527,88 +715,244 @@ def get_announcement(request, pk):
 @swagger_auto_schema(
     method='get',
     manual_parameters=[
+        openapi.Parameter('q', openapi.IN_QUERY, description="Full-text query over subject and content", type=openapi.TYPE_STRING),
         openapi.Parameter('subject', openapi.IN_QUERY, description="Subject filter", type=openapi.TYPE_STRING),
         openapi.Parameter('min_rate', openapi.IN_QUERY, description="Minimal rate", type=openapi.TYPE_NUMBER),
         openapi.Parameter('max_rate', openapi.IN_QUERY, description="Maximal rate", type=openapi.TYPE_NUMBER),
+        openapi.Parameter('cursor', openapi.IN_QUERY, description="Cursor from a next/previous link; empty for the first page", type=openapi.TYPE_STRING),
+        openapi.Parameter('page_size', openapi.IN_QUERY, description="Page size in cursor mode", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('stream', openapi.IN_QUERY, description="Set to 'ndjson' to stream every match, one JSON object per line", type=openapi.TYPE_STRING),
+        openapi.Parameter('author_fields', openapi.IN_QUERY, description="Set to 'full' (authenticated requests only) to include the author's email, phone number and staff flag", type=openapi.TYPE_STRING),
     ],
     responses={200: AnnouncementSerializer(many=True)}
 )
+@conditional(search_validators)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def search_announcements(request):
-    subject = request.query_params.get('subject', None)
-    min_rate = request.query_params.get('min_rate', None)
-    max_rate = request.query_params.get('max_rate', None)
+    """
+    Search announcements by subject and hourly rate.
+
+    ?q runs a full-text query over subject and content. Without a cursor the
+    response is a plain list - best matches first for ?q, otherwise newest
+    first - truncated to SEARCH_MAX_RESULTS rows (X-Results-Truncated is set
+    when rows were cut).
+    ?cursor switches to the same keyset pagination as announcement_list and
+    ?stream=ndjson streams all matches in constant memory.
+    """
+    stream = request.query_params.get('stream', None)
+    if stream and stream != 'ndjson':
+        raise ValidationErrorException(detail="Unsupported stream format")
 
+    public = wants_public_authors(request)
+    serializer_class = announcement_serializer_class(public)
     try:
-        announcements = Announcement.objects.all()
+        announcements = filter_announcements(request.query_params)
+    except Exception as e:
+        raise ValidationErrorException(detail=f"Error searching announcements: {str(e)}")
 
-        if subject:
-            announcements = announcements.filter(subject__icontains=subject)
-        if min_rate:
-            announcements = announcements.filter(hourly_rate__gte=min_rate)
-        if max_rate:
-            announcements = announcements.filter(hourly_rate__lte=max_rate)
+    if stream:
+        return ndjson_response(announcements.with_author(public), serializer_class)
 
-        serializer = AnnouncementSerializer(announcements, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    if KeysetPagination.is_requested(request):
+        paginator = KeysetPagination(max_page_size=settings.SEARCH_MAX_RESULTS)
+        result_page = paginator.paginate_queryset(values_for(announcements, serializer_class), request)
+        return paginator.get_paginated_response(serialize_rows(result_page, serializer_class))
+
+    limit = settings.SEARCH_MAX_RESULTS
+    rows = list(values_for(order_by_rank(announcements), serializer_class)[:limit + 1])
+    response = Response(serialize_rows(rows[:limit], serializer_class), status=status.HTTP_200_OK)
+    if len(rows) > limit:
+        response['X-Results-Truncated'] = 'true'
+    return response
+
+
+@swagger_auto_schema(
+    method='get',
+    manual_parameters=[
+        openapi.Parameter('q', openapi.IN_QUERY, description="Full-text query over subject and content", type=openapi.TYPE_STRING),
+        openapi.Parameter('subject', openapi.IN_QUERY, description="Subject filter", type=openapi.TYPE_STRING),
+        openapi.Parameter('min_rate', openapi.IN_QUERY, description="Minimal rate", type=openapi.TYPE_NUMBER),
+        openapi.Parameter('max_rate', openapi.IN_QUERY, description="Maximal rate", type=openapi.TYPE_NUMBER),
+        openapi.Parameter('top', openapi.IN_QUERY, description="Number of subjects to return", type=openapi.TYPE_INTEGER),
+    ],
+    responses={200: "Facet counts for the filtered announcements"}
+)
+@conditional(facets_validators)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def announcement_facets(request):
+    """
+    Facet counts for the same filters as search_announcements.
+
+    Returns the top subjects and an hourly_rate histogram (FACETS_RATE_BANDS)
+    of all matching announcements, computed with one grouped query and cached
+    until the next announcement change.
+
+    ---
+    responses:
+      200:
+        description: Facet counts
+        schema:
+          type: object
+          properties:
+            total:
+              type: integer
+              description: Number of matching announcements
+            subjects:
+              type: array
+              description: Most common subjects with their counts, most frequent first
+            other_subjects:
+              type: integer
+              description: Number of further subjects not listed
+            hourly_rate:
+              type: array
+              description: Histogram bands (min inclusive, max exclusive, null = no upper bound) with counts
+      400:
+        description: Invalid filters
+    """
+    try:
+        top = int(request.query_params.get('top', settings.FACETS_TOP_SUBJECTS))
+    except ValueError:
+        raise ValidationErrorException(detail="top must be an integer")
+    if not 1 <= top <= settings.FACETS_MAX_TOP_SUBJECTS:
+        raise ValidationErrorException(detail=f"top must be between 1 and {settings.FACETS_MAX_TOP_SUBJECTS}")
+
+    try:
+        data = cached_facets(request.query_params, top)
     except Exception as e:
-        raise ValidationErrorException(detail=f"Error searching announcements: {str(e)}")
+        raise ValidationErrorException(detail=f"Error computing facets: {str(e)}")
+    return Response(data, status=status.HTTP_200_OK)
+
+
+def filter_users(query_params):
+    """
+    Apply the user_list filters (username, email, is_staff) from the query string.
+    """
+    users = SystemUser.objects.all()
+    username = query_params.get('username', None)
+    email = query_params.get('email', None)
+    is_staff = query_params.get('is_staff', None)
+
+    if username:
+        users = users.filter(username__icontains=username)
+    if email:
+        users = users.filter(email__icontains=email)
+    if is_staff:
+        if is_staff.lower() not in ('true', 'false', '1', '0'):
+            raise ValidationErrorException(detail="is_staff must be true or false")
+        users = users.filter(is_staff=is_staff.lower() in ('true', '1'))
+    return users.order_by('id')
+
+
+USER_FILTER_PARAMETERS = [
+    openapi.Parameter('username', openapi.IN_QUERY, description="Username contains (case-insensitive)", type=openapi.TYPE_STRING),
+    openapi.Parameter('email', openapi.IN_QUERY, description="E-mail contains (case-insensitive)", type=openapi.TYPE_STRING),
+    openapi.Parameter('is_staff', openapi.IN_QUERY, description="Only admins (true) or only regular users (false)", type=openapi.TYPE_BOOLEAN),
+]
 
 
 @swagger_auto_schema(
     method='get',
+    manual_parameters=USER_FILTER_PARAMETERS + [
+        openapi.Parameter('cursor', openapi.IN_QUERY, description="Opaque cursor from a next/previous link", type=openapi.TYPE_STRING),
+        openapi.Parameter('page_size', openapi.IN_QUERY, description="Page size (max 100)", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('with_count', openapi.IN_QUERY, description="Include an approximate total count", type=openapi.TYPE_BOOLEAN),
+    ],
     responses={200: SystemUserSerializer(many=True), 403: "Unauthorized access"}
 )
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_list(request):
     """
-    Retrieve a list of all users (admin only).
+    Retrieve a page of users (admin only).
+
+    Users are ordered by id and paginated with a cursor: follow the next and
+    previous links. Filters narrow the list server-side.
 
     ---
     responses:
       200:
-        description: A list of users
+        description: A page of users
         schema:
-          type: array
-          items:
-            type: object
-            properties:
-              id:
-                type: integer
-                description: ID of the user
-              first_name:
-                type: string
-                description: First name of the user
-              last_name:
-                type: string
-                description: Last name of the user
-              email:
-                type: string
-                description: Email address of the user
-              phone_number:
-                type: string
-                description: Phone number of the user
-              is_staff:
-                type: boolean
-                description: Whether the user is an admin
+          type: object
+          properties:
+            next:
+              type: string
+              description: Link to the next page or null
+            previous:
+              type: string
+              description: Link to the previous page or null
+            results:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                    description: ID of the user
+                  first_name:
+                    type: string
+                    description: First name of the user
+                  last_name:
+                    type: string
+                    description: Last name of the user
+                  email:
+                    type: string
+                    description: Email address of the user
+                  phone_number:
+                    type: string
+                    description: Phone number of the user
+                  is_staff:
+                    type: boolean
+                    description: Whether the user is an admin
       403:
         description: Unauthorized access
     """
     if not request.user.is_staff:
         raise UnauthorizedAccessException()
-    users = SystemUser.objects.all()
-    serializer = SystemUserSerializer(users, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    users = values_for(filter_users(request.query_params), SystemUserSerializer)
+    paginator = KeysetPagination(ordering=('id',))
+    result_page = paginator.paginate_queryset(users, request)
+    return paginator.get_paginated_response(serialize_rows(result_page, SystemUserSerializer))
+
+
+@swagger_auto_schema(
+    method='get',
+    manual_parameters=USER_FILTER_PARAMETERS + [
+        openapi.Parameter('stream', openapi.IN_QUERY, description="csv (default) or ndjson", type=openapi.TYPE_STRING),
+    ],
+    responses={200: "Streamed CSV or NDJSON file", 403: "Unauthorized access"}
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_users(request):
+    """
+    Stream all users matching the filters as CSV or NDJSON (admin only).
+
+    Rows are read in chunks of STREAM_CHUNK_SIZE through a server-side cursor,
+    so the export runs in constant memory however many users there are.
+    """
+    if not request.user.is_staff:
+        raise UnauthorizedAccessException()
+    stream = request.query_params.get('stream', 'csv')
+    if stream not in ('csv', 'ndjson'):
+        raise ValidationErrorException(detail="Unsupported stream format")
+
+    users = filter_users(request.query_params)
+    if stream == 'ndjson':
+        return ndjson_response(users, SystemUserSerializer, filename='users.ndjson')
+    return csv_response(users, SystemUserSerializer.Meta.fields, filename='users.csv')
 
 
 @swagger_auto_schema(
     method='delete',
     manual_parameters=[
-        openapi.Parameter('pk', openapi.IN_PATH, description="ID of the user to delete", type=openapi.TYPE_INTEGER)
+        openapi.Parameter('pk', openapi.IN_PATH, description="ID of the user to delete", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('mode', openapi.IN_QUERY, description="'background' to deactivate now and delete in a Celery job", type=openapi.TYPE_STRING),
     ],
     responses={
+        202: UserDeletionJobSerializer,
         204: "User deleted successfully",
         403: "Unauthorized access",
         404: "User not found"
@@ -620,6 +964,10 @@ def delete_user(request, pk):
     """
     Delete a user (admin only).
 
+    With ?mode=background the user is deactivated immediately (their tokens
+    stop working) and a background job deletes their announcements in
+    chunks, then the user; poll the returned job for progress.
+
     ---
     parameters:
       - name: id
@@ -627,6 +975,8 @@ def delete_user(request, pk):
         required: true
         type: integer
     responses:
+      202:
+        description: Deletion job queued
       204:
         description: User deleted successfully
       403:
@@ -636,9 +986,130 @@ def delete_user(request, pk):
     """
     if not request.user.is_staff:
         raise UnauthorizedAccessException()
+    mode = request.query_params.get('mode', None)
+    if mode and mode != 'background':
+        raise ValidationErrorException(detail="Unsupported deletion mode")
     try:
         user = SystemUser.objects.get(pk=pk)
+        if mode == 'background':
+            user.is_active = False
+            user.save(update_fields=['is_active'])
+            invalidate_user(pk)
+            job = UserDeletionJob.objects.create(user_id=user.pk, username=user.username, requested_by=request.user)
+            delete_user_job.delay(job.pk)
+            return Response(UserDeletionJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
         user.delete()
+        invalidate_user(pk)
         return Response({"message": "User deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
     except ObjectDoesNotExist:
-        raise UserNotFoundException()
\ No newline at end of file
+        raise UserNotFoundException()
+
+
+@swagger_auto_schema(
+    method='get',
+    responses={200: UserDeletionJobSerializer, 403: "Unauthorized access", 404: "Job not found"}
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def user_deletion_job(request, pk):
+    """
+    Progress of a background user deletion (admin only).
+
+    ---
+    responses:
+      200:
+        description: Job status (pending, running, done or failed) and deleted/total announcements
+      403:
+        description: Unauthorized access
+      404:
+        description: Job not found
+    """
+    if not request.user.is_staff:
+        raise UnauthorizedAccessException()
+    try:
+        job = UserDeletionJob.objects.get(pk=pk)
+    except ObjectDoesNotExist:
+        raise JobNotFoundException()
+    return Response(UserDeletionJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+@swagger_auto_schema(
+    method='get',
+    responses={200: "Connection pool metrics per database alias", 403: "Unauthorized access"}
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def db_pool_status(request):
+    """
+    Connection pool metrics of the worker process serving the request (admin only).
+
+    Empty unless the database uses the api.db.postgresql_pool backend (DB_POOL=1).
+
+    ---
+    responses:
+      200:
+        description: size, idle, in_use, waiting, checkouts, timeouts and wait time for each pool
+      403:
+        description: Unauthorized access
+    """
+    if not request.user.is_staff:
+        raise UnauthorizedAccessException()
+    return Response(pool_metrics(), status=status.HTTP_200_OK)
+
+
+@swagger_auto_schema(
+    method='get',
+    responses={200: "Metrics in the Prometheus text format", 403: "Missing or wrong metrics token"}
+)
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([HasMetricsToken])
+@renderer_classes([PrometheusRenderer])
+def metrics(request):
+    """
+    Per-route request counts, latency, SQL, render time and response size
+    histograms plus Celery publish latency, aggregated over all worker
+    processes when PROMETHEUS_MULTIPROC_DIR is set.
+
+    Requires "Authorization: Bearer <METRICS_TOKEN>" when METRICS_TOKEN is set.
+    """
+    return Response(collect_metrics(), content_type=CONTENT_TYPE_LATEST)
+
+
+@swagger_auto_schema(
+    method='get',
+    manual_parameters=[
+        openapi.Parameter('profile_id', openapi.IN_PATH, description="X-Profile-Id of the profiled request", type=openapi.TYPE_STRING),
+        openapi.Parameter('download', openapi.IN_QUERY, description="'pstats' for the raw cProfile stats", type=openapi.TYPE_STRING),
+    ],
+    responses={200: "Profile summary or pstats file", 403: "Unauthorized access", 404: "Profile not found or expired"}
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def request_profile(request, profile_id):
+    """
+    A stored request profile (admin only).
+
+    Profiles are recorded for staff requests sent with "X-Profile: 1" or
+    ?profile=1 and kept for PROFILING_TTL seconds.
+
+    ---
+    responses:
+      200:
+        description: Request, timing, every SQL statement with its duration and the top functions by cumulative time
+      403:
+        description: Unauthorized access
+      404:
+        description: Profile not found or expired
+    """
+    if not request.user.is_staff:
+        raise UnauthorizedAccessException()
+    profile = load_profile(profile_id)
+    if profile is None:
+        raise ProfileNotFoundException()
+    download = request.query_params.get('download', None)
+    if download == 'pstats':
+        return pstats_response(profile_id, profile['pstats'])
+    if download:
+        raise ValidationErrorException(detail="Unsupported download format")
+    return Response(profile['summary'], status=status.HTTP_200_OK)
@@ -0,0 +1,106 @@
+"""
+Warmup for ``manage.py serve``.
+
+``warm_up_app`` runs once in the gunicorn master before workers are forked
+(``preload_app``), so everything it builds - imported modules, the URL
+resolver, model ``_meta`` caches, compiled validator regexes and row
+mappers - is shared copy-on-write by all workers. ``warm_up_worker`` runs in
+each worker after the fork: it opens the database connection the worker
+will use and sends one request through the full middleware stack, so the
+first real client does not pay for lazy initialisation.
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.test import Client
+from django.urls import get_resolver, reverse
+from rest_framework.serializers import ModelSerializer
+from rest_framework.settings import api_settings
+
+from . import serializers
+from .fastpath import get_row_mapper
+
+# Serializery zwracane przez szybką ścieżkę (api.fastpath) w endpointach list.
+ROW_MAPPER_SERIALIZERS = (
+    serializers.AnnouncementSerializer,
+    serializers.PublicAnnouncementSerializer,
+    serializers.SystemUserSerializer,
+)
+WARMUP_PATH = '/api/announcements/?cursor=&page_size=1'
+
+
+@contextmanager
+def timed(timings, name):
+    started = time.perf_counter()
+    yield
+    timings[name] = (time.perf_counter() - started) * 1000
+
+
+def warm_up_app():
+    """
+    Build the process-wide caches; returns ``{step: milliseconds}``.
+    """
+    timings = {}
+    with timed(timings, 'urls'):
+        resolver = get_resolver()
+        resolver.resolve('/api/announcements/')
+        reverse('announcement_list')
+    with timed(timings, 'models'):
+        for model in apps.get_models():
+            model._meta.get_fields()
+    with timed(timings, 'serializers'):
+        for name in dir(serializers):
+            serializer_class = getattr(serializers, name)
+            if isinstance(serializer_class, type) and issubclass(serializer_class, ModelSerializer) \
+                    and serializer_class.__module__ == serializers.__name__:
+                # Pola budują się leniwie (i kompilują regexy walidatorów).
+                serializer_class().fields
+        for serializer_class in ROW_MAPPER_SERIALIZERS:
+            get_row_mapper(serializer_class)
+    with timed(timings, 'settings'):
+        for setting in ('DEFAULT_RENDERER_CLASSES', 'DEFAULT_PARSER_CLASSES', 'DEFAULT_AUTHENTICATION_CLASSES',
+                        'DEFAULT_PERMISSION_CLASSES', 'DEFAULT_THROTTLE_CLASSES', 'DEFAULT_CONTENT_NEGOTIATION_CLASS',
+                        'EXCEPTION_HANDLER'):
+            getattr(api_settings, setting)
+    # Połączeń nie wolno dziedziczyć przez fork - każdy worker otwiera własne.
+    connections.close_all()
+    return timings
+
+
+def request_host():
+    """
+    A Host header accepted by ALLOWED_HOSTS, for requests made in-process.
+    """
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    # Pusta lista przy DEBUG przepuszcza localhost.
+    return 'localhost'
+
+
+def _connect():
+    for alias in connections:
+        connections[alias].ensure_connection()
+
+
+def warm_up_worker(asgi=False):
+    """
+    Connect to the databases and send one in-process request; returns
+    ``{step: milliseconds}``.
+    """
+    timings = {}
+    with timed(timings, 'db'):
+        if asgi:
+            # Widoki sync pod ASGI działają w jednym współdzielonym wątku
+            # sync_to_async - połączenie musi zostać otwarte właśnie tam.
+            asyncio.run(sync_to_async(_connect)())
+        else:
+            _connect()
+    with timed(timings, 'request'):
+        Client(raise_request_exception=False).get(WARMUP_PATH, HTTP_HOST=request_host())
+    return timings
@@ -12,5 +12,11 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# Endpointy odczytu w wersji async (api.async_views) tylko na życzenie: w pomiarach
+# były wolniejsze (81 vs 237 req/s) i omijają cache payloadów oraz ETag/304.
+os.environ.setdefault('API_ASYNC_READS', '0')
+# Pod ASGI każde wywołanie sync_to_async może trafić na inny wątek, a trwałe
+# połączenia są per wątek - zostawałyby otwarte. Trwałe połączenia: DB_POOL=1.
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
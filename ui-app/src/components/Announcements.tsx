@@ -15,7 +15,7 @@ const Announcements = () => {
             id: number;
             first_name: string;
             last_name: string;
-            email: string;
+            email?: string;
             phone_number?: string;
         };
     }
@@ -41,9 +41,22 @@ const Announcements = () => {
     const [user, setUser] = useState<User | null>(null);
     const navigate = useNavigate();
 
+    // Dane kontaktowe autorów API zwraca tylko zalogowanym, na wyraźne żądanie (author_fields=full).
+    const authorRequest = () => {
+        const token = sessionStorage.getItem('access_token');
+        if (!token) {
+            return { params: {}, headers: {} };
+        }
+        return { params: { author_fields: 'full' }, headers: { Authorization: `Bearer ${token}` } };
+    };
+
     const fetchAnnouncements = async (page = 1) => {
         try {
-            const response = await axios.get(`http://localhost:8000/api/announcements/?page=${page}`);
+            const { params, headers } = authorRequest();
+            const response = await axios.get('http://localhost:8000/api/announcements/', {
+                params: { ...params, page },
+                headers
+            });
             setAnnouncements(Array.isArray(response.data.results) ? response.data.results : []);
             setNext(response.data.next);
             setPrevious(response.data.previous);
@@ -87,12 +100,13 @@ const Announcements = () => {
 
     const searchAnnouncements = async () => {
     try {
-        const params: any = {};
+        const { params: authorParams, headers } = authorRequest();
+        const params: any = { ...authorParams };
         if (searchSubject) params.subject = searchSubject;
         if (searchMinRate) params.min_rate = searchMinRate;
         if (searchMaxRate) params.max_rate = searchMaxRate;
 
-        const response = await axios.get('http://localhost:8000/api/announcements/search/', { params });
+        const response = await axios.get('http://localhost:8000/api/announcements/search/', { params, headers });
         setAnnouncements(Array.isArray(response.data) ? response.data : []);
         setNext(null);
         setPrevious(null);
@@ -138,7 +152,7 @@ useEffect(() => {
                         <div className="right-section">
                             <img className="avatar" src={avatar} alt="User Avatar" />
                             <p className="author-name">{announcement.author.first_name} {announcement.author.last_name}</p>
-                            <p className="email">{announcement.author.email}</p>
+                            {announcement.author.email && <p className="email">{announcement.author.email}</p>}
                             {announcement.author.phone_number && <p className="phone">{announcement.author.phone_number}</p>}
 
                             {(user && (user.id === announcement.author.id || user.is_staff)) && (
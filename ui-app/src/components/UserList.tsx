@@ -11,11 +11,28 @@ interface User {
   is_staff: boolean;
 }
 
+interface DeletionJob {
+  id: number;
+  username: string;
+  status: "pending" | "running" | "done" | "failed";
+  deleted_announcements: number;
+  total_announcements: number;
+  error: string;
+}
+
+interface UserPage {
+  next: string | null;
+  previous: string | null;
+  results: User[];
+}
+
 const UserList = () => {
   const [users, setUsers] = useState<User[]>([]);
+  const [nextUrl, setNextUrl] = useState<string | null>(null);
+  const [query, setQuery] = useState("");
   const [error, setError] = useState<string | null>(null);
 
-  const fetchUsers = async () => {
+  const fetchUsers = async (url?: string) => {
     const token = sessionStorage.getItem("access_token");
     if (!token) {
       setError("Unauthorized access. Please log in.");
@@ -23,10 +40,18 @@ const UserList = () => {
     }
 
     try {
-      const response = await axios.get("http://localhost:8000/api/users/", {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      setUsers(response.data);
+      // Lista jest stronicowana kursorem - kolejne strony pod linkiem "next".
+      const response = await axios.get<UserPage>(
+        url ?? "http://localhost:8000/api/users/",
+        {
+          headers: { Authorization: `Bearer ${token}` },
+          params: url ? undefined : { email: query || undefined },
+        }
+      );
+      setUsers((current) =>
+        url ? [...current, ...response.data.results] : response.data.results
+      );
+      setNextUrl(response.data.next);
     } catch (err) {
       setError("Failed to fetch users. You might not have permission.");
     }
@@ -42,16 +67,37 @@ const UserList = () => {
     }
 
     try {
-      await axios.delete(`http://localhost:8000/api/users/delete/${id}/`, {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      setUsers(users.filter((user) => user.id !== id));
-      alert("User deleted successfully.");
+      // Konto jest wyłączane od razu, ogłoszenia usuwa zadanie w tle.
+      const response = await axios.delete<DeletionJob>(
+        `http://localhost:8000/api/users/delete/${id}/?mode=background`,
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
+      setUsers((current) => current.filter((user) => user.id !== id));
+      pollDeletionJob(response.data.id, token);
     } catch (err) {
       setError("Failed to delete user. You might not have permission.");
     }
   };
 
+  const pollDeletionJob = async (jobId: number, token: string) => {
+    try {
+      const response = await axios.get<DeletionJob>(
+        `http://localhost:8000/api/users/delete-jobs/${jobId}/`,
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
+      const job = response.data;
+      if (job.status === "done") {
+        alert(`User ${job.username} deleted successfully.`);
+      } else if (job.status === "failed") {
+        setError(`Failed to delete user ${job.username}: ${job.error}`);
+      } else {
+        setTimeout(() => pollDeletionJob(jobId, token), 2000);
+      }
+    } catch (err) {
+      setError("Failed to check the deletion status.");
+    }
+  };
+
   useEffect(() => {
     fetchUsers();
   }, []);
@@ -61,6 +107,21 @@ const UserList = () => {
   return (
     <div className="user-list-container">
       <h1>User List</h1>
+      <form
+        className="user-search"
+        onSubmit={(e) => {
+          e.preventDefault();
+          fetchUsers();
+        }}
+      >
+        <input
+          type="text"
+          placeholder="Filter by email"
+          value={query}
+          onChange={(e) => setQuery(e.target.value)}
+        />
+        <button type="submit">Search</button>
+      </form>
       <div className="user-list">
         {users.map((user) => (
           <div key={user.id} className="user-card">
@@ -91,6 +152,11 @@ const UserList = () => {
           </div>
         ))}
       </div>
+      {nextUrl && (
+        <button className="load-more-button" onClick={() => fetchUsers(nextUrl)}>
+          Load more
+        </button>
+      )}
     </div>
   );
 };